@@ -23,6 +23,8 @@ if config.config_file_name is not None:
 
 from app.core.config import settings
 from app.db.base import BaseModel
+from app.models import ai_generation as _ai_generation
+from app.models import ai_job as _ai_job
 from app.models import course as _course
 from app.models import lesson as _lesson
 from app.models import media as _media
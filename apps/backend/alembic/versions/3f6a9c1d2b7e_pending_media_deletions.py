@@ -0,0 +1,67 @@
+"""pending media deletions queue
+
+Revision ID: 3f6a9c1d2b7e
+Revises: d99228772778
+Create Date: 2026-10-18 10:12:41.208514
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6a9c1d2b7e"
+down_revision: Union[str, None] = "d99228772778"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pending_media_deletions",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("public_id", sa.String(length=255), nullable=False),
+        sa.Column(
+            "resource_type",
+            postgresql.ENUM(
+                "image", "video", name="media_type_enum", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column(
+            "next_attempt_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "public_id", "resource_type", name="uq_pending_media_deletion_asset"
+        ),
+    )
+    op.create_index(
+        op.f("ix_pending_media_deletions_next_attempt_at"),
+        "pending_media_deletions",
+        ["next_attempt_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_pending_media_deletions_next_attempt_at"),
+        table_name="pending_media_deletions",
+    )
+    op.drop_table("pending_media_deletions")
@@ -0,0 +1,30 @@
+"""pending media deletions: failed_at
+
+Revision ID: 4d2b9f6c8a15
+Revises: c7f2a8e41d93
+Create Date: 2026-10-18 16:40:12.518273
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d2b9f6c8a15"
+down_revision: Union[str, None] = "c7f2a8e41d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pending_media_deletions",
+        sa.Column("failed_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pending_media_deletions", "failed_at")
@@ -0,0 +1,39 @@
+"""media reconcile state
+
+Revision ID: 5b8d2e7f1a64
+Revises: 9e41d7f0c3a2
+Create Date: 2026-10-18 11:02:17.530946
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8d2e7f1a64"
+down_revision: Union[str, None] = "9e41d7f0c3a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_reconcile_state",
+        sa.Column("scope", sa.String(length=32), nullable=False),
+        sa.Column("high_water_mark", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("last_id", sa.UUID(), nullable=True),
+        sa.Column("locked_until", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("last_run_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column(
+            "last_report", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("media_reconcile_state")
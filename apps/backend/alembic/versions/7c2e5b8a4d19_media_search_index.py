@@ -0,0 +1,74 @@
+"""media search: tsvector + trigram indexes
+
+Revision ID: 7c2e5b8a4d19
+Revises: 3f6a9c1d2b7e
+Create Date: 2026-10-18 11:02:17.734102
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e5b8a4d19"
+down_revision: Union[str, None] = "3f6a9c1d2b7e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # stored generated columns rewrite the table once
+    op.add_column(
+        "media",
+        sa.Column(
+            "search_text",
+            sa.Text(),
+            sa.Computed(
+                "coalesce(title, '') || ' ' || coalesce(alt_text, '') || ' ' "
+                "|| coalesce(original_filename, '')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "media",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') "
+                "|| setweight(to_tsvector('simple'::regconfig, coalesce(alt_text, '')), 'B') "
+                "|| setweight(to_tsvector('simple'::regconfig, coalesce(original_filename, '')), 'C')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_media_search_vector",
+        "media",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_media_search_text_trgm",
+        "media",
+        ["search_text"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_search_text_trgm", table_name="media")
+    op.drop_index("ix_media_search_vector", table_name="media")
+    op.drop_column("media", "search_vector")
+    op.drop_column("media", "search_text")
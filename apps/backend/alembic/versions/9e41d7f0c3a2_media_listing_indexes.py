@@ -0,0 +1,51 @@
+"""media listing: partial/composite indexes for list_filtered
+
+Revision ID: 9e41d7f0c3a2
+Revises: 7c2e5b8a4d19
+Create Date: 2026-10-18 11:48:53.190617
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e41d7f0c3a2"
+down_revision: Union[str, None] = "7c2e5b8a4d19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RECENT = [sa.text("created_at DESC"), sa.text("id DESC")]
+
+INDEXES = [
+    ("ix_media_live_recent", RECENT, "is_deleted = false"),
+    ("ix_media_live_type_recent", ["resource_type", *RECENT], "is_deleted = false"),
+    ("ix_media_live_published_recent", ["is_published", *RECENT], "is_deleted = false"),
+    ("ix_media_trash_recent", RECENT, "is_deleted = true"),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps media writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                "media",
+                columns,
+                unique=False,
+                postgresql_where=sa.text(where),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name="media", postgresql_concurrently=True, if_exists=True
+            )
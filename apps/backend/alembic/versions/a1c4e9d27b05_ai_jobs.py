@@ -0,0 +1,107 @@
+"""ai generation jobs
+
+Revision ID: a1c4e9d27b05
+Revises: 5b8d2e7f1a64
+Create Date: 2026-10-18 13:24:09.114602
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a1c4e9d27b05"
+down_revision: Union[str, None] = "5b8d2e7f1a64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ai_job_status_enum = postgresql.ENUM(
+    "queued",
+    "running",
+    "succeeded",
+    "failed",
+    "cancelled",
+    name="ai_job_status_enum",
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    ai_job_status_enum.create(op.get_bind(), checkfirst=True)
+    op.create_table(
+        "ai_jobs",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("course_id", sa.UUID(), nullable=False),
+        sa.Column("gemini_model", sa.String(length=100), nullable=False),
+        sa.Column("key_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("max_tokens", sa.Integer(), nullable=False),
+        sa.Column("status", ai_job_status_enum, nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("succeeded", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("input_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("output_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("total_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("created_by", sa.UUID(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["course_id"], ["courses.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_ai_jobs_course_id"), "ai_jobs", ["course_id"], unique=False
+    )
+    op.create_table(
+        "ai_job_tasks",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("job_id", sa.UUID(), nullable=False),
+        sa.Column("lesson_id", sa.Integer(), nullable=False),
+        sa.Column("key_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("status", ai_job_status_enum, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column(
+            "next_attempt_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "usage_metadata", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["ai_jobs.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["lesson_id"], ["lessons.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "lesson_id", name="uq_ai_job_task_lesson"),
+    )
+    op.create_index(
+        "ix_ai_job_tasks_due",
+        "ai_job_tasks",
+        ["next_attempt_at"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_ai_job_tasks_due",
+        table_name="ai_job_tasks",
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.drop_table("ai_job_tasks")
+    op.drop_index(op.f("ix_ai_jobs_course_id"), table_name="ai_jobs")
+    op.drop_table("ai_jobs")
+    ai_job_status_enum.drop(op.get_bind(), checkfirst=True)
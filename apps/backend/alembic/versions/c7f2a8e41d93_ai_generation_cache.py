@@ -0,0 +1,44 @@
+"""ai generation cache
+
+Revision ID: c7f2a8e41d93
+Revises: a1c4e9d27b05
+Create Date: 2026-10-18 14:06:51.402377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7f2a8e41d93"
+down_revision: Union[str, None] = "a1c4e9d27b05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_generation_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("gemini_model", sa.String(length=100), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("input_tokens", sa.Integer(), nullable=True),
+        sa.Column(
+            "usage_metadata", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ai_generation_cache")
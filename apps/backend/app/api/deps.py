@@ -1,4 +1,9 @@
-from fastapi import Depends, HTTPException, status, Request
+from uuid import UUID
+
+from typing import Optional
+
+import httpx
+from fastapi import Depends, HTTPException, Query, status, Request
 from fastapi.security import (
     # OAuth2PasswordBearer,
     HTTPBearer,
@@ -6,10 +11,16 @@ from fastapi.security import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import decode_access_token, decode_refresh_token
+from app.core.security import (
+    decode_access_token,
+    decode_access_token_cached,
+    decode_refresh_token,
+)
 from app.db.session import get_async_session
 from app.services import user_crud
 from app.schemas.auth import TokenPayload
+from app.utils.http_client import http_clients
+from app.utils.media_urls import ImagePreset, use_image_preset
 
 
 # Password Bearer
@@ -27,20 +38,31 @@ def require_role(allowed_roles: list[str]):
     ):
         # print({"token": token.model_dump().get("credentials")})
         # return token
-        
+
         token = token_obj.credentials
         if not token:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
             )
-        payload = decode_access_token(token)
+        payload = decode_access_token_cached(token)
         if not payload or payload.get("role") not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
             )
-        user = await user_crud.get(db, payload["sub"])
+        try:
+            user_id = UUID(str(payload["sub"]))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+            )
+        user = await user_crud.get_auth_user(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
+        # a role change takes effect without waiting for the token to expire
+        if user.role.value not in allowed_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+            )
         return user
 
     return _require
@@ -76,4 +98,22 @@ async def extract_refresh_token(request: Request) -> TokenPayload:
     return TokenPayload(**payload)
 
 
-get_current_admin = require_role(["ADMIN"])
\ No newline at end of file
+get_current_admin = require_role(["ADMIN"])
+
+
+async def image_preset(
+    image_preset: Optional[ImagePreset] = Query(
+        None,
+        description="Add src/srcset/sizes (Cloudinary f_auto/q_auto width buckets) "
+        "for this preset to embedded media",
+    ),
+) -> Optional[ImagePreset]:
+    # async so it runs in the request's own context; MediaWithUrl reads it
+    # while the response is serialized
+    use_image_preset(image_preset)
+    return image_preset
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared pooled AsyncClient; use it instead of opening one per call."""
+    return http_clients.async_client
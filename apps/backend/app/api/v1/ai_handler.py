@@ -1,8 +1,20 @@
-from fastapi import APIRouter, Depends
-from app.services.ai_handler import generate_lesson_service, update_lesson_service
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.services.ai_handler import (
+    build_lesson_prompt,
+    generate_lesson_service,
+    stream_lesson_update,
+    update_lesson_service,
+)
+from app.services.ai_jobs import ai_job_queue
+from app.schemas.ai_job import AIJobRead, AIJobTaskRead
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_async_session
+from app.schemas.user import AuthUser
+from app.utils.gemini_scheduler import gemini_scheduler
 
 from app.api.deps import get_current_admin
 from app.core.config import settings
@@ -11,22 +23,58 @@ from app.core.config import settings
 router = APIRouter(prefix="/ai_handler", tags=["AI HANDLER"])
 
 
-@router.post("/update_lesson", dependencies=[Depends(get_current_admin)])
+def _require_key(gemini_key: Optional[str]) -> None:
+    if not gemini_key and not gemini_scheduler.keys:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="gemini_key is required when no GEMINI_API_KEYS are configured.",
+        )
+
+
+@router.post(
+    "/update_lesson",
+    dependencies=[Depends(get_current_admin)],
+    responses={
+        200: {
+            "content": {"application/json": {}, "text/event-stream": {}},
+            "description": "The updated lesson, or with `stream=true` SSE "
+            "`chunk` events followed by `done` or `error`",
+        }
+    },
+)
 async def generate_and_update_lesson(
     course_uid: UUID,
     lesson_id: int,
-    gemini_key: str,
+    gemini_key: Optional[str] = Query(
+        None, description="Defaults to the configured key pool (GEMINI_API_KEYS)"
+    ),
     gemini_model: str = settings.GEMINI_MODEL or "",
     max_tokens: int = 2000,
+    stream: bool = Query(False, description="Stream the generation as SSE"),
+    reuse: bool = Query(
+        False,
+        description="Return the stored result of an identical earlier generation "
+        "(same prompt, model and max_tokens) instead of calling Gemini",
+    ),
     db: AsyncSession = Depends(get_async_session),
 ):
+    _require_key(gemini_key)
+    if stream:
+        prompt = await build_lesson_prompt(db, course_uid, lesson_id, max_tokens)
+        return StreamingResponse(
+            stream_lesson_update(
+                prompt, lesson_id, gemini_model, gemini_key, max_tokens, reuse=reuse
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
     try:
         if not course_uid:
             raise ValueError("course_uid is expected!")
         if not lesson_id:
             raise ValueError("lesson_id is expected!")
         result = await generate_lesson_service(
-            db, course_uid, lesson_id, gemini_model, gemini_key, max_tokens
+            db, course_uid, lesson_id, gemini_model, gemini_key, max_tokens, reuse
         )
         if result and result.get("text"):
             output = await update_lesson_service(lesson_id, result.get("text"), db)
@@ -38,8 +86,96 @@ async def generate_and_update_lesson(
                 "content": output.content,
                 "id": output.id,
                 "lesson_order": output.lesson_order,
+                "cached": result.get("cached", False),
             }
         else:
             raise ValueError("AI GNERATION ERROR!")
     except Exception as e:
         return e
+
+
+@router.post(
+    "/jobs/generate_course",
+    response_model=AIJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Generate every lesson of a course in the background",
+)
+async def generate_course(
+    course_uid: UUID,
+    gemini_key: Optional[str] = Query(
+        None, description="Defaults to the configured key pool (GEMINI_API_KEYS)"
+    ),
+    gemini_model: str = settings.GEMINI_MODEL or "",
+    max_tokens: int = Query(2000, ge=1),
+    only_empty: bool = Query(
+        False, description="Skip lessons that already have content"
+    ),
+    admin: AuthUser = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_session),
+):
+    _require_key(gemini_key)
+    if not gemini_model:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="gemini_model is required.",
+        )
+    return await ai_job_queue.submit_course(
+        db,
+        course_uid,
+        gemini_key=gemini_key,
+        gemini_model=gemini_model,
+        max_tokens=max_tokens,
+        only_empty=only_empty,
+        created_by=admin.id,
+    )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=AIJobRead,
+    dependencies=[Depends(get_current_admin)],
+    summary="Progress and token usage of a generation job",
+)
+async def get_job(
+    job_id: UUID,
+    include_tasks: bool = Query(False),
+    db: AsyncSession = Depends(get_async_session),
+):
+    job = AIJobRead.model_validate(await ai_job_queue.get(db, job_id))
+    if include_tasks:
+        tasks = await ai_job_queue.list_tasks(db, job_id)
+        job.tasks = [AIJobTaskRead.model_validate(t) for t in tasks]
+    return job
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=AIJobRead,
+    dependencies=[Depends(get_current_admin)],
+    summary="Cancel the lessons of a job that have not started",
+)
+async def cancel_job(job_id: UUID, db: AsyncSession = Depends(get_async_session)):
+    return await ai_job_queue.cancel(db, job_id)
+
+
+@router.post(
+    "/jobs/{job_id}/resume",
+    response_model=AIJobRead,
+    dependencies=[Depends(get_current_admin)],
+    summary="Give the workers the job's API key again (after a restart)",
+)
+async def resume_job(
+    job_id: UUID,
+    gemini_key: str,
+    db: AsyncSession = Depends(get_async_session),
+):
+    return await ai_job_queue.resume(db, job_id, gemini_key)
+
+
+@router.get(
+    "/keys",
+    dependencies=[Depends(get_current_admin)],
+    summary="Request/token headroom and cooldown of each pooled Gemini key",
+)
+async def gemini_key_pool():
+    return gemini_scheduler.snapshot()
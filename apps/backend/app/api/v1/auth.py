@@ -6,8 +6,7 @@ from sqlalchemy import select
 from app.schemas.auth import TokenOut, TokenPayload
 from app.schemas.user import UserRead, UserUpdateByAdmin
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    password_hasher,
     create_access_token,
     create_refresh_token,
 )
@@ -31,10 +30,14 @@ async def login(
     stmt = select(User).where(User.username == form.username)
     res = await db.execute(stmt)
     user = res.scalar_one_or_none()
-    if not user or not verify_password(form.password, user.password):
+    if not user or not await password_hasher.verify(form.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect credentials"
         )
+    if password_hasher.needs_rehash(user.password):
+        # BCRYPT_ROUNDS changed since this hash was made; upgrade it transparently
+        user.password = await password_hasher.hash(form.password)
+        await db.commit()
     access_token = create_access_token(
         {
             "sub": str(user.id),
@@ -96,8 +99,7 @@ async def reset_password(
     user = await user_crud.get(db, token_payload.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    password = get_password_hash(form.password)
-    print(form.password, password)
+    password = await password_hasher.hash(form.password)
     user_password = UserUpdateByAdmin(password=password)
     data = await user_crud.update(db, user, user_password)
     return {"message": "password reset successfully!", "data": data}
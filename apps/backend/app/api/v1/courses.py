@@ -1,34 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.schemas.course import CourseCreate, CourseUpdate, CourseRead, CourseReadBase
 from app.services import course_crud
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, image_preset
 from app.db.session import get_async_session
+from app.core.config import settings
+from app.core.response_cache import RawJSON, response_cache
+from app.utils.media_urls import ImagePreset
 from uuid import UUID
 
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
 
 # ─── Public endpoints ────────────────────────────────────────────
-@router.get("", response_model=list[CourseReadBase])
+@router.get(
+    "", response_model=list[CourseReadBase], dependencies=[Depends(image_preset)]
+)
 async def list_courses(
-    skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_async_session)
+    request: Request,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page"
+    ),
+    db: AsyncSession = Depends(get_async_session),
 ):
-    return await course_crud.list_published(db, skip=skip, limit=limit)
+    async def build():
+        courses, next_cursor = await course_crud.list_published(
+            db, cursor=cursor, skip=skip, limit=limit
+        )
+        return courses, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+    return await response_cache.serve(request, "courses", list[CourseReadBase], build)
 
 
 @router.get("/{course_id}", response_model=CourseRead)
-async def get_course(course_id: UUID, db: AsyncSession = Depends(get_async_session)):
-    course = await course_crud.getDetailed(db, course_id)
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
-        )
-    return course
+async def get_course(
+    course_id: UUID,
+    request: Request,
+    preset: Optional[ImagePreset] = Depends(image_preset),
+    db: AsyncSession = Depends(get_async_session),
+):
+    async def build():
+        # responsive image URLs are derived in Python, so presets use the ORM path
+        if settings.COURSE_DETAIL_JSON_AGG and preset is None:
+            found = await course_crud.get_detailed_json(db, course_id)
+            course = RawJSON(*found) if found else None
+        else:
+            course = await course_crud.getDetailed(db, course_id)
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
+            )
+        return course, {}
+
+    return await response_cache.serve(request, "courses", CourseRead, build)
 
 
 # ─── Admin endpoints ─────────────────────────────────────────────
@@ -51,7 +81,7 @@ async def create_courses_bulk(
     data: List[CourseCreate],
     db: AsyncSession = Depends(get_async_session),
 ):
-    return await course_crud.create_bulk(db, data)
+    return await course_crud.create_bulk(db, data, profile="card")
 
 
 @router.put(
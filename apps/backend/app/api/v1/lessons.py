@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.lesson import LessonCreate, LessonUpdate, LessonRead, LessonReadBase
@@ -6,22 +9,48 @@ from app.services import lesson_crud
 from app.api.deps import get_current_admin
 from app.db.session import get_async_session
 
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
+CONTENT_CHUNK = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: Optional[str]) -> Optional[dict]:
+    """Single `bytes=` range as get_content_range kwargs; anything else is ignored."""
+    if not header:
+        return None
+    m = _RANGE.match(header.strip())
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == "":
+        return {"suffix": int(last)} if int(last) > 0 else None
+    if last == "":
+        return {"start": int(first)}
+    if int(last) < int(first):
+        return None
+    return {"start": int(first), "end": int(last)}
+
 
 # ─── Public / shared endpoints ───────────────────────────────────
 @router.get("", response_model=list[LessonReadBase])
 async def list_lessons(
+    response: Response,
     section_id: int = Query(..., description="Filter by parent section"),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page"
+    ),
+    limit: int = Query(500, ge=1, le=500),
     db: AsyncSession = Depends(get_async_session),
 ):
-    return (
-        await lesson_crud.list(db, skip=0, limit=500)
-        if section_id is None
-        else [l for l in await lesson_crud.list(db) if l.section_id == section_id]
+    lessons, next_cursor = await lesson_crud.list_by_section(
+        db, section_id, cursor=cursor, limit=limit
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return lessons
 
 
 @router.get("/{lesson_id}", response_model=LessonRead)
@@ -32,6 +61,62 @@ async def get_lesson(lesson_id: int, db: AsyncSession = Depends(get_async_sessio
     return lesson
 
 
+@router.get(
+    "/{lesson_id}/content",
+    response_class=StreamingResponse,
+    summary="Lesson Markdown, streamed; supports Range requests",
+    responses={
+        200: {"content": {"text/markdown": {}}},
+        206: {"description": "Partial content"},
+        404: {"description": "Lesson not found"},
+        416: {"description": "Range not satisfiable"},
+    },
+)
+async def get_lesson_content(
+    lesson_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None, alias="If-Range"),
+    db: AsyncSession = Depends(get_async_session),
+):
+    byte_range = _parse_range(range_header)
+    found = await lesson_crud.get_content_range(db, lesson_id, **(byte_range or {}))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    total, digest, data = found
+    etag = f'"{digest}"'
+
+    if byte_range and if_range is not None and if_range.strip() != etag:
+        # content changed since the client's partial copy: send it whole
+        byte_range = None
+        total, digest, data = await lesson_crud.get_content_range(db, lesson_id)
+        etag = f'"{digest}"'
+
+    headers = {"Accept-Ranges": "bytes", "ETag": etag}
+    status_code = status.HTTP_200_OK
+    if byte_range:
+        if byte_range.get("start", 0) >= total or not data:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{total}"},
+            )
+        first = total - len(data) if "suffix" in byte_range else byte_range["start"]
+        headers["Content-Range"] = f"bytes {first}-{first + len(data) - 1}/{total}"
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+    headers["Content-Length"] = str(len(data))
+
+    async def chunks():
+        view = memoryview(data)
+        for offset in range(0, len(view), CONTENT_CHUNK):
+            yield view[offset : offset + CONTENT_CHUNK]
+
+    return StreamingResponse(
+        chunks(),
+        status_code=status_code,
+        media_type="text/markdown; charset=utf-8",
+        headers=headers,
+    )
+
+
 # ─── Admin endpoints ─────────────────────────────────────────────
 @router.post(
     "",
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, Sequence, cast
+from typing import List, Optional, Sequence, Union, cast
 from uuid import UUID
 
 from fastapi import (
@@ -11,9 +11,13 @@ from fastapi import (
     File,
     UploadFile,
     Form,
+    Request,
+    Response,
 )
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import get_async_session
 from app.schemas.media import (
     MediaCreate,
@@ -21,16 +25,34 @@ from app.schemas.media import (
     MediaRead,
     MediaReadList,
     MediaType,
+    MediaUploadJobRead,
+    MediaBulkDelete,
+    MediaBulkDeleteResult,
+    MediaBatchUploadResult,
+    MediaBatchUploadItem,
+    MediaDirectUpload,
+    MediaDirectUploadComplete,
+    MediaDirectUploadRequest,
+    MediaReconcileReport,
+    PendingMediaDeletionRead,
+    CountMode,
+    ExportFormat,
+)
+from app.services import media_direct_upload, media_export
+from app.services.media import media_service
+from app.services.media_deletion import media_deletion_queue
+from app.services.media_reconcile import media_reconciler
+from app.services.media_upload import (
+    build_media_create,
+    content_type_error,
+    media_upload_service,
+    upload_size,
 )
-from app.services.media import media_service, upload_to_cloudinary
 from app.api.deps import get_current_admin
 
 
 router = APIRouter(prefix="/media", tags=["media"])
 
-ACCEPTED_IMAGE_MIME = {"image/jpeg", "image/png", "image/webp", "image/gif"}
-ACCEPTED_VIDEO_MIME = {"video/mp4", "video/webm", "video/quicktime"}
-
 
 @router.get(
     "/",
@@ -40,24 +62,117 @@ ACCEPTED_VIDEO_MIME = {"video/mp4", "video/webm", "video/quicktime"}
     summary="List media with filters",
 )
 async def list_media(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     resource_type: Optional[MediaType] = Query(None),
     is_published: Optional[bool] = Query(None),
     is_deleted: Optional[bool] = Query(False),
     search: Optional[str] = Query(None, max_length=255),
+    count: CountMode = Query(
+        CountMode.exact,
+        description="How `total` is computed; `none` skips it (use has_more)",
+    ),
     db: AsyncSession = Depends(get_async_session),
 ):
-    items, total = await media_service.list_filtered(
+    items, total, next_cursor = await media_service.list_filtered(
         db,
+        cursor=cursor,
         skip=skip,
         limit=limit,
         resource_type=resource_type,
         is_published=is_published,
         is_deleted=is_deleted,
         search=search,
+        count=count,
+    )
+    return MediaReadList(
+        items=cast(Sequence[MediaRead], items),
+        total=total,
+        total_is_estimate=count == CountMode.estimated,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_admin)],
+    summary="Stream all matching media as NDJSON or CSV",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+            "description": "One media row per line",
+        }
+    },
+)
+async def export_media(
+    format: ExportFormat = Query(ExportFormat.ndjson),
+    resource_type: Optional[MediaType] = Query(None),
+    is_published: Optional[bool] = Query(None),
+    is_deleted: Optional[bool] = Query(False),
+    search: Optional[str] = Query(None, max_length=255),
+):
+    body = media_export.export_media(
+        format,
+        resource_type=resource_type,
+        is_published=is_published,
+        is_deleted=is_deleted,
+        search=search,
+    )
+    return StreamingResponse(
+        body,
+        media_type=media_export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="media.{format.value}"'},
     )
-    return MediaReadList(items=cast(Sequence[MediaRead], items), total=total)
+
+
+@router.get(
+    "/reconcile",
+    response_model=List[MediaReconcileReport],
+    dependencies=[Depends(get_current_admin)],
+    summary="Latest Cloudinary reconciliation report per scope",
+)
+async def get_reconcile_reports():
+    return await media_reconciler.last_reports()
+
+
+@router.post(
+    "/reconcile",
+    response_model=List[MediaReconcileReport],
+    dependencies=[Depends(get_current_admin)],
+    summary="Run one Cloudinary reconciliation pass now",
+)
+async def run_reconcile():
+    return await media_reconciler.run_once()
+
+
+@router.get(
+    "/deletions",
+    response_model=List[PendingMediaDeletionRead],
+    dependencies=[Depends(get_current_admin)],
+    summary="Queued Cloudinary deletions (failed=true: those that gave up)",
+)
+async def list_pending_deletions(
+    failed: Optional[bool] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_session),
+):
+    return await media_deletion_queue.list_pending(db, failed=failed, limit=limit)
+
+
+@router.post(
+    "/deletions/{deletion_id}/retry",
+    response_model=PendingMediaDeletionRead,
+    dependencies=[Depends(get_current_admin)],
+    summary="Queue a failed Cloudinary deletion again",
+    responses={404: {"description": "Pending deletion not found"}},
+)
+async def retry_pending_deletion(
+    deletion_id: int, db: AsyncSession = Depends(get_async_session)
+):
+    return await media_deletion_queue.retry(db, deletion_id)
 
 
 @router.get(
@@ -74,14 +189,30 @@ async def get_media(media_id: UUID, db: AsyncSession = Depends(get_async_session
     return obj
 
 
+@router.get(
+    "/uploads/{job_id}",
+    response_model=MediaUploadJobRead,
+    dependencies=[Depends(get_current_admin)],
+    summary="Get the status of a background upload",
+    responses={404: {"description": "Upload job not found"}},
+)
+async def get_upload_job(job_id: UUID):
+    job = media_upload_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
+
+
 @router.post(
     "/",
-    response_model=MediaRead,
+    response_model=Union[MediaRead, MediaUploadJobRead],
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(get_current_admin)],
     summary="Upload media to Cloudinary and create media record",
+    responses={202: {"model": MediaUploadJobRead, "description": "Upload queued"}},
 )
 async def create_media(
+    response: Response,
     file: UploadFile = File(..., description="Image or video file"),
     resource_type: MediaType = Form(..., description="image | video"),
     folder: Optional[str] = Form(None),
@@ -89,51 +220,46 @@ async def create_media(
     alt_text: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     is_published: bool = Form(False),
+    background: bool = Query(
+        False,
+        description="Return 202 with a job id and finish the upload in the background",
+    ),
     db: AsyncSession = Depends(get_async_session),
 ):
-    if resource_type == MediaType.image and (
-        file.content_type not in ACCEPTED_IMAGE_MIME
-    ):
-        raise HTTPException(
-            status_code=415,
-            detail=f"Unsupported image content-type: {file.content_type}",
-        )
-    if resource_type == MediaType.video and (
-        file.content_type not in ACCEPTED_VIDEO_MIME
-    ):
+    unsupported = content_type_error(resource_type, file.content_type)
+    if unsupported:
+        raise HTTPException(status_code=415, detail=unsupported)
+
+    if file.filename is None:
         raise HTTPException(
-            status_code=415,
-            detail=f"Unsupported video content-type: {file.content_type}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filename is missing from the uploaded file.",
         )
 
-    await file.seek(0)
-    try:
-        file.file.seek(0, 2)
-        size_bytes = file.file.tell()
-        file.file.seek(0)
-    except Exception:
-        content = await file.read()
-        size_bytes = len(content)
-        from io import BytesIO
-
-        file_stream = BytesIO(content)
-    else:
-        file_stream = file.file
-
     context = {}
     if title:
         context["caption"] = title
     if alt_text:
         context["alt"] = alt_text
 
-    if file.filename is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Filename is missing from the uploaded file.",
+    if background:
+        job = await media_upload_service.submit(
+            file,
+            resource_type=resource_type,
+            folder=folder,
+            context=context or None,
+            title=title,
+            alt_text=alt_text,
+            description=description,
+            is_published=is_published,
         )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MediaUploadJobRead.model_validate(job)
 
-    cld_resp = upload_to_cloudinary(
-        file_stream,
+    # stream straight from the spooled upload; never read it into memory
+    size_bytes = upload_size(file)
+    cld_resp = await media_upload_service.upload(
+        file.file,
         filename=file.filename,
         resource_type=resource_type,
         folder=folder,
@@ -141,41 +267,119 @@ async def create_media(
         size_bytes=size_bytes,
     )
 
-    if cld_resp is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Media upload failed unexpectedly.",
-        )
-
-    payload = MediaCreate(
-        public_id=cld_resp["public_id"],
+    payload = build_media_create(
+        cld_resp,
         resource_type=resource_type,
-        format=cld_resp.get("format"),
-        version=cld_resp.get("version"),
-        secure_url=cld_resp["secure_url"],
-        url=cld_resp.get("url"),
+        filename=file.filename,
         content_type=file.content_type,
-        bytes=cld_resp.get("bytes", size_bytes),
-        width=cld_resp.get("width"),
-        height=cld_resp.get("height"),
-        duration_ms=(
-            int(cld_resp["duration"] * 1000)
-            if ("duration" in cld_resp and resource_type == MediaType.video)
-            else None
-        ),
+        size_bytes=size_bytes,
         folder=folder,
-        original_filename=cld_resp.get("original_filename") or file.filename,
         title=title,
         alt_text=alt_text,
         description=description,
         is_published=is_published,
-        is_deleted=False,
     )
 
     obj = await media_service.create_with_rules(db, payload)
     return obj
 
 
+@router.post(
+    "/batch",
+    response_model=MediaBatchUploadResult,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_admin)],
+    summary="Upload many files to Cloudinary and create their media records",
+    responses={400: {"description": "Too many files"}},
+)
+async def create_media_batch(
+    files: List[UploadFile] = File(..., description="Images and/or videos"),
+    resource_type: Optional[MediaType] = Form(
+        None,
+        description="image | video; inferred per file from its content-type if omitted",
+    ),
+    folder: Optional[str] = Form(None),
+    is_published: bool = Form(False),
+    db: AsyncSession = Depends(get_async_session),
+):
+    if len(files) > settings.MEDIA_BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MEDIA_BATCH_UPLOAD_MAX_FILES} files per batch.",
+        )
+    items = await media_upload_service.upload_batch(
+        db, files, resource_type=resource_type, folder=folder, is_published=is_published
+    )
+    failed = sum(1 for item in items if item.error)
+    return MediaBatchUploadResult(
+        items=[MediaBatchUploadItem.model_validate(item) for item in items],
+        succeeded=len(items) - failed,
+        failed=failed,
+    )
+
+
+@router.post(
+    "/direct-uploads",
+    response_model=MediaDirectUpload,
+    dependencies=[Depends(get_current_admin)],
+    summary="Sign a browser-to-Cloudinary upload",
+)
+async def sign_direct_upload(payload: MediaDirectUploadRequest):
+    return media_direct_upload.sign_direct_upload(**payload.model_dump())
+
+
+@router.post(
+    "/direct-uploads/complete",
+    response_model=MediaRead,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_admin)],
+    summary="Create the media record for a finished direct upload",
+    responses={
+        400: {"description": "Upload response signature is invalid"},
+        404: {"description": "The asset is not on Cloudinary"},
+    },
+)
+async def complete_direct_upload(
+    payload: MediaDirectUploadComplete, db: AsyncSession = Depends(get_async_session)
+):
+    if not media_direct_upload.verify_upload_response(
+        payload.public_id, payload.version, payload.signature
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Cloudinary signature.",
+        )
+    cld_resp = await media_direct_upload.fetch_upload(
+        payload.public_id, payload.resource_type, payload.version
+    )
+    return await media_direct_upload.register_direct_upload(db, cld_resp)
+
+
+@router.post(
+    "/direct-uploads/notifications",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Cloudinary upload webhook for direct uploads",
+    responses={401: {"description": "Missing or invalid X-Cld-Signature"}},
+)
+async def direct_upload_notification(
+    request: Request, db: AsyncSession = Depends(get_async_session)
+):
+    body = (await request.body()).decode()
+    if not media_direct_upload.verify_notification(
+        body,
+        request.headers.get("x-cld-timestamp", ""),
+        request.headers.get("x-cld-signature", ""),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid notification signature.",
+        )
+    cld_resp = media_direct_upload.parse_notification(body)
+    if cld_resp is not None:
+        await media_direct_upload.register_direct_upload(db, cld_resp)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.patch(
     "/{media_id}",
     response_model=MediaRead,
@@ -203,6 +407,24 @@ async def hard_delete_media(
     return
 
 
+@router.post(
+    "/bulk-delete",
+    response_model=MediaBulkDeleteResult,
+    dependencies=[Depends(get_current_admin)],
+    summary="Hard delete many media",
+    responses={409: {"description": "Some media are still referenced"}},
+)
+async def bulk_delete_media(
+    payload: MediaBulkDelete, db: AsyncSession = Depends(get_async_session)
+):
+    deleted = await media_service.delete_many(db, payload.ids)
+    gone = set(deleted)
+    return MediaBulkDeleteResult(
+        deleted=deleted,
+        not_found=[i for i in dict.fromkeys(payload.ids) if i not in gone],
+    )
+
+
 @router.post(
     "/{media_id}/soft-delete",
     response_model=MediaRead,
@@ -235,7 +457,6 @@ async def restore_media(media_id: UUID, db: AsyncSession = Depends(get_async_ses
     responses={
         200: {"description": "Media deleted successfully"},
         404: {"description": "Media not found"},
-        502: {"description": "Failed to delete media from Cloudinary"},
     },
 )
 async def delete_media_permanent(
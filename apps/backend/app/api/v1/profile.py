@@ -1,23 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
 from app.schemas.profile import ProfileCreate, ProfileUpdate, ProfileRead
 from app.services.profile import profile_service
 from app.db.session import get_async_session
+from app.core.response_cache import response_cache
 
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, image_preset
 
 
 router = APIRouter(prefix="/profile", tags=["Team Profile"])
 
 
-@router.get("/{id}", response_model=ProfileRead)
-async def get_profile(id: int, db: AsyncSession = Depends(get_async_session)):
-    profile_data = await profile_service.get(db, id)
-    if not profile_data:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    return profile_data
+@router.get("/{id}", response_model=ProfileRead, dependencies=[Depends(image_preset)])
+async def get_profile(
+    id: int, request: Request, db: AsyncSession = Depends(get_async_session)
+):
+    async def build():
+        profile_data = await profile_service.get(db, id, profile="detail")
+        if not profile_data:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return profile_data, {}
+
+    return await response_cache.serve(request, "profiles", ProfileRead, build)
 
 
 @router.post("/", response_model=ProfileRead, dependencies=[Depends(get_current_admin)])
@@ -25,7 +31,7 @@ async def create_profile(
     profile_create: ProfileCreate,
     db: AsyncSession = Depends(get_async_session),
 ):
-    return await profile_service.create(db, profile_create)
+    return await profile_service.create(db, profile_create, profile="detail")
 
 
 @router.patch("/{id}")
@@ -34,7 +40,9 @@ async def update_profile(
     id: int,
     db: AsyncSession = Depends(get_async_session),
 ):
-    profile_data = await profile_service.get(db, id)
+    profile_data = await profile_service.get(db, id, profile="detail")
     if not profile_data:
         raise HTTPException(status_code=404, detail="Profile not found")
-    return await profile_service.update(db, profile_data, profile_update)
+    return await profile_service.update(
+        db, profile_data, profile_update, profile="detail"
+    )
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.schemas.project import (
     ProjectCreate,
@@ -11,28 +11,46 @@ from app.schemas.project import (
     ProjectDetailRead,
 )
 from app.services import project_crud, project_detail_crud
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, image_preset
 from app.db.session import get_async_session
+from app.core.response_cache import response_cache
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
 # ─── Public endpoints ────────────────────────────────────────────
-@router.get("", response_model=list[ProjectRead])
+@router.get("", response_model=list[ProjectRead], dependencies=[Depends(image_preset)])
 async def list_projects(
+    request: Request,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page"
+    ),
     db: AsyncSession = Depends(get_async_session),
 ):
-    return await project_crud.list_published(db, skip=skip, limit=limit)
+    async def build():
+        projects, next_cursor = await project_crud.list_published(
+            db, cursor=cursor, skip=skip, limit=limit
+        )
+        return projects, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
 
+    return await response_cache.serve(request, "projects", list[ProjectRead], build)
 
-@router.get("/{project_id}", response_model=ProjectRead)
-async def get_project(project_id: int, db: AsyncSession = Depends(get_async_session)):
-    proj = await project_crud.get_detailed(db, project_id)
-    if not proj or not proj.is_published:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return proj
+
+@router.get(
+    "/{project_id}", response_model=ProjectRead, dependencies=[Depends(image_preset)]
+)
+async def get_project(
+    project_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
+):
+    async def build():
+        proj = await project_crud.get(db, project_id, profile="card")
+        if not proj or not proj.is_published:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return proj, {}
+
+    return await response_cache.serve(request, "projects", ProjectRead, build)
 
 
 # ─── Admin endpoints ─────────────────────────────────────────────
@@ -40,7 +58,7 @@ async def get_project(project_id: int, db: AsyncSession = Depends(get_async_sess
 async def create_project(
     data: ProjectCreate, db: AsyncSession = Depends(get_async_session)
 ):
-    return await project_crud.create(db, data)
+    return await project_crud.create(db, data, profile="card")
 
 
 @router.post(
@@ -49,7 +67,7 @@ async def create_project(
 async def create_projects_bulk(
     data_list: List[ProjectCreate], db: AsyncSession = Depends(get_async_session)
 ):
-    return await project_crud.create_bulk(db, data_list)
+    return await project_crud.create_bulk(db, data_list, profile="card")
 
 
 @router.put(
@@ -65,7 +83,7 @@ async def update_project(
     proj = await project_crud.get(db, project_id)
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
-    return await project_crud.update(db, proj, data)
+    return await project_crud.update(db, proj, data, profile="card")
 
 
 @router.delete(
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
@@ -12,7 +12,7 @@ from app.services import section_crud
 from app.api.deps import get_current_admin
 from app.db.session import get_async_session
 
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/sections", tags=["sections"])
 
@@ -20,18 +20,25 @@ router = APIRouter(prefix="/sections", tags=["sections"])
 # ─── Public / shared endpoints ───────────────────────────────────
 @router.get("", response_model=list[SectionReadBase])
 async def list_sections(
+    response: Response,
     course_id: UUID = Query(..., description="Filter by parent course"),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page"
+    ),
+    limit: int = Query(500, ge=1, le=500),
     db: AsyncSession = Depends(get_async_session),
 ):
-    if course_id is None:
-        return await section_crud.list(db, skip=0, limit=500)
-    else:
-        return [s for s in await section_crud.list(db) if s.course_id == course_id]
+    sections, next_cursor = await section_crud.list_by_course(
+        db, course_id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return sections
 
 
 @router.get("/{section_id}", response_model=SectionRead)
 async def get_section(section_id: int, db: AsyncSession = Depends(get_async_session)):
-    section = await section_crud.get(db, section_id)
+    section = await section_crud.get(db, section_id, profile="detail")
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
     return section
@@ -46,7 +53,7 @@ async def get_section(section_id: int, db: AsyncSession = Depends(get_async_sess
 async def create_section(
     data: SectionCreate, db: AsyncSession = Depends(get_async_session)
 ):
-    return await section_crud.create(db, data)
+    return await section_crud.create(db, data, profile="detail")
 
 
 @router.post(
@@ -73,7 +80,7 @@ async def update_section(
     section = await section_crud.get(db, section_id)
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
-    return await section_crud.update(db, section, data)
+    return await section_crud.update(db, section, data, profile="detail")
 
 
 @router.delete(
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin
+from app.utils.http_client import http_clients
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get(
+    "/http_pool",
+    dependencies=[Depends(get_current_admin)],
+    summary="Outbound HTTP request counters and connection pool utilisation",
+)
+async def http_pool_metrics():
+    return http_clients.metrics()
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.schemas.user import UserCreate, UserUpdate, UserRead
 from app.services import user_crud
@@ -26,11 +26,20 @@ async def update_user(
 
 @router.get("", response_model=list[UserRead])
 async def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page"
+    ),
     db: AsyncSession = Depends(get_async_session),
 ):
-    return await user_crud.list(db, skip=skip, limit=limit)
+    users, next_cursor = await user_crud.list_page(
+        db, cursor=cursor, skip=skip, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return users
 
 
 @router.get("/{user_id}", response_model=UserRead)
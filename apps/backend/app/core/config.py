@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Any, Dict, List, Union
 from pydantic import AnyHttpUrl, field_validator, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
@@ -19,8 +19,64 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 21
     ALGORITHM: str = "HS256"
+
+    # bcrypt cost; hashes with a different cost are upgraded on next login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # require_role caches: verified claims per token, slim user per sub
+    AUTH_CLAIMS_CACHE_SIZE: int = 1024
+    AUTH_CLAIMS_CACHE_TTL: float = 300
+    AUTH_USER_CACHE_SIZE: int = 256
+    AUTH_USER_CACHE_TTL: float = 60
+    # in-process cache for public course/project/profile reads
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: float = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    # build GET /courses/{id} in Postgres (json_agg) instead of ORM + pydantic
+    COURSE_DETAIL_JSON_AGG: bool = False
     GEMINI_API_KEY: str | None = None
     GEMINI_MODEL: str | None = None
+    # pool used when a request brings no key (JSON list; GEMINI_API_KEY joins it)
+    GEMINI_API_KEYS: List[str] = []
+    # per-key limits enforced by utils/gemini_scheduler (match the key's quota tier)
+    GEMINI_KEY_RPM: int = 15
+    GEMINI_KEY_TPM: int = 1_000_000
+    GEMINI_SCHEDULER_MAX_ATTEMPTS: int = 4
+    GEMINI_SCHEDULER_BACKOFF_SECONDS: float = 2
+    GEMINI_SCHEDULER_MAX_WAIT_SECONDS: float = 120
+    # cached prompt token counts (count_tokens is a network round-trip)
+    GEMINI_TOKEN_COUNT_CACHE_SIZE: int = 1024
+    GEMINI_TOKEN_COUNT_CACHE_TTL: float = 3600
+    # skip count_tokens when the calibrated local estimate's expected relative
+    # error is at most this (0 = always count remotely), after MIN_SAMPLES
+    # generations of the model
+    GEMINI_TOKEN_ESTIMATE_TOLERANCE: float = 0.1
+    GEMINI_TOKEN_ESTIMATE_MIN_SAMPLES: int = 5
+    # model limits; estimates within 10% of them are counted remotely
+    GEMINI_INPUT_TOKEN_LIMIT: int = 1_048_576
+    GEMINI_MAX_OUTPUT_TOKENS: int = 65_536
+    # background lesson generation (POST /ai_handler/jobs/generate_course)
+    AI_JOB_WORKERS: int = 8
+    AI_JOB_KEY_CONCURRENCY: int = 4
+    AI_JOB_KEY_RPM: int = 60
+    AI_JOB_POLL_SECONDS: float = 5
+    AI_JOB_LEASE_SECONDS: float = 600
+    AI_JOB_MAX_ATTEMPTS: int = 5
+    AI_JOB_RETRY_BASE_SECONDS: float = 10
+    AI_JOB_RETRY_MAX_SECONDS: float = 600
+
+    # shared outbound HTTP clients (app/utils/http_client.py)
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    HTTP_TIMEOUT_SECONDS: float = 30
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5
+    HTTP_RETRIES: int = 2
+    HTTP_RETRY_BACKOFF_SECONDS: float = 0.5
+    # per-host overrides of the above, e.g. {"api.example.com": {"timeout": 90}}
+    HTTP_HOST_POLICIES: Dict[str, Dict[str, Any]] = {}
 
     BACKEND_CORS_ORIGINS: List[str] = []
 
@@ -43,6 +99,35 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str | None = None
 
     CLOUDINARY_URL: str = ""
+    # overrides the Cloudinary API host, e.g. a local fake for upload tests
+    CLOUDINARY_UPLOAD_PREFIX: str | None = None
+    MEDIA_UPLOAD_CONCURRENCY: int = 4
+    # files accepted by one POST /media/batch request
+    MEDIA_BATCH_UPLOAD_MAX_FILES: int = 200
+    # direct (browser -> Cloudinary) uploads: webhook target signed into each
+    # upload, and how old a webhook's X-Cld-Timestamp may be
+    MEDIA_UPLOAD_NOTIFICATION_URL: str | None = None
+    MEDIA_UPLOAD_NOTIFICATION_MAX_AGE: int = 7200
+    # GET /media?count=cached
+    MEDIA_COUNT_CACHE_SIZE: int = 256
+    MEDIA_COUNT_CACHE_TTL: float = 60
+    # memoized responsive URL sets, one per (public_id, version, preset)
+    MEDIA_URL_CACHE_SIZE: int = 4096
+    # rows fetched per server-side cursor round trip by GET /media/export
+    MEDIA_EXPORT_BATCH_SIZE: int = 1000
+    # background Cloudinary deletions (pending_media_deletions table)
+    MEDIA_DELETE_BATCH_SIZE: int = 100
+    MEDIA_DELETE_POLL_SECONDS: float = 10
+    MEDIA_DELETE_RETRY_BASE_SECONDS: float = 30
+    MEDIA_DELETE_RETRY_MAX_SECONDS: float = 3600
+    # after this many failed attempts a deletion is parked as failed (see
+    # GET /media/deletions) until an admin retries it
+    MEDIA_DELETE_MAX_ATTEMPTS: int = 10
+    # Cloudinary <-> media reconciler (media_reconcile_state); 0 disables the
+    # background loop, POST /media/reconcile still works
+    MEDIA_RECONCILE_INTERVAL_SECONDS: float = 3600
+    MEDIA_RECONCILE_PAGE_SIZE: int = 500
+    MEDIA_RECONCILE_MAX_PAGES: int = 10
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -65,6 +150,8 @@ def get_settings() -> Settings:
             api_key="428768583138577",
             api_secret="PJAI5UKNfOCvKi2ar8QpxEslSnA",
         )
+        if settings.CLOUDINARY_UPLOAD_PREFIX:
+            cloudinary.config(upload_prefix=settings.CLOUDINARY_UPLOAD_PREFIX)
         return settings
     except ValidationError as e:
         print(f"❌ Configuration Error: {e}")
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import inspect
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+# (objects to serialize, extra headers such as X-Next-Cursor)
+Builder = Callable[[], Awaitable[tuple[Any, dict[str, str]]]]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: datetime
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class RawJSON:
+    """A body already serialized elsewhere (e.g. by Postgres); used as-is."""
+
+    body: bytes
+    last_modified: Optional[datetime] = None
+
+
+class ResponseCacheBackend(Protocol):
+    """Storage for cached responses, grouped by namespace (e.g. "courses")."""
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedResponse]: ...
+
+    async def set(self, namespace: str, key: str, value: CachedResponse) -> None: ...
+
+    async def invalidate(self, namespace: str) -> None: ...
+
+    async def invalidated_at(self, namespace: str) -> Optional[datetime]: ...
+
+
+class InMemoryResponseCacheBackend:
+    """Per-process backend; also what tests plug in. Each namespace is its own LRU."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._namespaces: dict[str, TTLCache[str, CachedResponse]] = {}
+        self._invalidated_at: dict[str, datetime] = {}
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        entries = self._namespaces.get(namespace)
+        return entries.get(key) if entries is not None else None
+
+    async def set(self, namespace: str, key: str, value: CachedResponse) -> None:
+        entries = self._namespaces.get(namespace)
+        if entries is None:
+            entries = self._namespaces[namespace] = TTLCache(self.maxsize, self.ttl)
+        entries.set(key, value)
+
+    async def invalidate(self, namespace: str) -> None:
+        self._namespaces.pop(namespace, None)
+        self._invalidated_at[namespace] = datetime.now(timezone.utc)
+
+    async def invalidated_at(self, namespace: str) -> Optional[datetime]:
+        return self._invalidated_at.get(namespace)
+
+
+def latest_updated_at(objs: Any) -> Optional[datetime]:
+    """
+    Newest `updated_at` across ORM objects and whatever relationships are
+    already loaded on them. Never triggers a load (relationships are lazy="raise").
+    """
+    latest: Optional[datetime] = None
+    seen: set[int] = set()
+    stack = list(objs) if isinstance(objs, (list, tuple)) else [objs]
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            state = inspect(obj)
+        except Exception:
+            continue
+        updated_at = state.dict.get("updated_at")
+        if isinstance(updated_at, datetime) and (latest is None or updated_at > latest):
+            latest = updated_at
+        for rel in state.mapper.relationships:
+            value = state.attrs[rel.key].loaded_value
+            if value is NO_VALUE:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                stack.extend(value)
+            else:
+                stack.append(value)
+    return latest
+
+
+def _http_date(dt: datetime) -> str:
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON for public read endpoints and answers conditional
+    requests.
+
+    Entries are keyed by route path and query string inside a namespace; CRUD
+    write paths call `invalidate` for the namespaces they affect. Last-Modified
+    is the newest `updated_at` in the serialized graph, but never earlier than
+    the namespace's last invalidation, so deletes and edits to rows without
+    `updated_at` (sections, lessons) still move it forward. A hit does not
+    touch the database at all.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._adapters: dict[Any, TypeAdapter] = {}
+
+    def use_backend(self, backend: ResponseCacheBackend) -> None:
+        self.backend = backend
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            await self.backend.invalidate(namespace)
+
+    def _adapter(self, response_model: Any) -> TypeAdapter:
+        adapter = self._adapters.get(response_model)
+        if adapter is None:
+            adapter = self._adapters[response_model] = TypeAdapter(response_model)
+        return adapter
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        query = "&".join(
+            f"{k}={v}" for k, v in sorted(request.query_params.multi_items())
+        )
+        return f"{request.url.path}?{query}"
+
+    async def _build(
+        self, response_model: Any, build: Builder, invalidated_at: Optional[datetime]
+    ) -> CachedResponse:
+        objs, headers = await build()
+        if isinstance(objs, RawJSON):
+            body, last_modified = objs.body, objs.last_modified
+        else:
+            adapter = self._adapter(response_model)
+            body = adapter.dump_json(
+                adapter.validate_python(objs, from_attributes=True)
+            )
+            last_modified = latest_updated_at(objs)
+        candidates = [d for d in (last_modified, invalidated_at) if d is not None]
+        return CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+            # HTTP dates have second precision
+            last_modified=(
+                max(candidates) if candidates else datetime.now(timezone.utc)
+            ).replace(microsecond=0),
+            headers=headers,
+        )
+
+    async def serve(
+        self, request: Request, namespace: str, response_model: Any, build: Builder
+    ) -> Response:
+        key = self._key(request)
+        entry = await self.backend.get(namespace, key) if self.enabled else None
+        if entry is None:
+            invalidated_at = await self.backend.invalidated_at(namespace)
+            entry = await self._build(response_model, build, invalidated_at)
+            # a write that invalidated the namespace while we built may not be
+            # in this body: serve it once, but do not cache it
+            if (
+                self.enabled
+                and await self.backend.invalidated_at(namespace) == invalidated_at
+            ):
+                await self.backend.set(namespace, key, entry)
+
+        headers = {
+            **entry.headers,
+            "ETag": entry.etag,
+            "Last-Modified": _http_date(entry.last_modified),
+            "Cache-Control": "no-cache",
+        }
+        if self._not_modified(request, entry):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            content=entry.body, media_type="application/json", headers=headers
+        )
+
+    @staticmethod
+    def _not_modified(request: Request, entry: CachedResponse) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, entry.etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return entry.last_modified <= since
+        return False
+
+
+response_cache = ResponseCache(
+    InMemoryResponseCacheBackend(
+        maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES, ttl=settings.RESPONSE_CACHE_TTL
+    ),
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
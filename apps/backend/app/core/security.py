@@ -1,9 +1,15 @@
 from app.core.config import get_settings
 from bcrypt import gensalt, hashpw, checkpw
-from typing import Union, Optional
+from typing import Union, Optional, Callable, TypeVar
 from authlib.jose import JsonWebToken, errors, JWTClaims
 from datetime import timedelta, datetime, timezone
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+import asyncio
+import time
+
+from app.utils.ttl_cache import TTLCache
 
 
 settings = get_settings()
@@ -15,7 +21,7 @@ jwt_options = {
     "aud": "ahc-admin",
 }
 
-TOKEN_TYPE = Enum("refresh-token", "access-token")
+TOKEN_TYPE = Enum("TOKEN_TYPE", ["refresh-token", "access-token"])
 
 jwt = JsonWebToken([JWT_ALGORITHM])
 
@@ -32,13 +38,80 @@ def verify_password(plain_password: str, password: Union[str, bytes]) -> bool:
     return checkpw(password=plain_bytes, hashed_password=hashed_bytes)
 
 
-def get_password_hash(plain_password: str) -> str:
+def get_password_hash(plain_password: str, rounds: Optional[int] = None) -> str:
     password_bytes = plain_password.encode("utf-8")
-    salt = gensalt(rounds=12)
+    salt = gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     password = hashpw(password_bytes, salt)
     return password.decode("utf-8")
 
 
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Async front for bcrypt. Each call costs ~250 ms of CPU at 12 rounds, so it
+    runs on a small dedicated thread pool (bcrypt releases the GIL) instead of
+    the event loop. At most `max_pending` calls may be queued or running; past
+    that we shed load with a 503 rather than let logins queue unboundedly.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_pending: int):
+        self.rounds = rounds
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        # only touched from the event loop thread, so a plain counter is safe
+        if self._pending >= self._max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._run(get_password_hash, plain_password, self.rounds)
+
+    async def verify(self, plain_password: str, password: Union[str, bytes]) -> bool:
+        return await self._run(verify_password, plain_password, password)
+
+    def needs_rehash(self, password: str) -> bool:
+        """True when `password` was hashed with a cost other than the configured one."""
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 def create_access_token(data: dict, expire_delta: Optional[timedelta] = None) -> str:
     # 1
     to_encode = data.copy()
@@ -91,7 +164,7 @@ def decode_token(token: str, type: TOKEN_TYPE) -> Optional[JWTClaims]:
                 "nbf": {"essential": False},
                 "iss": {"essential": True, "value": jwt_options.get("iss")},
                 "aud": {"essential": True, "value": jwt_options.get("aud")},
-                "type": {"essential": True, "value": type},
+                "type": {"essential": True, "value": type.name},
             },
         )
         claims.validate()
@@ -110,3 +183,23 @@ def decode_access_token(token: str) -> Optional[JWTClaims]:
 
 def decode_refresh_token(token: str) -> Optional[JWTClaims]:
     return decode_token(token, TOKEN_TYPE["refresh-token"])
+
+
+# verified access-token claims, keyed by signature; an entry never outlives
+# the token's own exp
+_access_claims_cache: TTLCache[str, tuple[str, JWTClaims]] = TTLCache(
+    maxsize=settings.AUTH_CLAIMS_CACHE_SIZE, ttl=settings.AUTH_CLAIMS_CACHE_TTL
+)
+
+
+def decode_access_token_cached(token: str) -> Optional[JWTClaims]:
+    signature = token.rsplit(".", 1)[-1]
+    cached = _access_claims_cache.get(signature)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    claims = decode_access_token(token)
+    if claims is not None:
+        _access_claims_cache.set(
+            signature, (token, claims), ttl=claims["exp"] - time.time()
+        )
+    return claims
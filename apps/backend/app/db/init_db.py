@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.security import password_hasher
 from app.models.user import User, UserRole
 from app.db.session import engine, AsyncSessionLocal
 from app.db.base import BaseModel
@@ -37,7 +37,7 @@ async def _ensure_admin(session: AsyncSession) -> None:
         username=admin_username,
         email=settings.FIRST_SUPERUSER,
         full_name="Super Admin",
-        password_hash=get_password_hash(settings.FIRST_SUPERUSER_PASSWORD),
+        password=await password_hasher.hash(settings.FIRST_SUPERUSER_PASSWORD),
         role=UserRole.ADMIN,
         created_at=datetime.now(timezone.utc),
     )
@@ -6,6 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import all_apis
 from app.core.config import settings
 from app.db.init_db import init_db
+from app.core.security import password_hasher
+from app.services.media_upload import media_upload_service
+from app.services.media_deletion import media_deletion_queue
+from app.services.media_reconcile import media_reconciler
+from app.services.ai_jobs import ai_job_queue
+from app.utils.http_client import http_clients
 
 from contextlib import asynccontextmanager
 
@@ -16,9 +22,20 @@ import logging
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    http_clients.start()
+    media_deletion_queue.start()
+    media_reconciler.start()
+    ai_job_queue.start()
 
     yield
 
+    await ai_job_queue.stop()
+    await media_reconciler.stop()
+    await media_deletion_queue.stop()
+    await media_upload_service.shutdown()
+    password_hasher.shutdown()
+    await http_clients.close()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -33,7 +50,11 @@ log = logging.getLogger(__name__)
 @app.exception_handler(HTTPException)
 async def http_exc(request: Request, exc: HTTPException):
     print("HHTP_EXC", exc)
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=exc.headers,
+    )
 
 
 @app.exception_handler(RequestValidationError)
@@ -56,6 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ─── Include routers ─────────────────────────────────────────────
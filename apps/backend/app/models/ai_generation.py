@@ -0,0 +1,28 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, String, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base import BaseModel
+
+
+class AIGeneration(BaseModel):
+    """
+    Last Gemini output per generation request, keyed by sha256 of the final
+    prompt, model and generation config (`gemini_service.generation_key`).
+    """
+
+    __tablename__ = "ai_generation_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    gemini_model: Mapped[str] = mapped_column(String(100), nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    input_tokens: Mapped[Optional[int]] = mapped_column(Integer)
+    usage_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    TIMESTAMP,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base import BaseModel
+
+
+class AIJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+_status_enum = SAEnum(AIJobStatus, name="ai_job_status_enum")
+
+
+class AIJob(BaseModel):
+    """
+    A batch of lesson generations ("generate every lesson of course X").
+    Counters and token totals are bumped by the workers as tasks finish.
+    """
+
+    __tablename__ = "ai_jobs"
+
+    id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    course_id: Mapped[UUID] = mapped_column(
+        ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    gemini_model: Mapped[str] = mapped_column(String(100), nullable=False)
+    # sha256 of the API key; the key itself is only held in worker memory
+    key_fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    max_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[AIJobStatus] = mapped_column(
+        _status_enum, default=AIJobStatus.queued, nullable=False
+    )
+
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    succeeded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    input_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    output_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    total_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    created_by: Mapped[Optional[UUID]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL")
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class AIJobTask(BaseModel):
+    """One lesson generation of an AIJob, claimed by workers with SKIP LOCKED."""
+
+    __tablename__ = "ai_job_tasks"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    job_id: Mapped[UUID] = mapped_column(
+        ForeignKey("ai_jobs.id", ondelete="CASCADE"), nullable=False
+    )
+    lesson_id: Mapped[int] = mapped_column(
+        ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False
+    )
+    # denormalised from the job so claiming needs no join
+    key_fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[AIJobStatus] = mapped_column(
+        _status_enum, default=AIJobStatus.queued, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # when a queued task is due, or when a running task's lease expires
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    usage_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "lesson_id", name="uq_ai_job_task_lesson"),
+        Index(
+            "ix_ai_job_tasks_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
@@ -56,7 +56,7 @@ class Course(BaseModel):
         back_populates="course_owner",
         primaryjoin="Course.id == foreign(Media.course_owner_id)",
         foreign_keys="[Media.course_owner_id]",
-        lazy="selectin",
+        lazy="raise",
         passive_deletes=True,
     )
 
@@ -67,7 +67,7 @@ class Course(BaseModel):
         primaryjoin="Course.image_id == foreign(Media.id)",
         foreign_keys="[Course.image_id]",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         cascade="all",
         single_parent=True,
         overlaps="thumbnail_image,project_thumbnail_of,profile_thumbnail_of",
@@ -75,12 +75,13 @@ class Course(BaseModel):
 
     # Relations 3: N:1 for Instructor
     instructor: Mapped["User | None"] = relationship(
-        back_populates="courses", lazy="selectin"
+        back_populates="courses", lazy="raise"
     )
 
     # Relations 4: 1:N for sections
     sections: Mapped[list["Section"]] = relationship(
         back_populates="course",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,  # sections.course_id is ON DELETE CASCADE
     )
@@ -22,4 +22,4 @@ class Lesson(BaseModel):
     content: Mapped[str | None] = mapped_column(Text)
     lesson_order: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    section: Mapped["Section"] = relationship(back_populates="lessons")
\ No newline at end of file
+    section: Mapped["Section"] = relationship(back_populates="lessons", lazy="raise")
@@ -6,6 +6,9 @@ from uuid import UUID, uuid4
 from sqlalchemy import ForeignKey
 
 from sqlalchemy import (
+    BigInteger,
+    Computed,
+    Index,
     String,
     Text,
     TIMESTAMP,
@@ -14,10 +17,10 @@ from sqlalchemy import (
     CheckConstraint,
     UniqueConstraint,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as PG_UUID
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from app.db.base import BaseModel
 
@@ -65,6 +68,31 @@ class Media(BaseModel):
     is_published: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
+    # Search (maintained by Postgres; never loaded unless asked for)
+    search_text: Mapped[Optional[str]] = mapped_column(
+        Text,
+        Computed(
+            "coalesce(title, '') || ' ' || coalesce(alt_text, '') || ' ' "
+            "|| coalesce(original_filename, '')",
+            persisted=True,
+        ),
+        deferred=True,
+        deferred_raiseload=True,
+    )
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') "
+            "|| setweight(to_tsvector('simple'::regconfig, coalesce(alt_text, '')), 'B') "
+            "|| setweight(to_tsvector('simple'::regconfig, coalesce(original_filename, '')), 'C')",
+            persisted=True,
+        ),
+        deferred=True,
+        deferred_raiseload=True,
+    )
+    # relevance of the current search, populated via with_expression()
+    search_rank: Mapped[Optional[float]] = query_expression()
+
     deleted_at: Mapped[Optional[datetime]] = mapped_column(
         TIMESTAMP(timezone=True), nullable=True
     )
@@ -127,6 +155,13 @@ class Media(BaseModel):
             "NOT (project_owner_id IS NOT NULL AND course_owner_id IS NOT NULL)",
             name="media_at_most_one_owner",
         ),
+        Index("ix_media_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_media_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
     )
 
     # Relationships 1: 1:1 for thumbnail
@@ -134,7 +169,7 @@ class Media(BaseModel):
         "Course",
         back_populates="image",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         primaryjoin="Course.id == foreign(Media.course_id)",
         foreign_keys="[Media.course_id]",
         viewonly=True,
@@ -145,7 +180,7 @@ class Media(BaseModel):
         "Project",
         back_populates="thumbnail_image",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         primaryjoin="foreign(Media.id) == Project.image_id",
         foreign_keys="[Media.id]",
         viewonly=True,
@@ -156,7 +191,7 @@ class Media(BaseModel):
         "Profile",
         back_populates="profile_image",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         primaryjoin="foreign(Media.id) == Profile.profile_image_id",
         foreign_keys="[Media.id]",
         viewonly=True,
@@ -166,7 +201,7 @@ class Media(BaseModel):
     project_owner: Mapped[Optional["Project"]] = relationship(
         "Project",
         back_populates="gallery_medias",
-        lazy="selectin",
+        lazy="raise",
         foreign_keys="[Media.project_owner_id]",
         primaryjoin="Project.id == foreign(Media.project_owner_id)",
     )
@@ -174,7 +209,98 @@ class Media(BaseModel):
     course_owner: Mapped[Optional["Course"]] = relationship(
         "Course",
         back_populates="gallery_medias",
-        lazy="selectin",
+        lazy="raise",
         foreign_keys="[Media.course_owner_id]",
         primaryjoin="Course.id == foreign(Media.course_owner_id)",
     )
+
+
+# what MediaWithUrl needs: the original URL plus the asset identity that
+# responsive URLs are derived from (utils.media_urls)
+MEDIA_URL_COLUMNS = (
+    Media.id,
+    Media.secure_url,
+    Media.public_id,
+    Media.version,
+    Media.resource_type,
+)
+
+
+# Admin listing (MediaService.list_filtered): newest first, keyset on
+# (created_at, id). Live rows are almost always filtered on is_deleted = false,
+# optionally by resource_type or is_published; the trash view is the rest.
+Index(
+    "ix_media_live_recent",
+    Media.created_at.desc(),
+    Media.id.desc(),
+    postgresql_where=text("is_deleted = false"),
+)
+Index(
+    "ix_media_live_type_recent",
+    Media.resource_type,
+    Media.created_at.desc(),
+    Media.id.desc(),
+    postgresql_where=text("is_deleted = false"),
+)
+Index(
+    "ix_media_live_published_recent",
+    Media.is_published,
+    Media.created_at.desc(),
+    Media.id.desc(),
+    postgresql_where=text("is_deleted = false"),
+)
+Index(
+    "ix_media_trash_recent",
+    Media.created_at.desc(),
+    Media.id.desc(),
+    postgresql_where=text("is_deleted = true"),
+)
+
+
+class PendingMediaDeletion(BaseModel):
+    """Cloudinary asset whose DB row is gone but whose remote delete is pending."""
+
+    __tablename__ = "pending_media_deletions"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    public_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    resource_type: Mapped[MediaType] = mapped_column(
+        SAEnum(MediaType, name="media_type_enum"), nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    # set once max attempts are used up; such rows are never claimed again
+    failed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "public_id", "resource_type", name="uq_pending_media_deletion_asset"
+        ),
+    )
+
+
+class MediaReconcileState(BaseModel):
+    """
+    Progress of the Cloudinary <-> media reconciler, one row per scope:
+    "remote:image" / "remote:video" walk the Admin API listing by upload time,
+    "local" walks media rows by (created_at, id).
+    """
+
+    __tablename__ = "media_reconcile_state"
+
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # where the next run resumes; NULL = from the beginning
+    high_water_mark: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP(timezone=True)
+    )
+    last_id: Mapped[Optional[UUID]] = mapped_column(PG_UUID(as_uuid=True))
+    # lease so only one app process reconciles a scope at a time
+    locked_until: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    last_report: Mapped[Optional[dict]] = mapped_column(JSONB)
@@ -44,6 +44,7 @@ class Skill(BaseModel):
         "Profile",
         secondary=profile_skill_association,
         back_populates="technical_skills",
+        lazy="raise",
     )
 
 
@@ -82,26 +83,26 @@ class Profile(BaseModel):
         primaryjoin="Profile.profile_image_id == foreign(Media.id)",
         foreign_keys="[Profile.profile_image_id]",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         cascade="all",
         single_parent=True,
         overlaps="thumbnail_image,project_thumbnail_of,profile_thumbnail_of,image",
     )
     support_links = relationship(
-        "SupportLink", back_populates="profile", cascade="all", lazy="selectin"
+        "SupportLink", back_populates="profile", cascade="all", lazy="raise"
     )
     achievements = relationship(
-        "Achievement", back_populates="profile", cascade="all", lazy="selectin"
+        "Achievement", back_populates="profile", cascade="all", lazy="raise"
     )
     experiences = relationship(
-        "Experience", back_populates="profile", cascade="all", lazy="selectin"
+        "Experience", back_populates="profile", cascade="all", lazy="raise"
     )
 
     technical_skills = relationship(
         "Skill",
         secondary=profile_skill_association,
         back_populates="profiles",
-        lazy="selectin",
+        lazy="raise",
     )
 
 
@@ -119,7 +120,7 @@ class SupportLink(BaseModel):
     icon: Mapped[Optional[str]] = mapped_column(String)
 
     profile_id: Mapped[int] = mapped_column(ForeignKey("profiles.id"), nullable=False)
-    profile = relationship("Profile", back_populates="support_links")
+    profile = relationship("Profile", back_populates="support_links", lazy="raise")
 
 
 class Achievement(BaseModel):
@@ -134,7 +135,7 @@ class Achievement(BaseModel):
     title: Mapped[str] = mapped_column(String, nullable=False)
 
     profile_id: Mapped[int] = mapped_column(ForeignKey("profiles.id"), nullable=False)
-    profile = relationship("Profile", back_populates="achievements")
+    profile = relationship("Profile", back_populates="achievements", lazy="raise")
 
 
 class Experience(BaseModel):
@@ -154,4 +155,4 @@ class Experience(BaseModel):
     responsibilities: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String))
 
     profile_id: Mapped[int] = mapped_column(ForeignKey("profiles.id"), nullable=False)
-    profile = relationship("Profile", back_populates="experiences")
+    profile = relationship("Profile", back_populates="experiences", lazy="raise")
@@ -80,7 +80,10 @@ class Project(BaseModel):
     )
 
     detail: Mapped["ProjectDetail"] = relationship(
-        back_populates="project", uselist=False, cascade="all, delete-orphan"
+        back_populates="project",
+        uselist=False,
+        cascade="all, delete-orphan",
+        lazy="raise",
     )
 
     # Gallery one-to-many
@@ -89,7 +92,7 @@ class Project(BaseModel):
         back_populates="project_owner",
         primaryjoin="Project.id == foreign(Media.project_owner_id)",
         foreign_keys="[Media.project_owner_id]",
-        lazy="selectin",
+        lazy="raise",
         passive_deletes=True,  # rely on DB ondelete
     )
 
@@ -100,7 +103,7 @@ class Project(BaseModel):
         primaryjoin="Project.image_id == foreign(Media.id)",
         foreign_keys="[Project.image_id]",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         cascade="all",
         single_parent=True,
         overlaps="image,course_thumbnail_of,profile_thumbnail_of",
@@ -110,19 +113,19 @@ class Project(BaseModel):
         "ProjectTechnologies",
         secondary=project_technology_relations,
         back_populates="projects",
-        lazy="selectin",
+        lazy="raise",
     )
     features: Mapped[list["ProjectFeatures"]] = relationship(
         "ProjectFeatures",
         secondary=project_feature_relations,
         back_populates="features",
-        lazy="selectin",
+        lazy="raise",
     )
     tags: Mapped[list["Tag"]] = relationship(
         "Tag",
         secondary=project_tag_relations,
         back_populates="projects",
-        lazy="selectin",
+        lazy="raise",
     )
 
 
@@ -135,7 +138,7 @@ class ProjectTechnologies(BaseModel):
         "Project",
         secondary=project_technology_relations,
         back_populates="technologies",
-        lazy="selectin",
+        lazy="raise",
     )
 
 
@@ -147,7 +150,7 @@ class ProjectFeatures(BaseModel):
         "Project",
         secondary=project_feature_relations,
         back_populates="features",
-        lazy="selectin",
+        lazy="raise",
     )
 
 
@@ -160,5 +163,5 @@ class Tag(BaseModel):
         "Project",
         secondary=project_tag_relations,
         back_populates="tags",
-        lazy="selectin",
+        lazy="raise",
     )
@@ -17,4 +17,4 @@ class ProjectDetail(BaseModel):
     content: Mapped[str | None] = mapped_column(Text)
     tech_stack: Mapped[str | None] = mapped_column(String(255))
 
-    project: Mapped["Project"] = relationship(back_populates="detail")
+    project: Mapped["Project"] = relationship(back_populates="detail", lazy="raise")
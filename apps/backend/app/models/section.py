@@ -25,8 +25,11 @@ class Section(BaseModel):
     # Relations
     course: Mapped["Course"] = relationship(
         back_populates="sections",
+        lazy="raise",
     )
     lessons: Mapped[list["Lesson"]] = relationship(
         back_populates="section",
         cascade="all, delete-orphan",
+        lazy="raise",
+        passive_deletes=True,  # lessons.section_id is ON DELETE CASCADE
     )
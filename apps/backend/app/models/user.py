@@ -49,5 +49,5 @@ class User(BaseModel):
 
     # relationships
     courses: Mapped[list["Course"]] = relationship(
-        back_populates="instructor", lazy="selectin"
+        back_populates="instructor", lazy="raise"
     )
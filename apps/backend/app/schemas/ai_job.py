@@ -0,0 +1,46 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import Field
+
+from app.schemas.base import ORMBase
+
+
+# Match SQLAlchemy enum
+class AIJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class AIJobTaskRead(ORMBase):
+    lesson_id: int
+    status: AIJobStatus
+    attempts: int
+    usage_metadata: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+    finished_at: Optional[datetime] = None
+
+
+class AIJobRead(ORMBase):
+    id: UUID
+    course_id: UUID
+    gemini_model: str
+    max_tokens: int
+    status: AIJobStatus
+    total: int
+    succeeded: int
+    failed: int
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    tasks: Optional[List[AIJobTaskRead]] = Field(
+        None, description="Per-lesson state, with include_tasks=true"
+    )
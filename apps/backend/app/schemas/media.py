@@ -1,9 +1,11 @@
 from datetime import datetime
-from typing import Optional, List, Sequence
+from typing import Any, Dict, Optional, List, Sequence
 from uuid import UUID
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from enum import Enum
 
+from app.utils.media_urls import current_image_preset, derived_urls
+
 
 # Match SQLAlchemy enum
 class MediaType(str, Enum):
@@ -90,10 +92,112 @@ class MediaRead(MediaBase):
         from_attributes = True
 
 
+# How GET /media computes `total`
+class CountMode(str, Enum):
+    exact = "exact"  # count(*) with the same filters
+    estimated = "estimated"  # planner row estimate, no scan
+    cached = "cached"  # exact, memoized per filter set until a media write
+    none = "none"  # no total; use has_more (infinite scroll)
+
+
+# GET /media/export body format
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 # Read list schema
 class MediaReadList(BaseModel):
     items: Sequence[MediaRead]
-    total: int
+    total: Optional[int]
+    total_is_estimate: bool = False
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+
+
+# Background upload job
+class MediaUploadJobRead(BaseModel):
+    id: UUID
+    status: str
+    filename: str
+    media_id: Optional[UUID] = None
+    error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Multi-file upload report, one item per file in request order
+class MediaBatchUploadItem(BaseModel):
+    filename: str
+    media: Optional[MediaRead] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MediaBatchUploadResult(BaseModel):
+    items: List[MediaBatchUploadItem]
+    succeeded: int
+    failed: int
+
+
+# Direct (browser -> Cloudinary) upload: what the client asks to upload
+class MediaDirectUploadRequest(BaseModel):
+    resource_type: MediaType
+    folder: Optional[str] = Field(None, max_length=255)
+    title: Optional[str] = Field(None, max_length=255)
+    alt_text: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = None
+    is_published: bool = False
+
+
+# ... the signed form fields to post, with the file, to upload_url
+class MediaDirectUpload(BaseModel):
+    upload_url: str
+    params: Dict[str, Any]
+    expires_at: datetime
+
+
+# ... and Cloudinary's upload response passed back; only the signed
+# public_id/version are used (the rest is read from the Admin API), other
+# fields of the response are ignored
+class MediaDirectUploadComplete(BaseModel):
+    public_id: str = Field(..., max_length=255)
+    version: int
+    signature: str
+    resource_type: MediaType
+
+
+# One reconciler pass over a scope ("remote:image", "remote:video", "local")
+class MediaReconcileReport(BaseModel):
+    scope: str
+    scanned: int
+    repaired: int
+    remote_only: List[str]
+    remote_only_count: int
+    missing_remote: List[str]
+    missing_remote_count: int
+    caught_up: bool
+    finished_at: datetime
+
+
+# A queued Cloudinary deletion (pending_media_deletions); failed_at is set
+# once it has used up MEDIA_DELETE_MAX_ATTEMPTS
+class PendingMediaDeletionRead(BaseModel):
+    id: int
+    public_id: str
+    resource_type: MediaType
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    failed_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
 
 
 # Delete schema (just an identifier)
@@ -101,7 +205,37 @@ class MediaDelete(BaseModel):
     id: UUID
 
 
+# Bulk hard delete
+class MediaBulkDelete(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
+
+class MediaBulkDeleteResult(BaseModel):
+    deleted: List[UUID]
+    not_found: List[UUID]
+
+
 # Read for Courses
 class MediaWithUrl(BaseModel):
     id: UUID
     secure_url: str
+    # filled from the request's image preset (api.deps.image_preset,
+    # utils.media_urls)
+    src: Optional[str] = None
+    srcset: Optional[str] = None
+    sizes: Optional[str] = None
+
+    # asset identity the URLs are derived from; not serialized
+    public_id: Optional[str] = Field(None, exclude=True)
+    version: Optional[int] = Field(None, exclude=True)
+    resource_type: Optional[MediaType] = Field(None, exclude=True)
+
+    @model_validator(mode="after")
+    def _derive_urls(self) -> "MediaWithUrl":
+        preset = current_image_preset()
+        if preset is not None and self.public_id and self.resource_type:
+            urls = derived_urls(
+                self.public_id, self.version, self.resource_type.value, preset
+            )
+            self.src, self.srcset, self.sizes = urls.src, urls.srcset, urls.sizes
+        return self
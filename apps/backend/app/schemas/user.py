@@ -29,6 +29,15 @@ class UserRead(ORMBase, TimestampMixin):
     role: UserRole
 
 
+# Slim projection resolved (and cached) by require_role
+class AuthUser(ORMBase):
+    id: UUID
+    username: str
+    email: str
+    full_name: str
+    role: UserRole
+
+
 # ─── WRITE (ADMIN OR SAME USER ONLY) ────────────────────────────
 class UserCreate(ORMBase):
     username: str = Field(..., min_length=2, max_length=50)
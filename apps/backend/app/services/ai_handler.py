@@ -1,51 +1,142 @@
-from app.utils.gemini_service import call_gemini
+from app.utils.gemini_service import call_gemini, generation_key, stream_gemini
+from google.genai import errors as genai_errors, types
 
 from app.utils.prompts import course_prompt
 from uuid import UUID
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+from app.models.ai_generation import AIGeneration
+from app.models.lesson import Lesson
 from app.services.lesson import lesson_crud
 from fastapi import HTTPException
 from app.services.course import course_crud
 from app.schemas.lesson import LessonUpdate
+import anyio
 import httpx
+import json
+import logging
+from typing import AsyncIterator, Optional
 from app.core.errors import map_upstream_gemini_error, SafeAPIError
 
+log = logging.getLogger(__name__)
+
 
 async def generate_lesson_service(
     db: AsyncSession,
     course_id: UUID,
     lesson_id: int,
     gemini_model: str,
-    gemini_key: str,
+    gemini_key: Optional[str],
     max_tokens: int,
+    reuse: bool = False,
 ):
+    """
+    Generate one lesson. Every result is stored in the generation cache;
+    with `reuse` an identical earlier generation (same prompt, model and
+    config) is returned instead of calling Gemini, marked `cached`.
+    """
     try:
         course = await course_crud.getDetailed(db, course_id)
         if not course:
             return None
         AI_PROMPT = course_prompt(course.__dict__, lesson_id, max_token=max_tokens)
+    except Exception as e:
+        raise gemini_error(e)
+
+    key = generation_key(AI_PROMPT, gemini_model, max_tokens)
+    if reuse and (hit := await db.get(AIGeneration, key)):
+        return _cached_result(hit)
+    try:
         resp = await call_gemini(AI_PROMPT, max_tokens, gemini_model, gemini_key)
-        return resp
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise gemini_error(e)
+    if resp.get("text"):
+        await store_generation(
+            db,
+            key,
+            gemini_model,
+            resp["text"],
+            resp.get("input_tokens"),
+            resp.get("usage_metadata"),
+        )
+    return resp
 
-    except httpx.HTTPStatusError as e:
-        upstream = {"details": safe_json(e.response)}
-        raise map_upstream_gemini_error(upstream)
 
-    except httpx.RequestError as e:
-        upstream = {"details": {"error": {"message": str(e)}}}
-        raise map_upstream_gemini_error(upstream)
+def _cached_result(hit: AIGeneration) -> dict:
+    usage = hit.usage_metadata
+    return {
+        "text": hit.text,
+        "input_tokens": hit.input_tokens,
+        "usage_metadata": (
+            types.GenerateContentResponseUsageMetadata.model_validate(usage)
+            if usage
+            else None
+        ),
+        "cached": True,
+    }
 
-    except ValueError as e:
-        upstream = {"details": {"error": {"message": str(e)}}}
-        raise map_upstream_gemini_error(upstream)
 
-    except Exception as e:
+async def store_generation(
+    db: AsyncSession,
+    key: str,
+    gemini_model: str,
+    text: str,
+    input_tokens: Optional[int],
+    usage: Optional[types.GenerateContentResponseUsageMetadata],
+) -> None:
+    """Upsert a generation into the cache; a failed write only logs."""
+    values = {
+        "key": key,
+        "gemini_model": gemini_model,
+        "text": text,
+        "input_tokens": input_tokens,
+        "usage_metadata": (
+            usage.model_dump(mode="json", exclude_none=True) if usage else None
+        ),
+    }
+    stmt = insert(AIGeneration).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AIGeneration.key],
+        set_={
+            **{k: stmt.excluded[k] for k in values if k != "key"},
+            "created_at": func.now(),
+        },
+    )
+    try:
+        await db.execute(stmt)
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        log.exception("Could not store generation %s", key)
+
+
+def gemini_error(e: Exception) -> SafeAPIError:
+    """Map an exception raised while talking to Gemini to a safe client error."""
+    if isinstance(e, SafeAPIError):
+        return e
+    if isinstance(e, genai_errors.APIError):
+        upstream = {"details": e.details if isinstance(e.details, dict) else {}}
+        error = upstream["details"].setdefault("error", {})
+        error.setdefault("message", e.message or "")
+        if e.code == 429 or e.status == "RESOURCE_EXHAUSTED":
+            # Gemini's 429 text does not always say "quota"
+            error["message"] = f"rate limit: {error['message']}"
+    elif isinstance(e, httpx.HTTPStatusError):
+        upstream = {"details": safe_json(e.response)}
+    elif isinstance(e, (httpx.RequestError, ValueError)):
+        upstream = {"details": {"error": {"message": str(e)}}}
+    else:
         upstream = {"details": {"error": {"message": "Internal error"}}}
 
-        if str(e).find("API_KEY_INVALID"):
+        if "API_KEY_INVALID" in str(e):
             upstream = {"details": {"error": {"message": "Invalid API Key"}}}
 
-        raise map_upstream_gemini_error(upstream)
+    return map_upstream_gemini_error(upstream)
 
 
 def safe_json(response: httpx.Response) -> dict:
@@ -62,3 +153,137 @@ async def update_lesson_service(lesson_id: int, course_content, db: AsyncSession
     update_data = {"content": course_content}
     lesson_update = LessonUpdate(**update_data)
     return await lesson_crud.update(db, lesson, lesson_update)
+
+
+async def build_lesson_prompt(
+    db: AsyncSession, course_id: UUID, lesson_id: int, max_tokens: int
+) -> str:
+    """The generation prompt for one lesson; 404 if the course or lesson is missing."""
+    course = await course_crud.getDetailed(db, course_id)
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    try:
+        return course_prompt(course.__dict__, lesson_id, max_token=max_tokens)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+
+async def _restore_content(lesson_id: int, content: Optional[str]) -> None:
+    """
+    Put back a lesson's content after an abandoned stream. Uses a fresh
+    session: the stream's own may have been interrupted mid-statement.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Lesson).where(Lesson.id == lesson_id).values(content=content)
+        )
+        await db.commit()
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+async def stream_lesson_update(
+    prompt: str,
+    lesson_id: int,
+    gemini_model: str,
+    gemini_key: Optional[str],
+    max_tokens: int,
+    reuse: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a lesson generation as server-sent events while writing it to the
+    lesson: the first chunk replaces `content`, later chunks are appended in
+    Postgres, each in its own short commit, so readers see the lesson grow.
+
+    Events: `chunk` ({"text"}), then `done` ({"id", "usage_metadata",
+    "cached"}) or `error` (the SafeAPIError detail). On error, or when the
+    client disconnects mid-stream, the previous content is put back and
+    nothing is stored. With `reuse`, a cached identical generation is sent
+    as a single chunk. Uses its own session because the request's session is
+    closed before the body is streamed.
+    """
+    key = generation_key(prompt, gemini_model, max_tokens)
+    usage = None
+    parts: list[str] = []
+    async with AsyncSessionLocal() as db:
+        if reuse and (hit := await db.get(AIGeneration, key)):
+            await db.execute(
+                update(Lesson).where(Lesson.id == lesson_id).values(content=hit.text)
+            )
+            await db.commit()
+            await lesson_crud._invalidate_cache()
+            yield _sse("chunk", {"text": hit.text})
+            yield _sse(
+                "done",
+                {"id": lesson_id, "usage_metadata": hit.usage_metadata, "cached": True},
+            )
+            return
+
+        previous: Optional[str] = await db.scalar(
+            select(Lesson.content).where(Lesson.id == lesson_id)
+        )
+        # set before the first write, so an interruption during it still restores
+        written = False
+        try:
+            async for text, chunk_usage in stream_gemini(
+                prompt, max_tokens, gemini_model, gemini_key
+            ):
+                usage = chunk_usage or usage
+                if not text:
+                    continue
+                content = (
+                    func.coalesce(Lesson.content, "").op("||")(text) if parts else text
+                )
+                written = True
+                await db.execute(
+                    update(Lesson).where(Lesson.id == lesson_id).values(content=content)
+                )
+                await db.commit()
+                parts.append(text)
+                yield _sse("chunk", {"text": text})
+        except Exception as e:
+            await db.rollback()
+            if written:
+                await _restore_content(lesson_id, previous)
+            error = e if isinstance(e, HTTPException) else gemini_error(e)
+            yield _sse("error", error.detail)
+            return
+        except BaseException:
+            # the client went away: Starlette cancels the stream (CancelledError)
+            # or drops the generator, which is then closed (GeneratorExit)
+            if written:
+                with anyio.CancelScope(shield=True):
+                    await _restore_content(lesson_id, previous)
+            raise
+        finally:
+            if written:
+                with anyio.CancelScope(shield=True):
+                    await lesson_crud._invalidate_cache()
+
+        if parts:
+            await store_generation(
+                db,
+                key,
+                gemini_model,
+                "".join(parts),
+                usage.prompt_token_count if usage else None,
+                usage,
+            )
+
+    if not parts:
+        yield _sse(
+            "error", gemini_error(ValueError("AI generation returned no text")).detail
+        )
+        return
+    yield _sse(
+        "done",
+        {
+            "id": lesson_id,
+            "usage_metadata": (
+                usage.model_dump(mode="json", exclude_none=True) if usage else None
+            ),
+            "cached": False,
+        },
+    )
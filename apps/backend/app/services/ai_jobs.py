@@ -0,0 +1,509 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.ai_job import AIJob, AIJobStatus, AIJobTask
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.section import Section
+from app.services.ai_handler import (
+    gemini_error,
+    generate_lesson_service,
+    update_lesson_service,
+)
+from app.utils.gemini_scheduler import gemini_scheduler
+
+log = logging.getLogger(__name__)
+
+_OPEN = (AIJobStatus.queued, AIJobStatus.running)
+# fingerprint of jobs submitted without a key: gemini_scheduler picks one
+# from the configured pool per call
+POOL = "pool"
+
+
+def key_fingerprint(gemini_key: str) -> str:
+    return hashlib.sha256(gemini_key.encode()).hexdigest()
+
+
+def _held(task: Row) -> tuple:
+    """Criteria for a claimed task still being this worker's to settle."""
+    # attempts guard: a worker whose lease expired must not count twice;
+    # status: a cancel may have ended it meanwhile
+    return (
+        AIJobTask.id == task.id,
+        AIJobTask.attempts == task.attempts,
+        AIJobTask.status == AIJobStatus.running,
+    )
+
+
+class _KeyLimiter:
+    """At most `concurrency` calls in flight and `rpm` call starts per minute."""
+
+    def __init__(self, rpm: int, concurrency: int):
+        self.interval = 60 / rpm if rpm > 0 else 0.0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return self._slots.locked()
+
+    async def __aenter__(self) -> None:
+        await self._slots.acquire()
+        try:
+            async with self._lock:
+                now = monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self._slots.release()
+
+
+class AIJobQueue:
+    """
+    Background lesson generation.
+
+    `submit_course` writes one AIJob plus an AIJobTask per lesson and returns
+    at once. `workers` tasks claim due tasks one at a time (`FOR UPDATE SKIP
+    LOCKED` with a lease, safe with several app processes), run
+    `generate_lesson_service` + `update_lesson_service` and fold the outcome
+    and token usage into the job row. Calls per API key are bounded by a
+    `_KeyLimiter`; rate limits, upstream and unexpected errors are retried
+    with exponential backoff up to `max_attempts`, client errors (bad key,
+    missing lesson) fail the task at once.
+
+    API keys are never stored: rows carry a sha256 fingerprint and the key
+    stays in this process's memory, so after a restart tasks wait until the
+    key is supplied again (`resume`), unless it is GEMINI_API_KEY. Jobs
+    without a key run on the configured pool (fingerprint "pool"), whose
+    concurrency scales with the number of keys; per-key limits are then
+    left to gemini_scheduler.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        key_concurrency: int,
+        key_rpm: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ):
+        self.workers = workers
+        self.key_concurrency = key_concurrency
+        self.key_rpm = key_rpm
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._keys: dict[str, Optional[str]] = {}
+        self._limiters: dict[str, _KeyLimiter] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        if settings.GEMINI_API_KEY:
+            self.register_key(settings.GEMINI_API_KEY)
+        if gemini_scheduler.keys:
+            self._keys[POOL] = None
+            self._limiters[POOL] = _KeyLimiter(
+                0, key_concurrency * len(gemini_scheduler.keys)
+            )
+
+    def register_key(self, gemini_key: str) -> str:
+        fingerprint = key_fingerprint(gemini_key)
+        self._keys[fingerprint] = gemini_key
+        if fingerprint not in self._limiters:
+            self._limiters[fingerprint] = _KeyLimiter(
+                self.key_rpm, self.key_concurrency
+            )
+        return fingerprint
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        return min(
+            self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0)
+        )
+
+    async def submit_course(
+        self,
+        db: AsyncSession,
+        course_id: UUID,
+        *,
+        gemini_key: Optional[str],
+        gemini_model: str,
+        max_tokens: int,
+        only_empty: bool = False,
+        created_by: Optional[UUID] = None,
+    ) -> AIJob:
+        """Queue a generation of every lesson of a course (or only the empty ones)."""
+        if not await db.scalar(select(Course.id).where(Course.id == course_id)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
+            )
+        stmt = (
+            select(Lesson.id)
+            .join(Section, Lesson.section_id == Section.id)
+            .where(Section.course_id == course_id)
+            .order_by(Section.section_order, Lesson.lesson_order)
+        )
+        if only_empty:
+            stmt = stmt.where(func.coalesce(Lesson.content, "") == "")
+        lesson_ids = (await db.scalars(stmt)).all()
+        if not lesson_ids:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Course has no lessons to generate.",
+            )
+
+        fingerprint = self.register_key(gemini_key) if gemini_key else POOL
+        if fingerprint not in self._keys:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="gemini_key is required when no GEMINI_API_KEYS are configured.",
+            )
+        job = AIJob(
+            course_id=course_id,
+            gemini_model=gemini_model,
+            key_fingerprint=fingerprint,
+            max_tokens=max_tokens,
+            status=AIJobStatus.queued,
+            total=len(lesson_ids),
+            created_by=created_by,
+        )
+        db.add(job)
+        await db.flush()
+        await db.execute(
+            insert(AIJobTask).values(
+                [
+                    {
+                        "job_id": job.id,
+                        "lesson_id": lesson_id,
+                        "key_fingerprint": fingerprint,
+                    }
+                    for lesson_id in lesson_ids
+                ]
+            )
+        )
+        await db.commit()
+        await db.refresh(job)
+        self.notify()
+        return job
+
+    async def get(self, db: AsyncSession, job_id: UUID) -> AIJob:
+        job = await db.get(AIJob, job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+            )
+        return job
+
+    async def list_tasks(self, db: AsyncSession, job_id: UUID) -> list[AIJobTask]:
+        stmt = (
+            select(AIJobTask).where(AIJobTask.job_id == job_id).order_by(AIJobTask.id)
+        )
+        return list((await db.scalars(stmt)).all())
+
+    async def cancel(self, db: AsyncSession, job_id: UUID) -> AIJob:
+        """
+        Drop the job's queued tasks. Tasks already running finish and are
+        counted if they succeed; failed or retryable ones end as cancelled.
+        Running tasks whose lease has expired (their worker is gone) are
+        cancelled at once.
+        """
+        job = await self.get(db, job_id)
+        if job.status not in _OPEN:
+            return job
+        await db.execute(
+            update(AIJobTask)
+            .where(
+                AIJobTask.job_id == job_id,
+                (AIJobTask.status == AIJobStatus.queued)
+                | (
+                    (AIJobTask.status == AIJobStatus.running)
+                    & (AIJobTask.next_attempt_at <= func.now())
+                ),
+            )
+            .values(status=AIJobStatus.cancelled, finished_at=func.now())
+        )
+        await db.execute(
+            update(AIJob)
+            .where(AIJob.id == job_id, AIJob.status.in_(_OPEN))
+            .values(status=AIJobStatus.cancelled, finished_at=func.now())
+        )
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def resume(self, db: AsyncSession, job_id: UUID, gemini_key: str) -> AIJob:
+        """Hand the API key back to the workers, e.g. after an app restart."""
+        job = await self.get(db, job_id)
+        if job.key_fingerprint == POOL:
+            return job
+        if key_fingerprint(gemini_key) != job.key_fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This is not the API key the job was submitted with.",
+            )
+        self.register_key(gemini_key)
+        self.notify()
+        return job
+
+    async def _claim(self, db: AsyncSession) -> Optional[Row]:
+        ready = [fp for fp, limiter in self._limiters.items() if not limiter.saturated]
+        if not ready:
+            return None
+        # a cancelled job's running tasks are never re-claimed, even once
+        # their lease expires
+        due = (
+            select(AIJobTask.id)
+            .join(AIJob, AIJobTask.job_id == AIJob.id)
+            .where(
+                AIJobTask.status.in_(_OPEN),
+                AIJobTask.next_attempt_at <= func.now(),
+                AIJobTask.key_fingerprint.in_(ready),
+                AIJob.status.in_(_OPEN),
+            )
+            .order_by(AIJobTask.next_attempt_at, AIJobTask.id)
+            .limit(1)
+            .with_for_update(of=AIJobTask, skip_locked=True)
+        )
+        stmt = (
+            update(AIJobTask)
+            .where(
+                AIJobTask.id == due.scalar_subquery(),
+                AIJobTask.job_id == AIJob.id,
+                AIJob.status.in_(_OPEN),
+            )
+            .values(
+                status=AIJobStatus.running,
+                attempts=AIJobTask.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                AIJobTask.id,
+                AIJobTask.job_id,
+                AIJobTask.lesson_id,
+                AIJobTask.key_fingerprint,
+                AIJobTask.attempts,
+                AIJob.course_id,
+                AIJob.gemini_model,
+                AIJob.max_tokens,
+            )
+        )
+        task = (await db.execute(stmt)).first()
+        if task is not None:
+            await db.execute(
+                update(AIJob)
+                .where(AIJob.id == task.job_id, AIJob.status == AIJobStatus.queued)
+                .values(status=AIJobStatus.running, started_at=func.now())
+            )
+        await db.commit()
+        return task
+
+    async def _cancel_if_job_cancelled(
+        self, db: AsyncSession, task: Row, error: Optional[str]
+    ) -> bool:
+        """End a task of a cancelled job as cancelled rather than retry or fail it."""
+        done = await db.execute(
+            update(AIJobTask)
+            .where(
+                *_held(task),
+                AIJobTask.job_id == AIJob.id,
+                AIJob.status == AIJobStatus.cancelled,
+            )
+            .values(
+                status=AIJobStatus.cancelled, last_error=error, finished_at=func.now()
+            )
+        )
+        if not done.rowcount:
+            return False
+        await db.commit()
+        return True
+
+    async def _retry(self, db: AsyncSession, task: Row, error: str) -> None:
+        delay = timedelta(seconds=self.backoff(task.attempts))
+        queued = await db.execute(
+            update(AIJobTask)
+            .where(
+                *_held(task),
+                AIJobTask.job_id == AIJob.id,
+                AIJob.status.in_(_OPEN),
+            )
+            .values(
+                status=AIJobStatus.queued,
+                next_attempt_at=func.now() + delay,
+                last_error=error,
+            )
+        )
+        if queued.rowcount:
+            await db.commit()
+        elif not await self._cancel_if_job_cancelled(db, task, error):
+            await db.rollback()
+
+    async def _finish(
+        self,
+        db: AsyncSession,
+        task: Row,
+        *,
+        ok: bool,
+        usage: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if not ok and await self._cancel_if_job_cancelled(db, task, error):
+            return
+        done = await db.execute(
+            update(AIJobTask)
+            .where(*_held(task))
+            .values(
+                status=AIJobStatus.succeeded if ok else AIJobStatus.failed,
+                usage_metadata=usage,
+                last_error=error,
+                finished_at=func.now(),
+            )
+        )
+        if not done.rowcount:
+            await db.rollback()
+            return
+
+        usage = usage or {}
+        failed = AIJob.failed + (0 if ok else 1)
+        # typed, or Postgres resolves the CASE branches to text
+        outcome = case(
+            (failed > 0, literal(AIJobStatus.failed.value)),
+            else_=literal(AIJobStatus.succeeded.value),
+        )
+        complete = AIJob.succeeded + AIJob.failed + 1 >= AIJob.total
+        await db.execute(
+            update(AIJob)
+            .where(AIJob.id == task.job_id)
+            .values(
+                succeeded=AIJob.succeeded + (1 if ok else 0),
+                failed=failed,
+                input_tokens=AIJob.input_tokens
+                + (usage.get("prompt_token_count") or 0),
+                output_tokens=AIJob.output_tokens
+                + (usage.get("candidates_token_count") or 0)
+                + (usage.get("thoughts_token_count") or 0),
+                total_tokens=AIJob.total_tokens + (usage.get("total_token_count") or 0),
+                status=case(
+                    (AIJob.status == AIJobStatus.cancelled, AIJob.status),
+                    (complete, cast(outcome, AIJob.status.type)),
+                    else_=AIJob.status,
+                ),
+                finished_at=case((complete, func.now()), else_=AIJob.finished_at),
+            )
+        )
+        await db.commit()
+
+    async def _run_task(self, db: AsyncSession, task: Row) -> None:
+        try:
+            result = await generate_lesson_service(
+                db,
+                task.course_id,
+                task.lesson_id,
+                task.gemini_model,
+                self._keys[task.key_fingerprint],
+                task.max_tokens,
+            )
+            if not result or not result.get("text"):
+                raise gemini_error(ValueError("AI generation returned no text"))
+            await update_lesson_service(task.lesson_id, result["text"], db)
+        except Exception as e:
+            await db.rollback()
+            if isinstance(e, HTTPException):
+                error = str(e.detail)[:500]
+                retryable = e.status_code == status.HTTP_429_TOO_MANY_REQUESTS or (
+                    e.status_code >= 500
+                )
+            else:
+                log.exception("AI job task %s failed", task.id)
+                error, retryable = str(e)[:500] or type(e).__name__, True
+            if retryable and task.attempts < self.max_attempts:
+                await self._retry(db, task, error)
+            else:
+                await self._finish(db, task, ok=False, error=error)
+            return
+
+        usage = result.get("usage_metadata")
+        await self._finish(
+            db,
+            task,
+            ok=True,
+            usage=usage.model_dump(mode="json", exclude_none=True) if usage else None,
+        )
+
+    async def process_one(self) -> bool:
+        """Claim and run one task. Returns whether a task was claimed."""
+        async with AsyncSessionLocal() as db:
+            task = await self._claim(db)
+            if task is None:
+                return False
+            async with self._limiters[task.key_fingerprint]:
+                await self._run_task(db, task)
+        self.notify()
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                if await self.process_one():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("AI job worker iteration failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; tasks they were running are re-claimed when their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+ai_job_queue = AIJobQueue(
+    workers=settings.AI_JOB_WORKERS,
+    key_concurrency=settings.AI_JOB_KEY_CONCURRENCY,
+    key_rpm=settings.AI_JOB_KEY_RPM,
+    poll_seconds=settings.AI_JOB_POLL_SECONDS,
+    lease_seconds=settings.AI_JOB_LEASE_SECONDS,
+    max_attempts=settings.AI_JOB_MAX_ATTEMPTS,
+    retry_base_seconds=settings.AI_JOB_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.AI_JOB_RETRY_MAX_SECONDS,
+)
@@ -10,10 +10,16 @@ from typing import (
     Any,
     Sequence,
     Iterable,
+    Callable,
+    ClassVar,
+    Mapping,
 )
+from datetime import datetime
 from uuid import UUID
+import base64
+import json
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, tuple_, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Mapped, Load
@@ -22,6 +28,8 @@ from fastapi import HTTPException, status
 
 from pydantic import BaseModel
 
+from app.core.response_cache import response_cache
+
 
 class HasId(Protocol):
     id: Final[int | UUID | Mapped[Any]]
@@ -31,11 +39,94 @@ ModelT = TypeVar("ModelT", bound=HasId)
 CreateT = TypeVar("CreateT", bound=BaseModel)
 UpdateT = TypeVar("UpdateT", bound=BaseModel)
 
+# A named set of loader options, built lazily so mappers are configured first.
+LoaderProfile = Callable[[], Sequence[Any]]
+
+
+# ─── Keyset cursors ──────────────────────────────────────────────
+def encode_cursor(*values: Any) -> str:
+    """Pack the sort-key values of the last row into an opaque, URL-safe cursor."""
+    raw = json.dumps(
+        [
+            (
+                v.isoformat()
+                if isinstance(v, datetime)
+                else str(v) if isinstance(v, UUID) else v
+            )
+            for v in values
+        ],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> list[Any]:
+    """Inverse of `encode_cursor`, coercing each value to its column's python type."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor arity mismatch")
+        decoded = []
+        for col, value in zip(columns, values):
+            py_type = col.type.python_type
+            if py_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            else:
+                decoded.append(py_type(value))
+        return decoded
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor."
+        )
+
 
 class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
+    # Relationships are declared lazy="raise", so nothing is loaded unless asked
+    # for. Services register the eager loads each response schema needs here and
+    # endpoints pick one by name (e.g. profile="detail").
+    loader_profiles: ClassVar[Mapping[str, LoaderProfile]] = {}
+    # response_cache namespaces whose public reads embed this model; every
+    # committed write drops them
+    cache_namespaces: ClassVar[tuple[str, ...]] = ()
+
     def __init__(self, model: Type[ModelT]):
         self.model = model
 
+    def loader_options(self, profile: Optional[str]) -> Sequence[Any]:
+        if profile is None:
+            return ()
+        try:
+            return self.loader_profiles[profile]()
+        except KeyError:
+            raise ValueError(
+                f"Unknown loader profile {profile!r} for {self.model.__name__}"
+            )
+
+    async def _invalidate_cache(self) -> None:
+        await response_cache.invalidate(*self.cache_namespaces)
+
+    async def _load_profile(
+        self, db: AsyncSession, objs: Sequence[ModelT], profile: Optional[str]
+    ) -> None:
+        """Populate the relationships of `profile` on already-persistent objects."""
+        if profile is None or not objs:
+            return
+        ids = [obj.id for obj in objs]
+        stmt = (
+            select(self.model)
+            .options(*self.loader_options(profile))
+            .where(cast("ColumnElement[bool]", self.model.id.in_(ids)))
+        )
+        await db.execute(stmt)
+
+    def page_keys(self) -> tuple[Any, ...]:
+        """Stable sort key for listings: newest first, `id` breaks ties."""
+        created_at = getattr(self.model, "created_at", None)
+        if created_at is None:
+            return (self.model.id,)
+        return (created_at, self.model.id)
+
     async def list(
         self,
         db: AsyncSession,
@@ -43,19 +134,90 @@ class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
         skip: int = 0,
         limit: int = 100,
     ) -> Sequence[ModelT]:
-        stmt = select(self.model).offset(skip).limit(limit)
-        result = await db.execute(stmt)
-        return result.scalars().all()
+        items, _ = await self.list_page(db, skip=skip, limit=limit)
+        return items
+
+    async def list_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        where: Iterable[ColumnElement[bool]] = (),
+        options: Iterable[Any] = (),
+        profile: Optional[str] = None,
+    ) -> tuple[Sequence[ModelT], Optional[str]]:
+        """One page ordered by `page_keys()` (descending) plus the next cursor."""
+        stmt = select(self.model)
+        for clause in where:
+            stmt = stmt.where(clause)
+        options = (*options, *self.loader_options(profile))
+        if options:
+            stmt = stmt.options(*options)
+        return await self.paginate(
+            db,
+            stmt,
+            keys=self.page_keys(),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            descending=True,
+        )
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        keys: Sequence[Any],
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        descending: bool = False,
+    ) -> tuple[Sequence[ModelT], Optional[str]]:
+        """
+        Order `stmt` by `keys` and return one page plus the cursor of the next one.
+
+        With a cursor the page starts right after the encoded row (keyset seek, so
+        page N costs the same as page 1 when an index covers `keys`); without one
+        it falls back to `skip`. `keys` must end in a unique column.
+        """
+        if cursor:
+            after = decode_cursor(cursor, keys)
+            if len(keys) == 1:
+                seek = keys[0] < after[0] if descending else keys[0] > after[0]
+            else:
+                row, bound = tuple_(*keys), tuple_(*after)
+                seek = row < bound if descending else row > bound
+            stmt = stmt.where(seek)
+        elif skip:
+            stmt = stmt.offset(skip)
+
+        order = [k.desc() for k in keys] if descending else list(keys)
+        # one extra row tells us whether another page exists
+        result = await db.execute(stmt.order_by(*order).limit(limit + 1))
+        items = result.scalars().all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(*(getattr(last, k.key) for k in keys))
+        return items, next_cursor
 
     async def get(
         self,
         db: AsyncSession,
         obj_id: int | UUID,
         options: Iterable[Any] = (),
+        *,
+        profile: Optional[str] = None,
     ) -> Optional[ModelT]:
 
         stmt = select(self.model)
 
+        options = (*options, *self.loader_options(profile))
         if options:
             stmt = stmt.options(*options)
 
@@ -64,12 +226,16 @@ class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def create(self, db: AsyncSession, obj_in: CreateT) -> ModelT:
+    async def create(
+        self, db: AsyncSession, obj_in: CreateT, *, profile: Optional[str] = None
+    ) -> ModelT:
         db_obj = self.model(**obj_in.model_dump())
         db.add(db_obj)
         try:
             await db.commit()
+            await self._invalidate_cache()
             await db.refresh(db_obj)
+            await self._load_profile(db, [db_obj], profile)
             return db_obj
         except IntegrityError:
             await db.rollback()
@@ -79,7 +245,11 @@ class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
             raise
 
     async def create_bulk(
-        self, db: AsyncSession, data_list: List[CreateT]
+        self,
+        db: AsyncSession,
+        data_list: List[CreateT],
+        *,
+        profile: Optional[str] = None,
     ) -> List[ModelT]:
         db_objects = [self.model(**data.model_dump()) for data in data_list]
         db.add_all(db_objects)
@@ -99,14 +269,25 @@ class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"A database error occurred: {e}",
             )
+        await self._invalidate_cache()
+        await self._load_profile(db, db_objects, profile)
         return db_objects
 
-    async def update(self, db: AsyncSession, db_obj: ModelT, obj_in: UpdateT) -> ModelT:
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: ModelT,
+        obj_in: UpdateT,
+        *,
+        profile: Optional[str] = None,
+    ) -> ModelT:
         for field, value in obj_in.model_dump(exclude_unset=True).items():
             setattr(db_obj, field, value)
         try:
             await db.commit()
+            await self._invalidate_cache()
             await db.refresh(db_obj)
+            await self._load_profile(db, [db_obj], profile)
             return db_obj
         except IntegrityError:
             await db.rollback()
@@ -120,3 +301,4 @@ class CRUDBase(Generic[ModelT, CreateT, UpdateT]):
         if obj:
             await db.delete(obj)
             await db.commit()
+            await self._invalidate_cache()
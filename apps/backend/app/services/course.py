@@ -1,45 +1,198 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import Text, cast, func, literal_column, null, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Load, selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload
 
 from app.services.base import CRUDBase
 from app.models.course import Course
 from app.models.section import Section
+from app.models.lesson import Lesson
 from app.models.user import User
-from app.models.media import Media
+from app.models.media import MEDIA_URL_COLUMNS, Media
 from app.schemas.course import CourseCreate, CourseUpdate
 
 from uuid import UUID
 
 
+def _card_options():
+    return (
+        selectinload(Course.instructor).load_only(User.id, User.full_name, User.email),
+        joinedload(Course.image).load_only(*MEDIA_URL_COLUMNS),
+    )
+
+
 class CourseCRUD(CRUDBase[Course, CourseCreate, CourseUpdate]):
     """Domain-specific queries live here."""
 
-    async def list_published(self, db: AsyncSession, *, skip: int = 0, limit: int = 20):
-        stmt = (
-            select(self.model)
-            .options(
-                selectinload(Course.instructor).load_only(
-                    User.id, User.full_name, User.email
-                )
-            )
-            .where(self.model.is_published.is_(True))
-            .offset(skip)
-            .limit(limit)
+    cache_namespaces = ("courses",)
+
+    loader_profiles = {
+        # CourseReadBase
+        "card": _card_options,
+        # CourseRead
+        "detail": lambda: (
+            selectinload(Course.sections)
+            .selectinload(Section.lessons)
+            .defer(Lesson.content, raiseload=True),
+            *_card_options(),
+        ),
+    }
+
+    async def list_published(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> tuple[Sequence[Course], Optional[str]]:
+        return await self.list_page(
+            db,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            where=(self.model.is_published.is_(True),),
+            profile="card",
         )
-        result = await db.execute(stmt)
-        data = result.scalars().all()
-        return data
 
     async def getDetailed(self, db: AsyncSession, obj_id: int | UUID):
-        forced = (
-            selectinload(self.model.sections).selectinload(Section.lessons),
-            selectinload(self.model.instructor).load_only(
-                User.id, User.full_name, User.email
-            ),
-            joinedload(self.model.image).load_only(Media.id, Media.secure_url),
+        return await self.get(db, obj_id, profile="detail")
+
+    async def get_detailed_json(
+        self, db: AsyncSession, obj_id: UUID
+    ) -> Optional[tuple[bytes, datetime]]:
+        """
+        `CourseRead` built by Postgres in one statement (json_build_object /
+        json_agg), returned as serialized bytes plus the newest updated_at of
+        course, instructor and image. Skips ORM hydration and pydantic.
+        """
+        empty = literal_column("'[]'::json")
+
+        lessons = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            func.json_build_object(
+                                "id",
+                                Lesson.id,
+                                "section_id",
+                                Lesson.section_id,
+                                "title",
+                                Lesson.title,
+                                "lesson_order",
+                                Lesson.lesson_order,
+                            ),
+                            Lesson.lesson_order,
+                            Lesson.id,
+                        )
+                    ),
+                    empty,
+                )
+            )
+            .where(Lesson.section_id == Section.id)
+            .correlate(Section)
+            .scalar_subquery()
+        )
+        sections = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            func.json_build_object(
+                                "id",
+                                Section.id,
+                                "course_id",
+                                Section.course_id,
+                                "title",
+                                Section.title,
+                                "section_order",
+                                Section.section_order,
+                                "lessons",
+                                lessons,
+                            ),
+                            Section.section_order,
+                            Section.id,
+                        )
+                    ),
+                    empty,
+                )
+            )
+            .where(Section.course_id == Course.id)
+            .correlate(Course)
+            .scalar_subquery()
+        )
+        instructor = (
+            select(
+                func.json_build_object(
+                    "full_name", User.full_name, "email", User.email, "id", User.id
+                )
+            )
+            .where(User.id == Course.instructor_id)
+            .correlate(Course)
+            .scalar_subquery()
+        )
+        image = (
+            select(
+                func.json_build_object(
+                    "id",
+                    Media.id,
+                    "secure_url",
+                    Media.secure_url,
+                    # responsive URLs are only derived on the ORM path
+                    "src",
+                    null(),
+                    "srcset",
+                    null(),
+                    "sizes",
+                    null(),
+                )
+            )
+            .where(Media.id == Course.image_id)
+            .correlate(Course)
+            .scalar_subquery()
+        )
+        last_modified = func.greatest(
+            Course.updated_at,
+            select(User.updated_at)
+            .where(User.id == Course.instructor_id)
+            .correlate(Course)
+            .scalar_subquery(),
+            select(Media.updated_at)
+            .where(Media.id == Course.image_id)
+            .correlate(Course)
+            .scalar_subquery(),
+        )
+        document = func.json_build_object(
+            "created_at",
+            Course.created_at,
+            "updated_at",
+            Course.updated_at,
+            "id",
+            Course.id,
+            "title",
+            Course.title,
+            "description",
+            Course.description,
+            "difficulty_level",
+            Course.difficulty_level,
+            "is_published",
+            Course.is_published,
+            "instructor",
+            instructor,
+            "image",
+            image,
+            "sections",
+            sections,
         )
-        return await super().get(db, obj_id, forced)
+        stmt = select(cast(document, Text), last_modified).where(Course.id == obj_id)
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            return None
+        return row[0].encode("utf-8"), row[1]
 
 
 course_crud = CourseCRUD(Course)
@@ -1,10 +1,67 @@
+from typing import Optional, Sequence
+
+from sqlalchemy import LargeBinary, select, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
 from app.services.base import CRUDBase
 from app.models.lesson import Lesson
 from app.schemas.lesson import LessonCreate, LessonUpdate
 
 
 class LessonCrud(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
-    pass
+    cache_namespaces = ("courses",)
+
+    async def list_by_section(
+        self,
+        db: AsyncSession,
+        section_id: int,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> tuple[Sequence[Lesson], Optional[str]]:
+        """Lessons of one section in display order, served by uq_lesson_section_order."""
+        stmt = (
+            select(self.model)
+            .options(defer(self.model.content, raiseload=True))
+            .where(self.model.section_id == section_id)
+        )
+        return await self.paginate(
+            db, stmt, keys=(self.model.lesson_order,), cursor=cursor, limit=limit
+        )
+
+    async def get_content_range(
+        self,
+        db: AsyncSession,
+        lesson_id: int,
+        *,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        suffix: Optional[int] = None,
+    ) -> Optional[tuple[int, str, bytes]]:
+        """
+        A byte range of the lesson's UTF-8 content, plus its total size and md5,
+        in one query. `start`/`end` are inclusive offsets (`end` None = to the
+        end); `suffix` asks for the last N bytes. No range returns everything.
+        """
+        content = func.coalesce(self.model.content, "")
+        data = func.convert_to(content, literal_column("'UTF8'"), type_=LargeBinary)
+        total = func.octet_length(data)
+        if suffix is not None:
+            part = func.substring(
+                data, func.greatest(total - suffix, 0) + 1, suffix, type_=LargeBinary
+            )
+        elif start is not None and end is not None:
+            part = func.substring(data, start + 1, end - start + 1, type_=LargeBinary)
+        elif start is not None:
+            part = func.substring(data, start + 1, type_=LargeBinary)
+        else:
+            part = data
+        stmt = select(total, func.md5(content), part).where(self.model.id == lesson_id)
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            return None
+        return row[0], row[1], bytes(row[2])
 
 
 lesson_crud = LessonCrud(Lesson)
@@ -1,60 +1,192 @@
 from __future__ import annotations
+import asyncio
+import json
 from datetime import datetime, timezone
 from typing import Optional, Sequence
 from typing import BinaryIO, Optional, Tuple, Any
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import Float, Row, Select, cast, delete, literal_column, select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import with_expression
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from fastapi import HTTPException, status
 
 from app.models.media import Media, MediaType as ModelMediaType
-from app.schemas.media import MediaCreate, MediaUpdate, MediaType as SchemaMediaType
+from app.core.config import settings
+from app.schemas.media import (
+    CountMode,
+    MediaCreate,
+    MediaRead,
+    MediaUpdate,
+    MediaType as SchemaMediaType,
+)
 from app.services.base import CRUDBase
-from sqlalchemy.exc import IntegrityError
+from app.services.media_deletion import media_deletion_queue
+from app.utils.ttl_cache import TTLCache
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from cloudinary.uploader import upload, upload_large, destroy
 
 
+# text search configuration used by media.search_vector (no stemming: titles
+# and filenames are mixed-language)
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON) <stmt>`, compiled with the statement's bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(_ExplainJSON)
+def _compile_explain_json(element: _ExplainJSON, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
 class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
+    # course images, project thumbnails/galleries and profile images embed media
+    cache_namespaces = ("courses", "projects", "profiles")
+
     def __init__(self) -> None:
         super().__init__(Media)
+        # exact totals per filter set for CountMode.cached; any media write clears it
+        self._count_cache: TTLCache[tuple, int] = TTLCache(
+            maxsize=settings.MEDIA_COUNT_CACHE_SIZE, ttl=settings.MEDIA_COUNT_CACHE_TTL
+        )
+
+    async def _invalidate_cache(self) -> None:
+        self._count_cache.clear()
+        await super()._invalidate_cache()
+
+    async def count_filtered(
+        self, db: AsyncSession, stmt: Select, mode: CountMode, cache_key: tuple
+    ) -> Optional[int]:
+        """Total rows matched by `stmt` according to `mode` (None for CountMode.none)."""
+        if mode == CountMode.none:
+            return None
+        if mode == CountMode.estimated:
+            return await self._estimate_rows(db, stmt)
+        if mode == CountMode.cached:
+            cached = self._count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        count_stmt = stmt.with_only_columns(
+            func.count(), maintain_column_froms=True
+        ).order_by(None)
+        total = int((await db.execute(count_stmt)).scalar_one())
+        if mode == CountMode.cached:
+            self._count_cache.set(cache_key, total)
+        return total
+
+    @staticmethod
+    async def _estimate_rows(db: AsyncSession, stmt: Select) -> int:
+        """
+        The planner's row estimate for `stmt` (from pg_class.reltuples and
+        column statistics); no rows are read.
+        """
+        probe = stmt.with_only_columns(Media.id, maintain_column_froms=True).order_by(
+            None
+        )
+        # the search term stays a bound parameter, never SQL text
+        plan = (await db.execute(_ExplainJSON(probe))).scalar_one()
+        if isinstance(plan, (str, bytes)):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
     async def list_filtered(
         self,
         db: AsyncSession,
         *,
+        cursor: Optional[str] = None,
         skip: int = 0,
         limit: int = 50,
         resource_type: Optional[SchemaMediaType] = None,
         is_published: Optional[bool] = None,
         is_deleted: Optional[bool] = False,
         search: Optional[str] = None,
-    ) -> tuple[Sequence[Media], int]:
-        base = select(Media)
-        if resource_type is not None:
-            base = base.where(Media.resource_type == resource_type)
-        if is_published is not None:
-            base = base.where(Media.is_published == is_published)
-        if is_deleted is not None:
-            base = base.where(Media.is_deleted == is_deleted)
-        if search:
-            ilike = f"%{search}%"
-            base = base.where(
-                (Media.title.ilike(ilike))
-                | (Media.alt_text.ilike(ilike))
-                | (Media.original_filename.ilike(ilike))
-            )
+        count: CountMode = CountMode.exact,
+    ) -> tuple[Sequence[Media], Optional[int], Optional[str]]:
+        base, rank = self.filtered_select(
+            resource_type=resource_type,
+            is_published=is_published,
+            is_deleted=is_deleted,
+            search=search,
+        )
 
-        # total count, drop ordering if any for speed
-        count_stmt = select(func.count()).select_from(base.order_by(None).subquery())
-        total = int((await db.execute(count_stmt)).scalar_one())
+        total = await self.count_filtered(
+            db,
+            base,
+            count,
+            (resource_type, is_published, is_deleted, (search or "").strip()),
+        )
 
-        # pagination
-        page_stmt = base.offset(skip).limit(limit)
-        result = await db.execute(page_stmt)
-        items = result.scalars().all()
-        return items, total
+        # pagination: keyset on (created_at, id) when a cursor is given; a
+        # search orders by relevance first, and the rank goes into the cursor
+        keys = self.page_keys()
+        if rank is not None:
+            base = base.options(with_expression(Media.search_rank, rank))
+            keys = (rank.label("search_rank"), *keys)
+        items, next_cursor = await self.paginate(
+            db,
+            base,
+            keys=keys,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            descending=True,
+        )
+        return items, total, next_cursor
+
+    def filtered_select(
+        self,
+        *,
+        resource_type: Optional[SchemaMediaType] = None,
+        is_published: Optional[bool] = None,
+        is_deleted: Optional[bool] = False,
+        search: Optional[str] = None,
+    ) -> tuple[Select, Optional[ColumnElement[float]]]:
+        """
+        SELECT over media with the admin list filters applied, plus the rank
+        expression when `search` is given.
+
+        Search matches whole words through the weighted `search_vector`
+        (title > alt_text > filename) or any substring through the trigram
+        index on `search_text`; rank combines both scores.
+        """
+        stmt = select(Media)
+        if resource_type is not None:
+            stmt = stmt.where(Media.resource_type == resource_type)
+        if is_published is not None:
+            stmt = stmt.where(Media.is_published == is_published)
+        # literal predicates, not a bound parameter: a generic plan must still
+        # be able to prove the partial listing indexes' WHERE clause
+        if is_deleted is True:
+            stmt = stmt.where(Media.is_deleted)
+        elif is_deleted is False:
+            stmt = stmt.where(~Media.is_deleted)
+
+        search = (search or "").strip()
+        if not search:
+            return stmt, None
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+        stmt = stmt.where(
+            Media.search_vector.op("@@")(query)
+            | Media.search_text.icontains(search, autoescape=True)
+        )
+        rank = cast(
+            func.ts_rank_cd(Media.search_vector, query)
+            + func.similarity(Media.search_text, search),
+            Float,
+        )
+        return stmt, rank
 
     async def get_by_public_id(self, db: AsyncSession, public_id: str) -> Media | None:
         """Gets a media by its public_id."""
@@ -69,7 +201,10 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
         return result.scalar_one()
 
     async def create_with_rules(self, db: AsyncSession, obj_in: MediaCreate) -> Media:
-        if obj_in.resource_type == SchemaMediaType.image and obj_in.duration_ms is not None:
+        if (
+            obj_in.resource_type == SchemaMediaType.image
+            and obj_in.duration_ms is not None
+        ):
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Images cannot have duration_ms.",
@@ -83,6 +218,36 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
                 detail="public_id must be unique.",
             )
 
+    async def create_many(
+        self, db: AsyncSession, payloads: Sequence[MediaCreate]
+    ) -> dict[str, Row]:
+        """
+        Insert all payloads with one multi-row `INSERT … ON CONFLICT (public_id)
+        DO NOTHING RETURNING` and commit once. Returns the created rows (the
+        MediaRead columns) by public_id; payloads whose public_id already
+        exists are simply absent.
+        """
+        if not payloads:
+            return {}
+        stmt = (
+            insert(Media)
+            .values([p.model_dump() for p in payloads])
+            .on_conflict_do_nothing(index_elements=[Media.public_id])
+            .returning(*(getattr(Media, name) for name in MediaRead.model_fields))
+        )
+        try:
+            rows = (await db.execute(stmt)).all()
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"A database error occurred: {e}",
+            )
+        if rows:
+            await self._invalidate_cache()
+        return {row.public_id: row for row in rows}
+
     async def update_with_rules(
         self, db: AsyncSession, obj_id: UUID, obj_in: MediaUpdate
     ) -> Media:
@@ -120,6 +285,7 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
 
         db_obj.public_id = new_public_id
         await db.commit()
+        await self._invalidate_cache()
         await db.refresh(db_obj)
         return db_obj
 
@@ -133,6 +299,7 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
         db_obj.deleted_at = datetime.now(timezone.utc)
         db_obj.deleted_by = deleted_by
         await db.commit()
+        await self._invalidate_cache()
         await db.refresh(db_obj)
         return db_obj
 
@@ -144,14 +311,19 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
         db_obj.deleted_at = None
         db_obj.deleted_by = None
         await db.commit()
+        await self._invalidate_cache()
         await db.refresh(db_obj)
         return db_obj
 
-    async def delete_from_cloudinary(self, public_id: str, resource_type: ModelMediaType):
+    async def delete_from_cloudinary(
+        self, public_id: str, resource_type: ModelMediaType
+    ):
         """Deletes a file from Cloudinary."""
-        cld_resource_type = "video" if resource_type == ModelMediaType.video else "image"
+        cld_resource_type = (
+            "video" if resource_type == ModelMediaType.video else "image"
+        )
         try:
-            destroy(public_id, resource_type=cld_resource_type)
+            await asyncio.to_thread(destroy, public_id, resource_type=cld_resource_type)
             return {"message": "Media deleted successfully from Cloudinary."}
         except Exception as e:
             raise HTTPException(
@@ -159,26 +331,51 @@ class MediaService(CRUDBase[Media, MediaCreate, MediaUpdate]):
                 detail=f"Failed to delete media from Cloudinary: {e}",
             )
 
+    async def delete_many(
+        self, db: AsyncSession, media_ids: Sequence[UUID]
+    ) -> list[UUID]:
+        """
+        Delete media rows in one statement and queue their Cloudinary assets
+        for removal in the same transaction. Returns the ids actually deleted.
+        """
+        stmt = (
+            delete(Media)
+            .where(Media.id.in_(media_ids))
+            .returning(Media.id, Media.public_id, Media.resource_type)
+        )
+        try:
+            rows = (await db.execute(stmt)).all()
+            await media_deletion_queue.enqueue(
+                db, ((r.public_id, r.resource_type) for r in rows)
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Media is still referenced by a course or profile.",
+            )
+        if rows:
+            await self._invalidate_cache()
+            media_deletion_queue.notify()
+        return [r.id for r in rows]
+
     async def delete_media_from_cloudinary_and_db(
         self, db: AsyncSession, media_id: UUID
     ):
-        db_obj = await self.get(db, media_id)
-        if not db_obj:
+        if not await self.delete_many(db, [media_id]):
             raise HTTPException(status_code=404, detail="Media not found")
-
-        await self.delete_from_cloudinary(db_obj.public_id, db_obj.resource_type)
-
-        # Delete from database
-        await self.delete(db, media_id)
-        return {"message": "Media deleted successfully from Cloudinary and database."}
+        return {"message": "Media deleted; Cloudinary removal queued."}
 
 
-MAX_DIRECT_VIDEO = 100 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024
 
 
 def _select_uploader(resource_type: SchemaMediaType, size_bytes: int):
-    if resource_type == SchemaMediaType.video and size_bytes > MAX_DIRECT_VIDEO:
-        return upload_large, {"chunk_size": 20 * 1024 * 1024}
+    # `upload` reads the whole stream into memory before sending it;
+    # `upload_large` reads and sends one chunk at a time.
+    if size_bytes > UPLOAD_CHUNK_SIZE:
+        return upload_large, {"chunk_size": UPLOAD_CHUNK_SIZE}
     return upload, {}
 
 
@@ -199,6 +396,7 @@ def upload_to_cloudinary(
         "public_id": public_id,
         "overwrite": overwrite,
         "context": context,
+        "filename": filename,
         "use_filename": True if public_id is None else False,
         "unique_filename": True if public_id is None else False,
     }
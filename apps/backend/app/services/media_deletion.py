@@ -0,0 +1,266 @@
+from __future__ import annotations
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Iterable, Optional, Sequence
+
+import cloudinary.api
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.media import MediaType, PendingMediaDeletion
+
+log = logging.getLogger(__name__)
+
+# Admin API limit for delete_resources
+CLOUDINARY_DELETE_BATCH = 100
+# statuses in a delete_resources response that mean the asset is gone
+_DONE = {"deleted", "not_found"}
+
+
+class MediaDeletionQueue:
+    """
+    Deletes Cloudinary assets in the background.
+
+    Hard deletes remove the DB row and `enqueue` the asset in the same
+    transaction, so the request never waits on Cloudinary. The worker claims
+    due rows with a short lease (`FOR UPDATE SKIP LOCKED`, safe with several
+    app processes), sends up to 100 public_ids per `delete_resources` call and
+    reschedules failures with exponential backoff. After `max_attempts`
+    failures a row is parked with `failed_at` set: it is no longer claimed,
+    shows up in `list`, and `retry` puts it back in the queue.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int,
+        poll_seconds: float,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        max_attempts: int,
+        lease_seconds: float = 300,
+        coalesce_seconds: float = 0.5,
+    ):
+        self.batch_size = min(batch_size, CLOUDINARY_DELETE_BATCH)
+        self.poll_seconds = poll_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(
+        self, db: AsyncSession, assets: Iterable[tuple[str, MediaType]]
+    ) -> None:
+        """Add assets to the queue. Does not commit; call `notify` after commit."""
+        rows = [
+            {"public_id": public_id, "resource_type": resource_type}
+            for public_id, resource_type in assets
+        ]
+        if not rows:
+            return
+        stmt = (
+            insert(PendingMediaDeletion)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="uq_pending_media_deletion_asset")
+        )
+        await db.execute(stmt)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        return min(
+            self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0)
+        )
+
+    async def _claim(self, db: AsyncSession) -> list:
+        due = (
+            select(PendingMediaDeletion.id)
+            .where(
+                PendingMediaDeletion.next_attempt_at <= func.now(),
+                PendingMediaDeletion.failed_at.is_(None),
+            )
+            .order_by(PendingMediaDeletion.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(PendingMediaDeletion)
+            .where(PendingMediaDeletion.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=PendingMediaDeletion.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                PendingMediaDeletion.id,
+                PendingMediaDeletion.public_id,
+                PendingMediaDeletion.resource_type,
+                PendingMediaDeletion.attempts,
+            )
+        )
+        rows = (await db.execute(stmt)).all()
+        await db.commit()
+        return rows
+
+    @staticmethod
+    def _delete_remote(public_ids: list[str], resource_type: MediaType) -> dict:
+        return cloudinary.api.delete_resources(
+            public_ids, resource_type=resource_type.value, type="upload"
+        )
+
+    async def process_batch(self) -> int:
+        """Claim and process one batch. Returns the number of rows claimed."""
+        async with AsyncSessionLocal() as db:
+            rows = await self._claim(db)
+            if not rows:
+                return 0
+
+            by_type: dict[MediaType, list] = defaultdict(list)
+            for row in rows:
+                by_type[row.resource_type].append(row)
+
+            done: list[int] = []
+            failed: list[tuple[object, str]] = []
+            for resource_type, group in by_type.items():
+                try:
+                    resp = await asyncio.to_thread(
+                        self._delete_remote,
+                        [r.public_id for r in group],
+                        resource_type,
+                    )
+                except Exception as e:
+                    failed.extend((r, str(e)[:500]) for r in group)
+                    continue
+                statuses = resp.get("deleted", {})
+                for r in group:
+                    outcome = statuses.get(r.public_id)
+                    if outcome in _DONE:
+                        done.append(r.id)
+                    else:
+                        failed.append((r, f"unexpected status: {outcome}"))
+
+            if done:
+                await db.execute(
+                    delete(PendingMediaDeletion).where(
+                        PendingMediaDeletion.id.in_(done)
+                    )
+                )
+            parked = [r for r, _ in failed if r.attempts >= self.max_attempts]
+            for r, error in failed:
+                if r.attempts >= self.max_attempts:
+                    values = {"failed_at": func.now(), "last_error": error}
+                else:
+                    delay = timedelta(seconds=self.backoff(r.attempts))
+                    values = {
+                        "next_attempt_at": func.now() + delay,
+                        "last_error": error,
+                    }
+                await db.execute(
+                    update(PendingMediaDeletion)
+                    .where(PendingMediaDeletion.id == r.id)
+                    .values(**values)
+                )
+            await db.commit()
+
+        if len(failed) > len(parked):
+            log.warning(
+                "Cloudinary deletion failed for %d asset(s); will retry",
+                len(failed) - len(parked),
+            )
+        for r in parked:
+            log.error(
+                "Giving up on Cloudinary deletion of %s after %d attempts",
+                r.public_id,
+                r.attempts,
+            )
+        return len(rows)
+
+    async def list_pending(
+        self, db: AsyncSession, *, failed: Optional[bool] = None, limit: int = 100
+    ) -> Sequence[PendingMediaDeletion]:
+        """Queued deletions, oldest first; `failed` keeps only parked (or only live) rows."""
+        stmt = (
+            select(PendingMediaDeletion).order_by(PendingMediaDeletion.id).limit(limit)
+        )
+        if failed is not None:
+            stmt = stmt.where(
+                PendingMediaDeletion.failed_at.is_not(None)
+                if failed
+                else PendingMediaDeletion.failed_at.is_(None)
+            )
+        return (await db.scalars(stmt)).all()
+
+    async def retry(self, db: AsyncSession, deletion_id: int) -> PendingMediaDeletion:
+        """Put a deletion back in the queue, due now, with a fresh attempt budget."""
+        row = (
+            await db.execute(
+                update(PendingMediaDeletion)
+                .where(PendingMediaDeletion.id == deletion_id)
+                .values(attempts=0, failed_at=None, next_attempt_at=func.now())
+                .returning(PendingMediaDeletion)
+            )
+        ).scalar_one_or_none()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Pending deletion not found",
+            )
+        await db.commit()
+        self.notify()
+        return row
+
+    async def drain(self) -> int:
+        total = 0
+        while True:
+            claimed = await self.process_batch()
+            total += claimed
+            if claimed < self.batch_size:
+                return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Media deletion worker iteration failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                # let a burst of hard-deletes land so they share a batch
+                await asyncio.sleep(self.coalesce_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+media_deletion_queue = MediaDeletionQueue(
+    batch_size=settings.MEDIA_DELETE_BATCH_SIZE,
+    poll_seconds=settings.MEDIA_DELETE_POLL_SECONDS,
+    retry_base_seconds=settings.MEDIA_DELETE_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.MEDIA_DELETE_RETRY_MAX_SECONDS,
+    max_attempts=settings.MEDIA_DELETE_MAX_ATTEMPTS,
+)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import asyncio
+import hmac
+import json
+import mimetypes
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import uuid4
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.utils
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.schemas.media import MediaType as SchemaMediaType
+from app.services.media import media_service
+from app.services.media_upload import build_media_create
+
+# context marker on direct uploads, so the webhook ignores uploads made by
+# POST /media (those create their own row)
+FLOW_KEY, FLOW_DIRECT = "upload_flow", "direct"
+
+# Cloudinary rejects upload signatures older than an hour
+SIGNATURE_TTL = timedelta(hours=1)
+
+# formats matching the MIME types POST /media accepts
+ALLOWED_FORMATS = {
+    SchemaMediaType.image: "jpg,jpeg,png,webp,gif",
+    SchemaMediaType.video: "mp4,webm,mov",
+}
+
+
+def _config() -> Any:
+    config = cloudinary.config()
+    if not config.api_secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cloudinary is not configured.",
+        )
+    return config
+
+
+def sign_direct_upload(
+    *,
+    resource_type: SchemaMediaType,
+    folder: Optional[str] = None,
+    title: Optional[str] = None,
+    alt_text: Optional[str] = None,
+    description: Optional[str] = None,
+    is_published: bool = False,
+) -> dict[str, Any]:
+    """
+    Signed parameters for a browser-to-Cloudinary upload.
+
+    The API picks the public_id and signs it together with the allowed
+    formats, the metadata (as Cloudinary context) and, when configured, the
+    notification URL, so the client can change none of them. The client posts
+    the file plus `params` to `upload_url`; no file bytes reach this process.
+    """
+    config = _config()
+    issued = datetime.now(timezone.utc)
+    context = {"caption": title, "alt": alt_text, "description": description}
+    context = {k: v for k, v in context.items() if v}
+    if is_published:
+        context["published"] = "true"
+    context[FLOW_KEY] = FLOW_DIRECT
+    params = {
+        "timestamp": int(issued.timestamp()),
+        "public_id": uuid4().hex,
+        "folder": folder,
+        "allowed_formats": ALLOWED_FORMATS[resource_type],
+        "context": cloudinary.utils.encode_context(context),
+        "notification_url": settings.MEDIA_UPLOAD_NOTIFICATION_URL,
+    }
+    params = cloudinary.utils.sign_request(
+        {k: v for k, v in params.items() if v is not None},
+        {"api_key": config.api_key, "api_secret": config.api_secret},
+    )
+    return {
+        "upload_url": cloudinary.utils.cloudinary_api_url(
+            "upload", resource_type=resource_type.value
+        ),
+        "params": params,
+        "expires_at": issued + SIGNATURE_TTL,
+    }
+
+
+def verify_upload_response(public_id: str, version: int, signature: str) -> bool:
+    """Whether `signature` is Cloudinary's signature of this upload result."""
+    config = _config()
+    expected = cloudinary.utils.api_sign_request(
+        {"public_id": public_id, "version": version},
+        config.api_secret,
+        config.signature_algorithm,
+        signature_version=1,
+    )
+    return hmac.compare_digest(expected, signature)
+
+
+async def fetch_upload(
+    public_id: str, resource_type: SchemaMediaType, version: int
+) -> dict[str, Any]:
+    """
+    The uploaded asset as the Admin API describes it. The completion callback
+    only proves public_id and version, so the row is built from this instead
+    of anything else the client sent.
+    """
+    try:
+        resource = await asyncio.to_thread(
+            cloudinary.api.resource, public_id, resource_type=resource_type.value
+        )
+    except cloudinary.exceptions.NotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found on Cloudinary.",
+        )
+    except cloudinary.exceptions.Error as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Cloudinary lookup failed: {e}",
+        )
+    if resource.get("version") != version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The asset was replaced after this upload.",
+        )
+    return dict(resource)
+
+
+def verify_notification(body: str, timestamp: str, signature: str) -> bool:
+    """Whether a webhook body carries a valid, fresh X-Cld-Signature."""
+    config = _config()
+    try:
+        sent_at = int(timestamp)
+    except ValueError:
+        return False
+    if sent_at < time.time() - settings.MEDIA_UPLOAD_NOTIFICATION_MAX_AGE:
+        return False
+    expected = cloudinary.utils.compute_hex_hash(
+        f"{body}{sent_at}{config.api_secret}", config.signature_algorithm
+    )
+    return hmac.compare_digest(expected, signature)
+
+
+async def register_direct_upload(db: AsyncSession, cld_resp: dict[str, Any]) -> Any:
+    """
+    Create the media row for a finished direct upload (client callback or
+    webhook, whichever arrives first; the other finds the existing row).
+    `cld_resp` is trusted Cloudinary data: the signed webhook body or the
+    `fetch_upload` result. Metadata comes back from the signed context.
+    """
+    resource_type = cld_resp.get("resource_type")
+    if resource_type not in SchemaMediaType.__members__:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unsupported resource_type: {resource_type}",
+        )
+    resource_type = SchemaMediaType(resource_type)
+    context = (cld_resp.get("context") or {}).get("custom") or {}
+    public_id: str = cld_resp["public_id"]
+    content_type, _ = mimetypes.guess_type(f"file.{cld_resp.get('format') or ''}")
+
+    payload = build_media_create(
+        cld_resp,
+        resource_type=resource_type,
+        filename=public_id.rsplit("/", 1)[-1],
+        content_type=content_type,
+        size_bytes=cld_resp.get("bytes", 0),
+        folder=cld_resp.get("asset_folder") or public_id.rpartition("/")[0] or None,
+        title=context.get("caption"),
+        alt_text=context.get("alt"),
+        description=context.get("description"),
+        is_published=context.get("published") == "true",
+    )
+    created = await media_service.create_many(db, [payload])
+    return created.get(public_id) or await media_service.get_by_public_id(db, public_id)
+
+
+def parse_notification(body: str) -> Optional[dict[str, Any]]:
+    """The direct-upload result inside a webhook body; None for anything else."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body."
+        )
+    if not isinstance(data, dict) or data.get("notification_type") != "upload":
+        return None
+    context = (data.get("context") or {}).get("custom") or {}
+    return data if context.get(FLOW_KEY) == FLOW_DIRECT else None
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.media import Media
+from app.schemas.media import ExportFormat, MediaRead, MediaType
+from app.services.media import media_service
+
+# same fields, same order as MediaRead
+EXPORT_COLUMNS = tuple(getattr(Media, name) for name in MediaRead.model_fields)
+EXPORT_FIELDS = tuple(MediaRead.model_fields)
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _ndjson(rows: Sequence[Row]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))), ensure_ascii=False)
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv(rows: Sequence[Row]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([_plain(v) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+
+def _csv_header() -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(EXPORT_FIELDS)
+    return buf.getvalue().encode()
+
+
+async def export_media(
+    fmt: ExportFormat,
+    *,
+    resource_type: Optional[MediaType] = None,
+    is_published: Optional[bool] = None,
+    is_deleted: Optional[bool] = False,
+    search: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream every media row matching the GET /media filters, newest first,
+    as NDJSON lines or CSV (with a header row).
+
+    Rows come through a server-side cursor `batch_size` at a time and each
+    batch is encoded into one chunk, so memory stays flat however many rows
+    match. Only plain columns are selected, so nothing lands in an identity
+    map. The generator owns its session: it outlives the request's.
+    """
+    batch_size = batch_size or settings.MEDIA_EXPORT_BATCH_SIZE
+    base, _ = media_service.filtered_select(
+        resource_type=resource_type,
+        is_published=is_published,
+        is_deleted=is_deleted,
+        search=search,
+    )
+    stmt = (
+        base.with_only_columns(*EXPORT_COLUMNS, maintain_column_froms=True)
+        .order_by(Media.created_at.desc(), Media.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    encode = _ndjson if fmt == ExportFormat.ndjson else _csv
+
+    if fmt == ExportFormat.csv:
+        yield _csv_header()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield encode(rows)
@@ -0,0 +1,444 @@
+from __future__ import annotations
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import cloudinary.api
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    bindparam,
+    column,
+    exists,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.media import Media, MediaReconcileState, MediaType, PendingMediaDeletion
+from app.services.media import media_service
+
+log = logging.getLogger(__name__)
+
+# resources_by_ids accepts at most 100 public_ids per call
+CLOUDINARY_IDS_BATCH = 100
+# public_ids kept per category in a report (counts are always exact)
+REPORT_SAMPLE = 100
+
+LOCAL_SCOPE = "local"
+
+# remote metadata columns compared against media, in unnest() order
+_REMOTE_COLUMNS = (
+    ("public_id", String),
+    ("format", String),
+    ("version", Integer),
+    ("bytes", Integer),
+    ("width", Integer),
+    ("height", Integer),
+    ("duration_ms", Integer),
+)
+
+
+def _remote_scope(resource_type: MediaType) -> str:
+    return f"remote:{resource_type.value}"
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _remote_table(resources: list[dict[str, Any]], resource_type: MediaType):
+    """`unnest(...) AS remote(public_id, format, ...)` over one page of assets."""
+    values: dict[str, list] = {name: [] for name, _ in _REMOTE_COLUMNS}
+    for r in resources:
+        values["public_id"].append(r["public_id"])
+        values["format"].append(r.get("format"))
+        values["version"].append(r.get("version"))
+        values["bytes"].append(r.get("bytes"))
+        values["width"].append(r.get("width"))
+        values["height"].append(r.get("height"))
+        values["duration_ms"].append(
+            int(r["duration"] * 1000)
+            if resource_type == MediaType.video and r.get("duration") is not None
+            else None
+        )
+    return (
+        func.unnest(
+            *(
+                bindparam(name, values[name], type_=ARRAY(t))
+                for name, t in _REMOTE_COLUMNS
+            )
+        )
+        .table_valued(*(column(name, t) for name, t in _REMOTE_COLUMNS))
+        .render_derived(name="remote")
+    )
+
+
+@dataclass
+class ScopeReport:
+    scope: str
+    scanned: int = 0
+    repaired: int = 0
+    remote_only: list[str] = field(default_factory=list)
+    remote_only_count: int = 0
+    missing_remote: list[str] = field(default_factory=list)
+    missing_remote_count: int = 0
+    caught_up: bool = False
+
+    def add_remote_only(self, public_ids: list[str]) -> None:
+        self.remote_only_count += len(public_ids)
+        self.remote_only.extend(public_ids[: REPORT_SAMPLE - len(self.remote_only)])
+
+    def add_missing_remote(self, public_ids: list[str]) -> None:
+        self.missing_remote_count += len(public_ids)
+        self.missing_remote.extend(
+            public_ids[: REPORT_SAMPLE - len(self.missing_remote)]
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "finished_at": datetime.now(timezone.utc).isoformat()}
+
+
+class MediaReconciler:
+    """
+    Finds and fixes drift between Cloudinary and the media table.
+
+    Two incremental walks, each resumable from a high-water mark stored in
+    media_reconcile_state:
+
+    - remote (per resource type): pages through the Admin API listing in
+      upload order starting at the mark. Each page is joined against media
+      in one statement (an `unnest` of the page), which repairs format,
+      version, bytes and dimensions in bulk and reports assets that have no
+      row (and are not queued for deletion).
+    - local: walks media rows by (created_at, id) and asks Cloudinary for
+      100 public_ids per call; rows whose asset is gone are reported, not
+      deleted. At the end of the table the walk starts over.
+
+    A run covers at most `max_pages` pages per scope and saves the mark after
+    every page, so runs stay cheap on Admin API quota. Scopes are leased so
+    several app processes never reconcile the same scope at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        page_size: int,
+        max_pages: int,
+        interval_seconds: float,
+        lease_seconds: float = 900,
+    ):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def _claim(
+        self, db: AsyncSession, scope: str
+    ) -> Optional[MediaReconcileState]:
+        await db.execute(
+            insert(MediaReconcileState).values(scope=scope).on_conflict_do_nothing()
+        )
+        stmt = (
+            update(MediaReconcileState)
+            .where(
+                MediaReconcileState.scope == scope,
+                or_(
+                    MediaReconcileState.locked_until.is_(None),
+                    MediaReconcileState.locked_until < func.now(),
+                ),
+            )
+            .values(locked_until=func.now() + timedelta(seconds=self.lease_seconds))
+            .returning(MediaReconcileState)
+        )
+        state = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+        return state
+
+    async def _save(
+        self,
+        db: AsyncSession,
+        scope: str,
+        *,
+        report: Optional[ScopeReport] = None,
+        **mark: Any,
+    ) -> None:
+        values: dict[str, Any] = dict(mark)
+        if report is not None:
+            values.update(
+                locked_until=None, last_run_at=func.now(), last_report=report.as_dict()
+            )
+        await db.execute(
+            update(MediaReconcileState)
+            .where(MediaReconcileState.scope == scope)
+            .values(**values)
+        )
+        await db.commit()
+
+    async def _release(self, scope: str, report: ScopeReport) -> None:
+        """Store the run's report and drop the lease, in a session of its own."""
+        async with AsyncSessionLocal() as db:
+            await self._save(db, scope, report=report)
+
+    async def _repair(
+        self,
+        db: AsyncSession,
+        resources: list[dict[str, Any]],
+        resource_type: MediaType,
+    ) -> list[str]:
+        """Bulk-update rows whose metadata differs from Cloudinary's; their public_ids."""
+        remote = _remote_table(resources, resource_type)
+        tracked = (Media.format, Media.version, Media.bytes, Media.width, Media.height)
+        incoming = (
+            remote.c.format,
+            remote.c.version,
+            remote.c.bytes,
+            func.coalesce(remote.c.width, Media.width),
+            func.coalesce(remote.c.height, Media.height),
+        )
+        stmt = (
+            update(Media)
+            .where(
+                Media.public_id == remote.c.public_id,
+                Media.resource_type == resource_type,
+                or_(
+                    tuple_(*tracked).is_distinct_from(tuple_(*incoming)),
+                    and_(
+                        remote.c.duration_ms.is_not(None),
+                        Media.duration_ms.is_distinct_from(remote.c.duration_ms),
+                    ),
+                ),
+            )
+            .values(
+                format=remote.c.format,
+                version=remote.c.version,
+                bytes=remote.c.bytes,
+                width=func.coalesce(remote.c.width, Media.width),
+                height=func.coalesce(remote.c.height, Media.height),
+                duration_ms=func.coalesce(remote.c.duration_ms, Media.duration_ms),
+            )
+            .returning(Media.public_id)
+        )
+        return list((await db.execute(stmt)).scalars())
+
+    async def _remote_only(
+        self,
+        db: AsyncSession,
+        resources: list[dict[str, Any]],
+        resource_type: MediaType,
+    ) -> list[str]:
+        """Assets with no media row that are not already queued for deletion."""
+        remote = _remote_table(resources, resource_type)
+        stmt = select(remote.c.public_id).where(
+            ~exists().where(Media.public_id == remote.c.public_id),
+            ~exists().where(
+                PendingMediaDeletion.public_id == remote.c.public_id,
+                PendingMediaDeletion.resource_type == resource_type,
+            ),
+        )
+        return list((await db.execute(stmt)).scalars())
+
+    @staticmethod
+    def _list_remote(
+        resource_type: MediaType,
+        start_at: Optional[datetime],
+        page_size: int,
+        cursor: Optional[str],
+    ) -> dict:
+        options: dict[str, Any] = {
+            "resource_type": resource_type.value,
+            "type": "upload",
+            "max_results": page_size,
+            "direction": "asc",
+        }
+        if start_at is not None:
+            options["start_at"] = start_at.astimezone(timezone.utc).isoformat()
+        if cursor:
+            options["next_cursor"] = cursor
+        return cloudinary.api.resources(**options)
+
+    @staticmethod
+    def _fetch_remote(public_ids: list[str], resource_type: MediaType) -> dict:
+        return cloudinary.api.resources_by_ids(
+            public_ids, resource_type=resource_type.value, type="upload"
+        )
+
+    async def reconcile_remote(self, resource_type: MediaType) -> Optional[ScopeReport]:
+        scope = _remote_scope(resource_type)
+        async with AsyncSessionLocal() as db:
+            state = await self._claim(db, scope)
+            if state is None:
+                return None
+            report = ScopeReport(scope)
+            mark = state.high_water_mark
+            cursor: Optional[str] = None
+            try:
+                for _ in range(self.max_pages):
+                    resp = await asyncio.to_thread(
+                        self._list_remote,
+                        resource_type,
+                        state.high_water_mark,
+                        self.page_size,
+                        cursor,
+                    )
+                    resources = resp.get("resources", [])
+                    if resources:
+                        repaired = await self._repair(db, resources, resource_type)
+                        report.repaired += len(repaired)
+                        report.add_remote_only(
+                            await self._remote_only(db, resources, resource_type)
+                        )
+                        report.scanned += len(resources)
+                        mark = max(
+                            [_parse_time(r["created_at"]) for r in resources]
+                            + ([mark] if mark else [])
+                        )
+                        await self._save(db, scope, high_water_mark=mark)
+                    cursor = resp.get("next_cursor")
+                    if not cursor:
+                        report.caught_up = True
+                        break
+            except BaseException:
+                # a failed transaction can't run the release (and may hold
+                # row locks it needs)
+                await db.rollback()
+                raise
+            finally:
+                await self._release(scope, report)
+            if report.repaired:
+                await media_service._invalidate_cache()
+            return report
+
+    async def reconcile_local(self) -> Optional[ScopeReport]:
+        async with AsyncSessionLocal() as db:
+            state = await self._claim(db, LOCAL_SCOPE)
+            if state is None:
+                return None
+            report = ScopeReport(LOCAL_SCOPE)
+            mark, last_id = state.high_water_mark, state.last_id
+            try:
+                for _ in range(self.max_pages):
+                    stmt = (
+                        select(
+                            Media.id,
+                            Media.public_id,
+                            Media.resource_type,
+                            Media.created_at,
+                        )
+                        .order_by(Media.created_at, Media.id)
+                        .limit(self.page_size)
+                    )
+                    if mark is not None:
+                        stmt = stmt.where(
+                            tuple_(Media.created_at, Media.id) > (mark, last_id)
+                        )
+                    rows = (await db.execute(stmt)).all()
+
+                    by_type: dict[MediaType, list[str]] = defaultdict(list)
+                    for row in rows:
+                        by_type[row.resource_type].append(row.public_id)
+                    for resource_type, public_ids in by_type.items():
+                        for i in range(0, len(public_ids), CLOUDINARY_IDS_BATCH):
+                            batch = public_ids[i : i + CLOUDINARY_IDS_BATCH]
+                            resp = await asyncio.to_thread(
+                                self._fetch_remote, batch, resource_type
+                            )
+                            found = resp.get("resources", [])
+                            if found:
+                                repaired = await self._repair(db, found, resource_type)
+                                report.repaired += len(repaired)
+                            seen = {r["public_id"] for r in found}
+                            report.add_missing_remote(
+                                [p for p in batch if p not in seen]
+                            )
+
+                    report.scanned += len(rows)
+                    if len(rows) < self.page_size:
+                        # end of the table: the next run starts over
+                        mark, last_id = None, None
+                        report.caught_up = True
+                    else:
+                        mark, last_id = rows[-1].created_at, rows[-1].id
+                    await self._save(
+                        db, LOCAL_SCOPE, high_water_mark=mark, last_id=last_id
+                    )
+                    if report.caught_up:
+                        break
+            except BaseException:
+                # a failed transaction can't run the release (and may hold
+                # row locks it needs)
+                await db.rollback()
+                raise
+            finally:
+                await self._release(LOCAL_SCOPE, report)
+            if report.repaired:
+                await media_service._invalidate_cache()
+            return report
+
+    async def run_once(self) -> list[dict[str, Any]]:
+        """Run every scope once; scopes leased by another process are skipped."""
+        reports = [await self.reconcile_remote(t) for t in MediaType]
+        reports.append(await self.reconcile_local())
+        done = [r.as_dict() for r in reports if r is not None]
+        for r in done:
+            if r["repaired"] or r["remote_only_count"] or r["missing_remote_count"]:
+                log.warning(
+                    "Media reconcile %s: repaired=%d remote_only=%d missing_remote=%d",
+                    r["scope"],
+                    r["repaired"],
+                    r["remote_only_count"],
+                    r["missing_remote_count"],
+                )
+        return done
+
+    @staticmethod
+    async def last_reports() -> list[dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            stmt = (
+                select(MediaReconcileState.last_report)
+                .where(MediaReconcileState.last_report.is_not(None))
+                .order_by(MediaReconcileState.scope)
+            )
+            return list((await db.execute(stmt)).scalars())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Media reconcile run failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+media_reconciler = MediaReconciler(
+    page_size=settings.MEDIA_RECONCILE_PAGE_SIZE,
+    max_pages=settings.MEDIA_RECONCILE_MAX_PAGES,
+    interval_seconds=settings.MEDIA_RECONCILE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, BinaryIO, Optional, Sequence
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.schemas.media import MediaCreate, MediaType as SchemaMediaType
+from app.models.media import MediaType as ModelMediaType
+from app.services.media import media_service, upload_to_cloudinary
+from app.services.media_deletion import media_deletion_queue
+
+log = logging.getLogger(__name__)
+
+COPY_CHUNK = 1024 * 1024
+
+ACCEPTED_MIME = {
+    SchemaMediaType.image: {"image/jpeg", "image/png", "image/webp", "image/gif"},
+    SchemaMediaType.video: {"video/mp4", "video/webm", "video/quicktime"},
+}
+
+
+def content_type_error(
+    resource_type: Optional[SchemaMediaType], content_type: Optional[str]
+) -> Optional[str]:
+    """Why `content_type` cannot be uploaded as `resource_type` (None if it can)."""
+    if resource_type is None or content_type not in ACCEPTED_MIME[resource_type]:
+        kind = resource_type.value if resource_type is not None else "media"
+        return f"Unsupported {kind} content-type: {content_type}"
+    return None
+
+
+def guess_resource_type(content_type: Optional[str]) -> Optional[SchemaMediaType]:
+    for resource_type, accepted in ACCEPTED_MIME.items():
+        if content_type in accepted:
+            return resource_type
+    return None
+
+
+def build_media_create(
+    cld_resp: dict[str, Any],
+    *,
+    resource_type: SchemaMediaType,
+    filename: str,
+    content_type: Optional[str],
+    size_bytes: int,
+    folder: Optional[str] = None,
+    title: Optional[str] = None,
+    alt_text: Optional[str] = None,
+    description: Optional[str] = None,
+    is_published: bool = False,
+) -> MediaCreate:
+    """Map a Cloudinary upload response onto a MediaCreate payload."""
+    return MediaCreate(
+        public_id=cld_resp["public_id"],
+        resource_type=resource_type,
+        format=cld_resp.get("format"),
+        version=cld_resp.get("version"),
+        secure_url=cld_resp["secure_url"],
+        url=cld_resp.get("url"),
+        content_type=content_type,
+        bytes=cld_resp.get("bytes", size_bytes),
+        width=cld_resp.get("width"),
+        height=cld_resp.get("height"),
+        duration_ms=(
+            int(cld_resp["duration"] * 1000)
+            if ("duration" in cld_resp and resource_type == SchemaMediaType.video)
+            else None
+        ),
+        folder=folder,
+        original_filename=cld_resp.get("original_filename") or filename,
+        title=title,
+        alt_text=alt_text,
+        description=description,
+        is_published=is_published,
+        is_deleted=False,
+    )
+
+
+def upload_size(file: UploadFile) -> int:
+    """Size of a spooled upload without reading it into memory."""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+class UploadJobStatus(str, Enum):
+    pending = "pending"
+    uploading = "uploading"
+    completed = "completed"
+    failed = "failed"
+
+
+@dataclass
+class UploadJob:
+    id: UUID
+    filename: str
+    status: UploadJobStatus = UploadJobStatus.pending
+    media_id: Optional[UUID] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+@dataclass
+class BatchUploadItem:
+    filename: str
+    media: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class MediaUploadService:
+    """
+    Runs the blocking Cloudinary SDK off the event loop.
+
+    Transfers go through `asyncio.to_thread` behind a semaphore, so at most
+    `max_concurrency` uploads hold a worker thread at a time. `submit` accepts
+    an upload for background processing and returns a job the client can poll;
+    the finished MediaCreate insert happens on the worker with its own session,
+    and an asset whose row cannot be inserted is queued for deletion. Jobs
+    live in process memory and only the newest `max_jobs` are retained.
+    """
+
+    def __init__(self, max_concurrency: int, max_jobs: int = 1000):
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._max_jobs = max_jobs
+        self._jobs: OrderedDict[UUID, UploadJob] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def upload(self, file_stream: BinaryIO, **options: Any) -> dict[str, Any]:
+        return await self._in_thread(upload_to_cloudinary, file_stream, **options)
+
+    async def upload_file(self, path: str, **options: Any) -> dict[str, Any]:
+        """Upload a file on disk; it is opened and closed on the worker thread."""
+        return await self._in_thread(self._upload_path, path, **options)
+
+    @staticmethod
+    def _upload_path(path: str, **options: Any) -> dict[str, Any] | None:
+        # a cancelled caller cannot stop the thread, so the thread owns the
+        # file: it is never closed under a transfer that is still reading it
+        with open(path, "rb") as stream:
+            return upload_to_cloudinary(stream, **options)
+
+    async def _in_thread(self, fn: Any, *args: Any, **options: Any) -> dict[str, Any]:
+        async with self._slots:
+            resp = await asyncio.to_thread(fn, *args, **options)
+        if resp is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Media upload failed unexpectedly.",
+            )
+        return resp
+
+    async def upload_batch(
+        self,
+        db: AsyncSession,
+        files: Sequence[UploadFile],
+        *,
+        resource_type: Optional[SchemaMediaType] = None,
+        folder: Optional[str] = None,
+        is_published: bool = False,
+    ) -> list[BatchUploadItem]:
+        """
+        Upload `files` concurrently (bounded by the shared upload semaphore)
+        and insert every successful one with a single multi-row INSERT.
+
+        Returns one item per file, in order, with either the created media
+        row or the reason it failed; one bad file never fails the batch.
+        Without `resource_type` each file's type is taken from its
+        content-type. If the INSERT itself fails, the freshly uploaded assets
+        are queued for deletion before the error is raised.
+        """
+        items = [BatchUploadItem(filename=f.filename or "upload") for f in files]
+
+        async def transfer(
+            item: BatchUploadItem, file: UploadFile
+        ) -> Optional[MediaCreate]:
+            rtype = resource_type or guess_resource_type(file.content_type)
+            item.error = content_type_error(rtype, file.content_type)
+            if item.error:
+                return None
+            size_bytes = upload_size(file)
+            try:
+                cld_resp = await self.upload(
+                    file.file,
+                    filename=item.filename,
+                    resource_type=rtype,
+                    folder=folder,
+                    size_bytes=size_bytes,
+                )
+            except HTTPException as e:
+                item.error = str(e.detail)
+                return None
+            return build_media_create(
+                cld_resp,
+                resource_type=rtype,
+                filename=item.filename,
+                content_type=file.content_type,
+                size_bytes=size_bytes,
+                folder=folder,
+                is_published=is_published,
+            )
+
+        payloads = await asyncio.gather(*map(transfer, items, files))
+        uploaded = [p for p in payloads if p is not None]
+        try:
+            created = await media_service.create_many(db, uploaded)
+        except HTTPException:
+            await media_deletion_queue.enqueue(
+                db,
+                (
+                    (p.public_id, ModelMediaType(p.resource_type.value))
+                    for p in uploaded
+                ),
+            )
+            await db.commit()
+            media_deletion_queue.notify()
+            raise
+
+        for item, payload in zip(items, payloads):
+            if payload is None:
+                continue
+            item.media = created.get(payload.public_id)
+            if item.media is None:
+                item.error = "public_id must be unique."
+        return items
+
+    def get_job(self, job_id: UUID) -> Optional[UploadJob]:
+        return self._jobs.get(job_id)
+
+    async def submit(
+        self,
+        file: UploadFile,
+        *,
+        resource_type: SchemaMediaType,
+        folder: Optional[str] = None,
+        context: Optional[dict] = None,
+        title: Optional[str] = None,
+        alt_text: Optional[str] = None,
+        description: Optional[str] = None,
+        is_published: bool = False,
+    ) -> UploadJob:
+        filename = file.filename or "upload"
+        # the request's spooled file is closed once the response is sent, so
+        # hand the worker its own copy (streamed, never fully in memory)
+        tmp_path = await asyncio.to_thread(self._spool_to_disk, file.file)
+        size_bytes = os.path.getsize(tmp_path)
+
+        job = UploadJob(id=uuid4(), filename=filename)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._max_jobs:
+            self._jobs.popitem(last=False)
+
+        task = asyncio.create_task(
+            self._run_job(
+                job,
+                tmp_path,
+                resource_type=resource_type,
+                content_type=file.content_type,
+                size_bytes=size_bytes,
+                folder=folder,
+                context=context,
+                title=title,
+                alt_text=alt_text,
+                description=description,
+                is_published=is_published,
+            )
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    @staticmethod
+    def _spool_to_disk(src: BinaryIO) -> str:
+        src.seek(0)
+        with tempfile.NamedTemporaryFile(prefix="ahc-upload-", delete=False) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+            return dst.name
+
+    async def _run_job(
+        self,
+        job: UploadJob,
+        tmp_path: str,
+        *,
+        resource_type: SchemaMediaType,
+        content_type: Optional[str],
+        size_bytes: int,
+        folder: Optional[str],
+        context: Optional[dict],
+        title: Optional[str],
+        alt_text: Optional[str],
+        description: Optional[str],
+        is_published: bool,
+    ) -> None:
+        cld_resp: Optional[dict[str, Any]] = None
+        try:
+            job.status = UploadJobStatus.uploading
+            cld_resp = await self.upload_file(
+                tmp_path,
+                filename=job.filename,
+                resource_type=resource_type,
+                folder=folder,
+                context=context,
+                size_bytes=size_bytes,
+            )
+            payload = build_media_create(
+                cld_resp,
+                resource_type=resource_type,
+                filename=job.filename,
+                content_type=content_type,
+                size_bytes=size_bytes,
+                folder=folder,
+                title=title,
+                alt_text=alt_text,
+                description=description,
+                is_published=is_published,
+            )
+            async with AsyncSessionLocal() as db:
+                obj = await media_service.create_with_rules(db, payload)
+            job.media_id = obj.id
+            job.status = UploadJobStatus.completed
+            return
+        except HTTPException as e:
+            job.status = UploadJobStatus.failed
+            job.error = str(e.detail)
+            if e.status_code == status.HTTP_409_CONFLICT:
+                # the public_id is already recorded; the asset is that row's
+                cld_resp = None
+        except Exception:
+            log.exception("Background media upload %s failed", job.id)
+            job.status = UploadJobStatus.failed
+            job.error = "Internal error"
+        finally:
+            os.unlink(tmp_path)
+        if cld_resp is not None:
+            # uploaded but never recorded: don't leave the asset orphaned
+            await self._discard(cld_resp["public_id"], resource_type)
+
+    @staticmethod
+    async def _discard(public_id: str, resource_type: SchemaMediaType) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await media_deletion_queue.enqueue(
+                    db, [(public_id, ModelMediaType(resource_type.value))]
+                )
+                await db.commit()
+        except Exception:
+            log.exception("Could not queue orphaned asset %s for deletion", public_id)
+            return
+        media_deletion_queue.notify()
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+media_upload_service = MediaUploadService(
+    max_concurrency=settings.MEDIA_UPLOAD_CONCURRENCY
+)
@@ -1,4 +1,5 @@
-from sqlalchemy import select
+from typing import Optional, Sequence
+
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,46 +13,50 @@ from app.schemas.project import (
     ProjectDetailUpdate,
 )
 
-from app.models.media import Media
+from app.models.media import MEDIA_URL_COLUMNS
+
+
+def _card_options():
+    return (
+        selectinload(Project.technologies),
+        selectinload(Project.features),
+        selectinload(Project.tags),
+        selectinload(Project.gallery_medias).load_only(*MEDIA_URL_COLUMNS),
+        joinedload(Project.thumbnail_image).load_only(*MEDIA_URL_COLUMNS),
+    )
 
 
 class ProjectCRUD(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
     """Project-level helpers (publish filter, etc.)."""
 
-    async def list_published(self, db: AsyncSession, *, skip: int = 0, limit: int = 20):
-        stmt = (
-            select(self.model)
-            .options(
-                selectinload(Project.technologies),
-                selectinload(Project.features),
-                selectinload(Project.tags),
-                selectinload(Project.gallery_medias),
-                selectinload(Project.thumbnail_image),
-            )
-            .where(self.model.is_published.is_(True))
-            .offset(skip)
-            .limit(limit)
-            # .options(
-            #     joinedload(self.model.thumbnail_image).load_only(
-            #         Media.id, Media.secure_url
-            #     ),
-            # )
+    cache_namespaces = ("projects",)
+
+    loader_profiles = {
+        # ProjectRead
+        "card": _card_options,
+        # ProjectReadDetailed
+        "detail": lambda: (selectinload(Project.detail), *_card_options()),
+    }
+
+    async def list_published(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> tuple[Sequence[Project], Optional[str]]:
+        return await self.list_page(
+            db,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            where=(self.model.is_published.is_(True),),
+            profile="card",
         )
-        res = await db.execute(stmt)
-        return res.scalars().all()
 
     async def get_detailed(self, db: AsyncSession, obj_id: int):
-        forced = (
-            selectinload(Project.detail),
-            selectinload(Project.technologies),
-            selectinload(Project.features),
-            selectinload(Project.tags),
-            selectinload(Project.gallery_medias),
-            joinedload(self.model.thumbnail_image).load_only(
-                Media.id, Media.secure_url
-            ),
-        )
-        return await self.get(db, obj_id, forced)
+        return await self.get(db, obj_id, profile="detail")
 
 
 project_crud = ProjectCRUD(Project)
@@ -1,14 +1,39 @@
+from typing import Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
 from app.services.base import CRUDBase
 from app.models.section import Section
+from app.models.lesson import Lesson
 from app.schemas.section import SectionCreate, SectionUpdate
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from fastapi.exceptions import HTTPException
-from fastapi import status
 
 
 class SectionCrud(CRUDBase[Section, SectionCreate, SectionUpdate]):
-    pass
+    cache_namespaces = ("courses",)
+
+    loader_profiles = {
+        # SectionRead
+        "detail": lambda: (
+            selectinload(Section.lessons).defer(Lesson.content, raiseload=True),
+        ),
+    }
+
+    async def list_by_course(
+        self,
+        db: AsyncSession,
+        course_id: UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> tuple[Sequence[Section], Optional[str]]:
+        """Sections of one course in display order, served by uq_section_course_order."""
+        stmt = select(self.model).where(self.model.course_id == course_id)
+        return await self.paginate(
+            db, stmt, keys=(self.model.section_order,), cursor=cursor, limit=limit
+        )
 
 
 section_crud = SectionCrud(Section)
@@ -1,17 +1,65 @@
+from typing import Optional
+from uuid import UUID
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.services.base import CRUDBase
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdateByAdmin, UserUpdate
+from app.schemas.user import AuthUser, UserCreate, UserUpdateByAdmin, UserUpdate
+from app.utils.ttl_cache import TTLCache
 
 
 class UserCRUD(CRUDBase[User, UserCreate, UserUpdate | UserUpdateByAdmin]):
+    # course reads embed the instructor
+    cache_namespaces = ("courses",)
+    # AuthUser per user id for require_role; dropped on update/delete
+    _auth_cache: TTLCache[UUID, AuthUser] = TTLCache(
+        maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL
+    )
+
     async def get_by_username(self, db: AsyncSession, username: str) -> User | None:
         res = await db.execute(
             select(self.model).where(self.model.username == username)
         )
         return res.scalar_one_or_none()
 
+    async def get_auth_user(
+        self, db: AsyncSession, user_id: UUID
+    ) -> Optional[AuthUser]:
+        cached = self._auth_cache.get(user_id)
+        if cached is not None:
+            return cached
+        res = await db.execute(
+            select(User.id, User.username, User.email, User.full_name, User.role).where(
+                User.id == user_id
+            )
+        )
+        row = res.first()
+        if row is None:
+            return None
+        auth_user = AuthUser.model_validate(row)
+        self._auth_cache.set(user_id, auth_user)
+        return auth_user
+
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: User,
+        obj_in: UserUpdate | UserUpdateByAdmin,
+        *,
+        profile: Optional[str] = None,
+    ) -> User:
+        self._auth_cache.pop(db_obj.id)
+        return await super().update(db, db_obj, obj_in, profile=profile)
+
+    async def delete(self, db: AsyncSession, obj_id: int | UUID) -> None:
+        await super().delete(db, obj_id)
+        if isinstance(obj_id, UUID):
+            self._auth_cache.pop(obj_id)
+        else:
+            self._auth_cache.clear()
+
 
 user_crud = UserCRUD(User)
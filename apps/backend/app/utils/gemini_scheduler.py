@@ -0,0 +1,247 @@
+# app/utils/gemini_scheduler.py
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from fastapi import HTTPException, status
+from google.genai import errors as genai_errors
+
+from app.core.config import settings
+from app.core.errors import SafeAPIError, map_upstream_gemini_error
+from app.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """`capacity` units, refilled continuously at `per_minute` units a minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self._updated = monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def fill(self, now: float) -> float:
+        self._refill(now)
+        return self.level / self.capacity
+
+    def wait(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests above capacity wait for a full bucket)."""
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        # may go negative: a request that used more than it reserved is
+        # paid back from future refills
+        self.level -= amount
+
+
+class _KeyState:
+    def __init__(self, key: str, rpm: int, tpm: int):
+        self.key = key
+        self.fingerprint = hashlib.sha256(key.encode()).hexdigest()[:12]
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+
+    def wait(self, cost: int, now: float) -> float:
+        return max(
+            self.cooldown_until - now,
+            self.requests.wait(1, now),
+            self.tokens.wait(cost, now),
+        )
+
+    def headroom(self, now: float) -> float:
+        return min(self.requests.fill(now), self.tokens.fill(now))
+
+
+def is_rate_limit(e: BaseException) -> bool:
+    if isinstance(e, genai_errors.APIError):
+        return e.code == 429 or e.status == "RESOURCE_EXHAUSTED"
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429
+    if isinstance(e, SafeAPIError):
+        return e.detail.get("error_code") == "EXTERNAL_RATE_LIMIT"
+    return False
+
+
+def _retry_delay(e: BaseException) -> Optional[float]:
+    """The RetryInfo delay Gemini sends with a 429 ("retryDelay": "17s")."""
+    details = getattr(e, "details", None) or {}
+    if isinstance(details, dict):
+        details = (details.get("error") or {}).get("details") or []
+    for item in details if isinstance(details, list) else []:
+        if isinstance(item, dict) and item.get("@type", "").endswith("RetryInfo"):
+            match = re.fullmatch(r"([\d.]+)s", str(item.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+class GeminiScheduler:
+    """
+    Routes Gemini calls across a pool of API keys (GEMINI_API_KEYS plus
+    GEMINI_API_KEY).
+
+    Each key has two token buckets, requests per minute and tokens per
+    minute. `run` reserves one request and the call's estimated tokens on
+    the key that can start soonest, preferring the one with the most
+    headroom, and corrects the token charge to the real usage afterwards. A
+    429 puts that key in cooldown (Gemini's RetryInfo delay, else jittered
+    exponential backoff) and the call is retried on another key, up to
+    `max_attempts` calls in all. A caller-supplied key bypasses the pool but
+    gets the same limits and retries on that key alone.
+    """
+
+    def __init__(
+        self,
+        keys: list[str],
+        *,
+        rpm: int,
+        tpm: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        max_wait_seconds: float,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._pool = [_KeyState(key, rpm, tpm) for key in dict.fromkeys(keys) if key]
+        self._by_key = {state.key: state for state in self._pool}
+        self._adhoc: TTLCache[str, _KeyState] = TTLCache(
+            maxsize=128, ttl=3600, sliding=True
+        )
+        self._lock = asyncio.Lock()
+
+    @property
+    def keys(self) -> list[str]:
+        return [state.key for state in self._pool]
+
+    def _state(self, key: str) -> _KeyState:
+        return self._by_key.get(key) or self._adhoc.get_or_create(
+            key, lambda: _KeyState(key, self.rpm, self.tpm)
+        )
+
+    async def _acquire(
+        self, states: list[_KeyState], cost: int, exclude: set[_KeyState]
+    ) -> _KeyState:
+        deadline = monotonic() + self.max_wait_seconds
+        while True:
+            async with self._lock:
+                now = monotonic()
+                candidates = [s for s in states if s not in exclude] or states
+                state = min(
+                    candidates, key=lambda s: (s.wait(cost, now), -s.headroom(now))
+                )
+                wait = state.wait(cost, now)
+                if wait <= 0:
+                    state.requests.take(1)
+                    state.tokens.take(cost)
+                    return state
+            if now + wait > deadline:
+                raise map_upstream_gemini_error(
+                    {
+                        "details": {
+                            "error": {
+                                "message": "rate limit: every Gemini key is at its "
+                                "RPM/TPM limit"
+                            }
+                        }
+                    }
+                )
+            await asyncio.sleep(wait)
+
+    def _cool_down(self, state: _KeyState, e: BaseException, attempt: int) -> None:
+        delay = _retry_delay(e)
+        if delay is None:
+            delay = self.backoff_seconds * 2 ** (attempt - 1)
+        state.cooldown_until = monotonic() + delay * random.uniform(1.0, 1.5)
+        log.warning(
+            "Gemini key %s rate limited; cooling down for %.1fs",
+            state.fingerprint,
+            delay,
+        )
+
+    def settle(self, key: str, reserved: int, used: Optional[int]) -> None:
+        """Charge the difference between a call's reserved and real token usage."""
+        if used is not None:
+            self._state(key).tokens.take(used - reserved)
+
+    async def run(
+        self,
+        call: Callable[[str], Awaitable[T]],
+        *,
+        cost: int,
+        key: Optional[str] = None,
+        used_tokens: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        `await call(key)` on the best key for a request of `cost` tokens,
+        retrying rate-limited attempts on other keys.
+        """
+        states = [self._state(key)] if key else self._pool
+        if not states:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No Gemini API key given and none configured.",
+            )
+        tried: set[_KeyState] = set()
+        for attempt in range(1, self.max_attempts + 1):
+            state = await self._acquire(states, cost, tried)
+            try:
+                result = await call(state.key)
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.max_attempts:
+                    raise
+                self._cool_down(state, e, attempt)
+                tried.add(state)
+                if len(tried) >= len(states):
+                    tried.clear()
+                # spread retries of concurrent calls that hit the same limit
+                await asyncio.sleep(random.uniform(0, self.backoff_seconds))
+                continue
+            if used_tokens is not None:
+                self.settle(state.key, cost, used_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Per pool key: bucket levels and remaining cooldown (keys shown by fingerprint)."""
+        now = monotonic()
+        return [
+            {
+                "key": state.fingerprint,
+                "requests_available": round(
+                    state.requests.fill(now) * state.requests.capacity, 1
+                ),
+                "tokens_available": round(
+                    state.tokens.fill(now) * state.tokens.capacity
+                ),
+                "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 1),
+            }
+            for state in self._pool
+        ]
+
+
+gemini_scheduler = GeminiScheduler(
+    [*settings.GEMINI_API_KEYS, settings.GEMINI_API_KEY or ""],
+    rpm=settings.GEMINI_KEY_RPM,
+    tpm=settings.GEMINI_KEY_TPM,
+    max_attempts=settings.GEMINI_SCHEDULER_MAX_ATTEMPTS,
+    backoff_seconds=settings.GEMINI_SCHEDULER_BACKOFF_SECONDS,
+    max_wait_seconds=settings.GEMINI_SCHEDULER_MAX_WAIT_SECONDS,
+)
@@ -1,111 +1,197 @@
 # app/utils/gemini_service.py
 from google import genai
 from google.genai import types
-import asyncio
-import time
-import threading
+import hashlib
 import json
+from typing import AsyncIterator, Optional
 
+from app.core.config import settings
+from app.utils.gemini_scheduler import gemini_scheduler
+from app.utils.token_estimator import token_estimator
+from app.utils.ttl_cache import TTLCache
 
-class _ClientCache:
-    def __init__(self, maxsize: int = 128, ttl_seconds: int = 3600):
-        self._maxsize = maxsize
-        self._ttl = ttl_seconds
-        self._lock = threading.Lock()
-        self._data = {}
-        self._order = []
-
-    def _evict_expired(self, now: float):
-        expired = [k for k, (_, ts) in self._data.items() if now - ts > self._ttl]
-        for k in expired:
-            self._data.pop(k, None)
-            try:
-                self._order.remove(k)
-            except ValueError:
-                pass
-
-    def _evict_lru_if_needed(self):
-        while len(self._data) > self._maxsize:
-            k = self._order.pop(0)
-            self._data.pop(k, None)
-
-    def get(self, key: tuple[str, str]):
-        now = time.time()
-        with self._lock:
-            self._evict_expired(now)
-            item = self._data.get(key)
-            if not item:
-                return None
-            client, _ = item
-            try:
-                self._order.remove(key)
-            except ValueError:
-                pass
-            self._order.append(key)
-            self._data[key] = (client, now)
-            return client
-
-    def set(self, key: tuple[str, str], client):
-        now = time.time()
-        with self._lock:
-            if key in self._data:
-                try:
-                    self._order.remove(key)
-                except ValueError:
-                    pass
-            self._data[key] = (client, now)
-            self._order.append(key)
-            self._evict_lru_if_needed()
-
-
-_client_cache = _ClientCache(maxsize=128, ttl_seconds=1800)
+THINKING_BUDGET = 3500
+# an estimate within this fraction of a model limit is checked remotely
+LIMIT_MARGIN = 0.9
+
+
+# clients per (key, model); sliding expiry keeps busy keys' connections warm
+_client_cache: TTLCache[tuple[str, str], genai.Client] = TTLCache(
+    maxsize=128, ttl=1800, sliding=True
+)
 
 
 def _get_client(gemini_key: str, gemini_model: str) -> genai.Client:
-    cache_key = (gemini_key, gemini_model)
-    client = _client_cache.get(cache_key)
-    if client is not None:
-        return client
-    client = genai.Client(api_key=gemini_key)
-    _client_cache.set(cache_key, client)
-    return client
+    return _client_cache.get_or_create(
+        (gemini_key, gemini_model), lambda: genai.Client(api_key=gemini_key)
+    )
+
+
+# prompt token counts, keyed by (model, sha256(prompt)); course prompts are
+# rebuilt per request but rarely change between generations
+_token_counts: TTLCache[tuple[str, str], int] = TTLCache(
+    maxsize=settings.GEMINI_TOKEN_COUNT_CACHE_SIZE,
+    ttl=settings.GEMINI_TOKEN_COUNT_CACHE_TTL,
+)
+
+
+async def count_tokens(
+    client: genai.Client, gemini_model: str, prompt_text: str
+) -> int:
+    """Prompt size in tokens, counted by the API without blocking the loop."""
+
+    async def count() -> int:
+        resp = await client.aio.models.count_tokens(
+            model=gemini_model, contents=prompt_text
+        )
+        total = resp.total_tokens or 0
+        # an exact count calibrates the local estimate like usage_metadata does
+        token_estimator.observe(gemini_model, prompt_text, total)
+        return total
+
+    key = (gemini_model, hashlib.sha256(prompt_text.encode()).hexdigest())
+    return await _token_counts.get_or_load(key, count)
+
+
+def _near_limit(input_tokens: int, max_tokens: int) -> bool:
+    return (
+        input_tokens >= settings.GEMINI_INPUT_TOKEN_LIMIT * LIMIT_MARGIN
+        or max_tokens + THINKING_BUDGET + input_tokens
+        >= settings.GEMINI_MAX_OUTPUT_TOKENS * LIMIT_MARGIN
+    )
+
+
+async def input_tokens(
+    client: genai.Client, gemini_model: str, prompt_text: str, max_tokens: int
+) -> tuple[int, bool]:
+    """
+    Prompt tokens for sizing `max_output_tokens`, and whether they were
+    estimated. The calibrated local estimate (rounded up by its expected
+    error) is used when its error is within GEMINI_TOKEN_ESTIMATE_TOLERANCE
+    and it is not close to a model limit; otherwise count_tokens is called.
+    """
+    estimate = token_estimator.estimate(gemini_model, prompt_text)
+    if token_estimator.trusted(
+        estimate, settings.GEMINI_TOKEN_ESTIMATE_TOLERANCE
+    ) and not _near_limit(estimate.upper, max_tokens):
+        return estimate.upper, True
+    return await count_tokens(client, gemini_model, prompt_text), False
+
+
+def generation_key(prompt_text: str, gemini_model: str, max_tokens: int) -> str:
+    """
+    Content address of a generation: sha256 over the final prompt, the model
+    and the config it is sent with. The output budget's input-token share is
+    left out since it follows from the prompt.
+    """
+    config = _generate_config(max_tokens, 0).model_dump_json(exclude_none=True)
+    digest = hashlib.sha256()
+    for part in (gemini_model, config, prompt_text):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _generate_config(max_tokens: int, input_tokens: int) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        response_mime_type="text/plain",
+        max_output_tokens=max_tokens + THINKING_BUDGET + input_tokens,
+    )
+
+
+def _reserve(gemini_model: str, prompt_text: str, max_tokens: int) -> int:
+    """Tokens a generation is expected to use, reserved against the key's TPM."""
+    return token_estimator.estimate(gemini_model, prompt_text).upper + max_tokens
 
 
 async def call_gemini(
     prompt_text: str,
     max_tokens: int,
     gemini_model: str,
-    gemini_key: str,
+    gemini_key: Optional[str] = None,
 ):
-    THINKING_BUDGET = 3500
-
-    output = {}
-    client = _get_client(gemini_key, gemini_model)
-    count = client.models.count_tokens(model=gemini_model, contents=prompt_text)
-    output["input_tokens"] = count.total_tokens
-    cfg = types.GenerateContentConfig(
-        response_mime_type="text/plain",
-        max_output_tokens=max_tokens + THINKING_BUDGET + (count.total_tokens or 0),
-    )
-
-    if hasattr(client, "aio") and hasattr(client.aio, "models"):
+    """
+    One generation, routed by `gemini_scheduler`: on `gemini_key` when given,
+    else on the pool key with the most headroom, retrying rate limits on
+    other keys.
+    """
+
+    async def generate(key: str) -> dict:
+        output = {}
+        client = _get_client(key, gemini_model)
+        output["input_tokens"], output["input_tokens_estimated"] = await input_tokens(
+            client, gemini_model, prompt_text, max_tokens
+        )
         resp = await client.aio.models.generate_content(
-            model=gemini_model, contents=prompt_text, config=cfg
+            model=gemini_model,
+            contents=prompt_text,
+            config=_generate_config(max_tokens, output["input_tokens"]),
         )
+        if resp.usage_metadata:
+            token_estimator.observe(
+                gemini_model, prompt_text, resp.usage_metadata.prompt_token_count
+            )
         output["usage_metadata"] = resp.usage_metadata
         output["text"] = (resp.text or "").strip()
         return output
 
-    resp = await asyncio.to_thread(
-        client.models.generate_content,
-        model=gemini_model,
-        contents=prompt_text,
-        config=cfg,
+    return await gemini_scheduler.run(
+        generate,
+        cost=_reserve(gemini_model, prompt_text, max_tokens),
+        key=gemini_key,
+        used_tokens=lambda out: (
+            out["usage_metadata"].total_token_count if out["usage_metadata"] else None
+        ),
     )
 
-    output["usage_metadata"] = resp.usage_metadata
-    output["text"] = (resp.text or "").strip()
-    return output
+
+async def stream_gemini(
+    prompt_text: str,
+    max_tokens: int,
+    gemini_model: str,
+    gemini_key: Optional[str] = None,
+) -> AsyncIterator[tuple[str, Optional[types.GenerateContentResponseUsageMetadata]]]:
+    """
+    Generate with `generate_content_stream`, yielding (text, usage_metadata)
+    per chunk as it arrives. Usage is cumulative; the last chunk carries the
+    totals. Keys are chosen as in `call_gemini`. The stream is lazy, so a
+    rate limit only shows on its first chunk: that chunk is read while
+    opening, where it can still be retried on another key. Later failures
+    are not retried; the key is charged for the usage seen so far.
+    """
+    reserved = _reserve(gemini_model, prompt_text, max_tokens)
+
+    async def open_stream(key: str):
+        client = _get_client(key, gemini_model)
+        prompt_tokens, _ = await input_tokens(
+            client, gemini_model, prompt_text, max_tokens
+        )
+        stream = await client.aio.models.generate_content_stream(
+            model=gemini_model,
+            contents=prompt_text,
+            config=_generate_config(max_tokens, prompt_tokens),
+        )
+        first = await anext(stream, None)
+        return key, stream, first
+
+    key, stream, first = await gemini_scheduler.run(
+        open_stream, cost=reserved, key=gemini_key
+    )
+    usage = None
+    try:
+        if first is None:
+            return
+        usage = first.usage_metadata
+        yield first.text or "", first.usage_metadata
+        async for chunk in stream:
+            usage = chunk.usage_metadata or usage
+            yield chunk.text or "", chunk.usage_metadata
+        if usage:
+            token_estimator.observe(gemini_model, prompt_text, usage.prompt_token_count)
+    finally:
+        gemini_scheduler.settle(
+            key, reserved, usage.total_token_count if usage else None
+        )
 
 
 def extract_output_as_json(api_output_string):
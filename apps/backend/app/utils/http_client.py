@@ -1,41 +1,305 @@
 # http_client.py
-import json
-import requests
+import asyncio
+import importlib.util
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
 import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+# methods safe to repeat once the request may have reached the server
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """
+    Timeouts and retries for one upstream host. Transport errors before the
+    request is sent (connect errors/timeouts) are retried for any method;
+    `retry_statuses` and read errors only for idempotent methods.
+    """
+
+    timeout: float = settings.HTTP_TIMEOUT_SECONDS
+    connect_timeout: float = settings.HTTP_CONNECT_TIMEOUT_SECONDS
+    retries: int = settings.HTTP_RETRIES
+    backoff: float = settings.HTTP_RETRY_BACKOFF_SECONDS
+    retry_statuses: frozenset[int] = field(
+        default_factory=lambda: frozenset({429, 502, 503, 504})
+    )
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+
+    @property
+    def httpx_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+DEFAULT_POLICY = HostPolicy()
+HOST_POLICIES: dict[str, HostPolicy] = {
+    # generation calls are slow; a retry would double the bill
+    "generativelanguage.googleapis.com": HostPolicy(timeout=180, retries=1),
+    "api.cloudinary.com": HostPolicy(timeout=60),
+    **{
+        host: replace(DEFAULT_POLICY, **overrides)
+        for host, overrides in settings.HTTP_HOST_POLICIES.items()
+    },
+}
+
+
+def policy_for(url: str) -> HostPolicy:
+    return HOST_POLICIES.get(urlsplit(url).hostname or "", DEFAULT_POLICY)
+
+
+@dataclass
+class _Counters:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    def begin(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self) -> None:
+        self.in_flight -= 1
+
+
+class HttpClients:
+    """
+    Process-wide pooled HTTP clients: one `httpx.AsyncClient` (HTTP/2 when
+    `h2` is installed) and one `requests.Session` for sync code, opened in the
+    app lifespan so outbound calls reuse keep-alive connections instead of
+    paying TCP+TLS per call. Both are also created lazily on first use, for
+    scripts that run without the lifespan.
+    """
+
+    def __init__(self) -> None:
+        self._async: Optional[httpx.AsyncClient] = None
+        self._sync: Optional[requests.Session] = None
+        self._sync_lock = threading.Lock()
+        self._async_counters = _Counters()
+        self._sync_counters = _Counters()
+
+    @staticmethod
+    def _http2() -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            log.warning("HTTP2_ENABLED but the h2 package is missing; using HTTP/1.1")
+            return False
+        return True
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async is None or self._async.is_closed:
+            self._async = httpx.AsyncClient(
+                http2=self._http2(),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=DEFAULT_POLICY.httpx_timeout,
+            )
+        return self._async
 
+    @property
+    def sync_session(self) -> requests.Session:
+        with self._sync_lock:
+            if self._sync is None:
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    pool_maxsize=settings.HTTP_MAX_CONNECTIONS,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sync = session
+            return self._sync
 
-def http_get_json(url: str, timeout: int = 30):
-    resp = requests.get(url, timeout=timeout)
+    def start(self) -> None:
+        self.async_client
+        self.sync_session
+
+    async def close(self) -> None:
+        if self._async is not None:
+            await self._async.aclose()
+            self._async = None
+        with self._sync_lock:
+            if self._sync is not None:
+                self._sync.close()
+                self._sync = None
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """`AsyncClient.request` with the host's timeout and retry policy."""
+        policy = policy_for(url)
+        method = method.upper()
+        kwargs.setdefault("timeout", policy.httpx_timeout)
+        counters = self._async_counters
+        attempt = 0
+        while True:
+            counters.begin()
+            try:
+                resp = await self.async_client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                resp = None
+                if attempt >= policy.retries:
+                    counters.errors += 1
+                    raise
+            except httpx.TransportError:
+                resp = None
+                if method not in IDEMPOTENT or attempt >= policy.retries:
+                    counters.errors += 1
+                    raise
+            else:
+                retry = (
+                    method in IDEMPOTENT and resp.status_code in policy.retry_statuses
+                )
+                if not retry or attempt >= policy.retries:
+                    return resp
+                await resp.aclose()
+            finally:
+                counters.end()
+            counters.retries += 1
+            retry_after = resp.headers.get("retry-after") if resp is not None else None
+            await asyncio.sleep(policy.delay(attempt, retry_after))
+            attempt += 1
+
+    def request_sync(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """`Session.request` with the host's timeout and retry policy."""
+        policy = policy_for(url)
+        method = method.upper()
+        kwargs.setdefault("timeout", (policy.connect_timeout, policy.timeout))
+        counters = self._sync_counters
+        attempt = 0
+        while True:
+            counters.begin()
+            try:
+                resp = self.sync_session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectTimeout:
+                resp = None
+                if attempt >= policy.retries:
+                    counters.errors += 1
+                    raise
+            except requests.exceptions.ConnectionError:
+                resp = None
+                if method not in IDEMPOTENT or attempt >= policy.retries:
+                    counters.errors += 1
+                    raise
+            else:
+                retry = (
+                    method in IDEMPOTENT and resp.status_code in policy.retry_statuses
+                )
+                if not retry or attempt >= policy.retries:
+                    return resp
+                resp.close()
+            finally:
+                counters.end()
+            counters.retries += 1
+            retry_after = resp.headers.get("retry-after") if resp is not None else None
+            time.sleep(policy.delay(attempt, retry_after))
+            attempt += 1
+
+    def _async_pool(self) -> dict[str, Any]:
+        # httpcore's pool is not public httpx API; report what is there
+        pool = getattr(getattr(self._async, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "open": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "http2": sum(1 for c in connections if "HTTP/2" in repr(c)),
+            "max": settings.HTTP_MAX_CONNECTIONS,
+        }
+
+    def _sync_pool(self) -> dict[str, Any]:
+        pools = []
+        for adapter in set((self._sync.adapters if self._sync else {}).values()):
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools.append(
+                    {
+                        "host": pool.host,
+                        "opened": pool.num_connections,
+                        # the queue is pre-filled with None placeholders
+                        "idle": (
+                            sum(c is not None for c in list(pool.pool.queue))
+                            if pool.pool
+                            else 0
+                        ),
+                        "requests": pool.num_requests,
+                    }
+                )
+        return {"hosts": pools, "max_per_host": settings.HTTP_MAX_CONNECTIONS}
+
+    def metrics(self) -> dict[str, Any]:
+        """Request/retry counters plus connection pool utilisation."""
+        return {
+            "async": {**vars(self._async_counters), "pool": self._async_pool()},
+            "sync": {**vars(self._sync_counters), "pool": self._sync_pool()},
+        }
+
+
+http_clients = HttpClients()
+
+
+def _log_error_response(status_code: int, body: Any) -> None:
+    log.warning("Upstream returned %s: %s", status_code, body)
+
+
+def _error_body(resp: requests.Response | httpx.Response) -> Any:
+    try:
+        return resp.json()
+    except Exception:
+        return resp.text[:500]
+
+
+def http_get_json(url: str, timeout: Optional[int] = None):
+    kwargs = {} if timeout is None else {"timeout": timeout}
+    resp = http_clients.request_sync("GET", url, **kwargs)
     resp.raise_for_status()
     return resp.json()
 
 
-def http_post_json(url: str, payload: dict, timeout: int = 60):
-    headers = {"Content-Type": "application/json"}
-    resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
+def http_post_json(url: str, payload: dict, timeout: Optional[int] = None):
+    kwargs = {} if timeout is None else {"timeout": timeout}
+    resp = http_clients.request_sync("POST", url, json=payload, **kwargs)
     try:
         resp.raise_for_status()
-    except requests.HTTPError as ex:
-        print("Status code:", resp.status_code)
-        try:
-            print("Response:", json.dumps(resp.json(), indent=2))
-        except Exception:
-            print("Response text:", resp.text[:500])
+    except requests.HTTPError:
+        _log_error_response(resp.status_code, _error_body(resp))
         raise
     return resp.json()
 
 
-async def http_post_json_async(url: str, payload: dict, timeout: int = 60):
-    headers = {"Content-Type": "application/json"}
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as ex:
-            print("status code: ", resp.status_code)
-            try:
-                print("Response: ", json.dumps(resp.json(), indent=2))
-            except Exception:
-                print(print("Response text:", resp.text[:500]))
-            raise
-        return resp.json()
+async def http_post_json_async(url: str, payload: dict, timeout: Optional[int] = None):
+    kwargs = {} if timeout is None else {"timeout": timeout}
+    resp = await http_clients.request("POST", url, json=payload, **kwargs)
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError:
+        _log_error_response(resp.status_code, _error_body(resp))
+        raise
+    return resp.json()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Optional
+
+import cloudinary.utils
+
+from app.core.config import settings
+
+
+class ImagePreset(str, Enum):
+    thumb = "thumb"  # square crop, 96/192w
+    card = "card"  # 320-960w
+    hero = "hero"  # 640-1920w
+
+
+@dataclass(frozen=True)
+class PresetSpec:
+    widths: tuple[int, ...]
+    # width of the plain `src` fallback
+    default: int
+    sizes: str
+    crop: str = "limit"  # never upscale
+    gravity: Optional[str] = None
+    aspect_ratio: Optional[str] = None
+
+
+PRESETS: dict[ImagePreset, PresetSpec] = {
+    ImagePreset.thumb: PresetSpec(
+        widths=(96, 192),
+        default=96,
+        sizes="96px",
+        crop="fill",
+        gravity="auto",
+        aspect_ratio="1:1",
+    ),
+    ImagePreset.card: PresetSpec(
+        widths=(320, 480, 640, 960),
+        default=480,
+        sizes="(max-width: 640px) 100vw, 480px",
+    ),
+    ImagePreset.hero: PresetSpec(
+        widths=(640, 960, 1280, 1920),
+        default=1280,
+        sizes="100vw",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class DerivedUrls:
+    src: str
+    srcset: str
+    sizes: str
+
+
+# preset chosen for the current request (see api.deps.image_preset)
+_current_preset: ContextVar[Optional[ImagePreset]] = ContextVar(
+    "image_preset", default=None
+)
+
+
+def use_image_preset(preset: Optional[ImagePreset]) -> None:
+    _current_preset.set(preset)
+
+
+def current_image_preset() -> Optional[ImagePreset]:
+    return _current_preset.get()
+
+
+def _url(
+    public_id: str,
+    version: Optional[int],
+    resource_type: str,
+    spec: PresetSpec,
+    width: int,
+) -> str:
+    options = {
+        "resource_type": resource_type,
+        "version": version,
+        "secure": True,
+        "transformation": [
+            {
+                "crop": spec.crop,
+                "gravity": spec.gravity,
+                "aspect_ratio": spec.aspect_ratio,
+                "width": width,
+            },
+            {"fetch_format": "auto", "quality": "auto"},
+        ],
+    }
+    if resource_type == "video":
+        # a poster frame, not the video itself
+        options["format"] = "jpg"
+    url, _ = cloudinary.utils.cloudinary_url(public_id, **options)
+    return url
+
+
+@lru_cache(maxsize=settings.MEDIA_URL_CACHE_SIZE)
+def derived_urls(
+    public_id: str,
+    version: Optional[int],
+    resource_type: str,
+    preset: ImagePreset,
+) -> DerivedUrls:
+    """
+    Cloudinary delivery URLs for `preset`: a `src` fallback plus a width-
+    bucketed `srcset` with f_auto/q_auto. Built locally from the asset's
+    identity (no API call) and memoized; a new version is a new key.
+    """
+    spec = PRESETS[preset]
+    return DerivedUrls(
+        src=_url(public_id, version, resource_type, spec, spec.default),
+        srcset=", ".join(
+            f"{_url(public_id, version, resource_type, spec, w)} {w}w"
+            for w in spec.widths
+        ),
+        sizes=spec.sizes,
+    )
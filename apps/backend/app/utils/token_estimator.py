@@ -0,0 +1,94 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+# words, numbers and single punctuation marks: Gemini's SentencePiece
+# vocabulary splits prose at roughly these boundaries and code/markdown
+# into many one-character pieces
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# EWMA weight of a new observation
+ALPHA = 0.2
+
+
+@dataclass
+class TokenEstimate:
+    tokens: int
+    # expected relative error of `tokens`, from calibration
+    error: float
+    samples: int
+
+    @property
+    def upper(self) -> int:
+        return math.ceil(self.tokens * (1 + self.error))
+
+
+@dataclass
+class _Calibration:
+    ratio: float = 1.0
+    error: float = 1.0
+    samples: int = 0
+
+
+def _raw(text: str) -> float:
+    """Uncalibrated guess: about four characters a token, more for symbol-heavy text."""
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return max(len(_PIECES.findall(text)) * 1.1, len(text) / 4) + non_ascii * 0.5
+
+
+class TokenEstimator:
+    """
+    Local prompt token counts, calibrated per model.
+
+    Every real count (`usage_metadata.prompt_token_count` or a remote
+    count_tokens) is fed to `observe`, which updates a per-model
+    tokens/estimate ratio and the relative error the calibrated estimate had
+    (both exponentially weighted). Callers trust `estimate` only once the
+    model has `min_samples` observations and its error is within their
+    tolerance. Calibration lives in process memory and rebuilds after a
+    restart from the first few generations.
+    """
+
+    def __init__(self, min_samples: int):
+        self.min_samples = min_samples
+        self._models: dict[str, _Calibration] = {}
+
+    def estimate(self, model: str, text: str) -> TokenEstimate:
+        cal = self._models.get(model) or _Calibration()
+        return TokenEstimate(
+            tokens=max(1, round(_raw(text) * cal.ratio)),
+            error=cal.error,
+            samples=cal.samples,
+        )
+
+    def trusted(self, estimate: TokenEstimate, tolerance: float) -> bool:
+        return estimate.samples >= self.min_samples and estimate.error <= tolerance
+
+    def observe(self, model: str, text: str, actual: Optional[int]) -> None:
+        if not actual:
+            return
+        raw = _raw(text) or 1.0
+        cal = self._models.setdefault(model, _Calibration())
+        if cal.samples == 0:
+            cal.ratio = actual / raw
+            cal.error = 1.0
+        else:
+            miss = abs(raw * cal.ratio - actual) / actual
+            # the first calibrated miss replaces the 100% placeholder
+            cal.error = (
+                miss if cal.samples == 1 else (1 - ALPHA) * cal.error + ALPHA * miss
+            )
+            cal.ratio = (1 - ALPHA) * cal.ratio + ALPHA * (actual / raw)
+        cal.samples += 1
+
+    def calibration(self) -> dict[str, dict]:
+        return {
+            model: {"ratio": cal.ratio, "error": cal.error, "samples": cal.samples}
+            for model, cal in self._models.items()
+        }
+
+
+token_estimator = TokenEstimator(min_samples=settings.GEMINI_TOKEN_ESTIMATE_MIN_SAMPLES)
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Small in-process cache with per-entry expiry and LRU eviction.
+
+    Entries expire `ttl` seconds after they are set (or after the ttl passed to
+    `set`, whichever the caller chooses); with `sliding=True` every hit pushes
+    the expiry out again. Once `maxsize` is reached the least recently used
+    entry is dropped. Every operation is O(1): recency is the OrderedDict
+    order and expiry is checked lazily on the entry being read, never by
+    scanning. A plain lock keeps it safe for worker threads; it is never held
+    across an await.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, *, sliding: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[K, asyncio.Future] = {}
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def get(self, key: K) -> Optional[V]:
+        now = monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            if self.sliding:
+                self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """The cached value, or `factory()` stored under `key`."""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    async def get_or_load(
+        self, key: K, loader: Callable[[], Awaitable[V]], ttl: Optional[float] = None
+    ) -> V:
+        """
+        The cached value, or the result of `await loader()` stored under `key`.
+        Concurrent misses for the same key share one load; a failed load is
+        not cached and its error reaches every waiter. If the caller running
+        the load is cancelled, the waiters start the load again themselves.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            pending = self._loading.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or (task is not None and task.cancelling()):
+                    # this waiter was cancelled, not (only) the load
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # retrieved here so an unshared failure does not log a warning
+            future.exception()
+            raise
+        else:
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
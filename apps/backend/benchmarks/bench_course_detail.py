@@ -0,0 +1,125 @@
+"""
+GET /courses/{id} build time: ORM + pydantic vs. the json_agg path.
+
+Seeds a throwaway instructor and one course per size (lessons split into
+sections of 10), times `getDetailed` + `CourseRead` serialization against
+`get_detailed_json`, then deletes the seed data. Needs DATABASE_URL pointing
+at a migrated Postgres.
+
+    python -m benchmarks.bench_course_detail [--sizes 10 100 1000] [--runs 30]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from pydantic import TypeAdapter
+from sqlalchemy import delete
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.section import Section
+from app.models.user import User
+from app.schemas.course import CourseRead
+from app.services import course_crud
+
+LESSONS_PER_SECTION = 10
+
+course_read = TypeAdapter(CourseRead)
+
+
+async def _seed(instructor_id: uuid.UUID, lessons: int) -> uuid.UUID:
+    async with AsyncSessionLocal() as db:
+        course = Course(
+            title=f"bench {lessons} lessons",
+            description="benchmark seed",
+            instructor_id=instructor_id,
+            is_published=True,
+        )
+        db.add(course)
+        await db.flush()
+        for s in range(0, lessons, LESSONS_PER_SECTION):
+            section = Section(
+                course_id=course.id,
+                title=f"section {s // LESSONS_PER_SECTION + 1}",
+                section_order=s // LESSONS_PER_SECTION + 1,
+            )
+            db.add(section)
+            await db.flush()
+            db.add_all(
+                Lesson(
+                    section_id=section.id,
+                    title=f"lesson {i + 1}",
+                    content="x" * 2000,
+                    lesson_order=i + 1,
+                )
+                for i in range(min(LESSONS_PER_SECTION, lessons - s))
+            )
+        await db.commit()
+        return course.id
+
+
+async def _orm(course_id: uuid.UUID) -> bytes:
+    async with AsyncSessionLocal() as db:
+        course = await course_crud.getDetailed(db, course_id)
+        return course_read.dump_json(course_read.validate_python(course))
+
+
+async def _json_agg(course_id: uuid.UUID) -> bytes:
+    async with AsyncSessionLocal() as db:
+        body, _ = await course_crud.get_detailed_json(db, course_id)
+        return body
+
+
+async def _time(fn, course_id: uuid.UUID, runs: int) -> tuple[float, float, int]:
+    await fn(course_id)  # warm up connection and statement caches
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = await fn(course_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], len(body)
+
+
+async def main(sizes: list[int], runs: int) -> None:
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        instructor = User(
+            username=f"bench-{tag}",
+            email=f"bench-{tag}@example.com",
+            full_name="Bench Instructor",
+            password="!",
+        )
+        db.add(instructor)
+        await db.commit()
+        instructor_id = instructor.id
+
+    try:
+        for lessons in sizes:
+            course_id = await _seed(instructor_id, lessons)
+            for name, fn in (("orm", _orm), ("json_agg", _json_agg)):
+                p50, p95, size = await _time(fn, course_id, runs)
+                print(
+                    f"{lessons:>5} lessons  {name:<9} p50={p50:8.2f}ms  p95={p95:8.2f}ms"
+                    f"  body={size} bytes"
+                )
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(Course).where(Course.instructor_id == instructor_id)
+            )
+            await db.execute(delete(User).where(User.id == instructor_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs))
@@ -0,0 +1,70 @@
+"""
+Event-loop latency of unrelated requests during a login burst.
+
+A "ping" task stands in for any other endpoint: it wakes every 5 ms and
+records how late it was scheduled. Meanwhile a burst of bcrypt verifications
+runs either inline (the old behaviour) or through `password_hasher`.
+
+    python -m benchmarks.bench_password_hashing [--logins 40]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import get_password_hash, verify_password, password_hasher
+
+TICK = 0.005
+
+
+async def _ping(samples: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append((time.perf_counter() - start - TICK) * 1000)
+
+
+async def _inline_login(plain: str, hashed: str) -> bool:
+    return verify_password(plain, hashed)
+
+
+async def _pooled_login(plain: str, hashed: str) -> bool:
+    return await password_hasher.verify(plain, hashed)
+
+
+async def _burst(login, logins: int, hashed: str) -> tuple[float, list[float]]:
+    samples: list[float] = []
+    stop = asyncio.Event()
+    pinger = asyncio.create_task(_ping(samples, stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login("benchmark-password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await pinger
+    return elapsed, samples
+
+
+def _report(name: str, elapsed: float, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{name:<8} burst={elapsed:6.2f}s  ping p50={statistics.median(samples):7.1f}ms"
+        f"  p99={p99:7.1f}ms  max={samples[-1]:7.1f}ms"
+    )
+
+
+async def main(logins: int) -> None:
+    hashed = get_password_hash("benchmark-password")
+    _report("inline", *await _burst(_inline_login, logins, hashed))
+    _report("pooled", *await _burst(_pooled_login, logins, hashed))
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=20)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,109 @@
+"""
+get/set cost of `TTLCache` against the list-ordered cache it replaced in
+gemini_service (`list.remove` on every hit, a full expiry scan on every get).
+
+Fills each cache with `--entries` keys, then times a warm read pass (random
+hits), an overwrite pass, and a churn pass past `maxsize` that forces LRU
+evictions. Reports microseconds per operation.
+
+    python -m benchmarks.bench_ttl_cache [--entries 10000] [--ops 20000]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from app.utils.ttl_cache import TTLCache
+
+
+class ListOrderedCache:
+    """The former `gemini_service._ClientCache`, kept here as the baseline."""
+
+    def __init__(self, maxsize: int, ttl_seconds: int):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._data = {}
+        self._order = []
+
+    def _evict_expired(self, now: float):
+        expired = [k for k, (_, ts) in self._data.items() if now - ts > self._ttl]
+        for k in expired:
+            self._data.pop(k, None)
+            try:
+                self._order.remove(k)
+            except ValueError:
+                pass
+
+    def _evict_lru_if_needed(self):
+        while len(self._data) > self._maxsize:
+            k = self._order.pop(0)
+            self._data.pop(k, None)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            item = self._data.get(key)
+            if not item:
+                return None
+            value, _ = item
+            try:
+                self._order.remove(key)
+            except ValueError:
+                pass
+            self._order.append(key)
+            self._data[key] = (value, now)
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            if key in self._data:
+                try:
+                    self._order.remove(key)
+                except ValueError:
+                    pass
+            self._data[key] = (value, now)
+            self._order.append(key)
+            self._evict_lru_if_needed()
+
+
+def _time(label: str, fn, keys: list) -> None:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed / len(keys) * 1e6:10.2f} us/op")
+
+
+def run(name: str, cache, entries: int, ops: int) -> None:
+    print(f"{name} ({entries} entries, {ops} ops)")
+    _time("fill", lambda k: cache.set(k, k), list(range(entries)))
+    rng = random.Random(0)
+    hits = [rng.randrange(entries) for _ in range(ops)]
+    _time("get", cache.get, hits)
+    _time("overwrite", lambda k: cache.set(k, k), hits)
+    _time("churn", lambda k: cache.set(k, k), list(range(entries, entries + ops)))
+    if isinstance(cache, TTLCache):
+        print(f"  {cache.stats()}")
+
+
+def main(entries: int, ops: int) -> None:
+    run("TTLCache", TTLCache(maxsize=entries, ttl=3600), entries, ops)
+    # every baseline get scans all entries, so keep its pass short
+    run(
+        "list-ordered",
+        ListOrderedCache(maxsize=entries, ttl_seconds=3600),
+        entries,
+        ops // 20,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.entries, args.ops)
@@ -0,0 +1,136 @@
+"""
+Shared fixtures.
+
+Database tests run against the Postgres in TEST_DATABASE_URL (an asyncpg URL,
+e.g. postgresql+asyncpg://postgres@localhost:5432/backend_test) and are
+skipped when it is unset. The schema is recreated from the models once per
+session, and every test starts from empty tables.
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# settings are read at import time
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["DATABASE_URL"] = (
+    TEST_DATABASE_URL or "postgresql+asyncpg://test@localhost/test"
+)
+os.environ["RESPONSE_CACHE_ENABLED"] = "true"
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.response_cache import InMemoryResponseCacheBackend, response_cache
+from app.db.base import BaseModel
+from app.api.deps import get_current_admin
+from app.db.session import get_async_session
+from app.main import app
+from app.models.user import User, UserRole
+
+
+async def _create_schema(url: str) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(BaseModel.metadata.create_all)
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def pg_url() -> str:
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    asyncio.run(_create_schema(TEST_DATABASE_URL))
+    return TEST_DATABASE_URL
+
+
+@pytest.fixture
+async def db_engine(pg_url: str):
+    engine = create_async_engine(pg_url, poolclass=NullPool)
+    yield engine
+    tables = ", ".join(f'"{name}"' for name in BaseModel.metadata.tables)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        db_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+    )
+
+
+@pytest.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def queries(db_engine) -> list[str]:
+    """Every statement the test engine sends, in order."""
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(db_engine.sync_engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture(autouse=True)
+def cache_backend() -> InMemoryResponseCacheBackend:
+    """A fresh in-memory response cache per test."""
+    backend = InMemoryResponseCacheBackend(maxsize=64, ttl=settings.RESPONSE_CACHE_TTL)
+    previous = response_cache.backend
+    response_cache.use_backend(backend)
+    yield backend
+    response_cache.use_backend(previous)
+
+
+@pytest.fixture
+async def client():
+    """The app over ASGI (no lifespan, so no background workers)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def db_client(session_factory, client):
+    """`client` with request sessions opened on the test database."""
+
+    async def _session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = _session
+    yield client
+
+
+@pytest.fixture
+def as_admin():
+    """Admin-only routes accept every request, as this (unsaved) user."""
+    admin = User(
+        id=uuid4(),
+        username="admin",
+        email="admin@example.com",
+        full_name="Admin",
+        role=UserRole.ADMIN,
+        password="x",
+    )
+    app.dependency_overrides[get_current_admin] = lambda: admin
+    yield admin
+    app.dependency_overrides.pop(get_current_admin, None)
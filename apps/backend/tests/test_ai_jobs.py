@@ -0,0 +1,159 @@
+"""
+AIJobQueue claiming and settling against Postgres, driven step by step
+(`_claim`, `_retry`, `_finish`) instead of through the workers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.ai_job import AIJob, AIJobStatus, AIJobTask
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.section import Section
+from app.models.user import User
+from app.services.ai_jobs import AIJobQueue
+
+KEY = "test-key"
+
+
+@pytest.fixture
+def queue() -> AIJobQueue:
+    queue = AIJobQueue(
+        workers=1,
+        key_concurrency=2,
+        key_rpm=0,
+        poll_seconds=1,
+        lease_seconds=300,
+        max_attempts=3,
+        retry_base_seconds=0,
+        retry_max_seconds=0,
+    )
+    queue.register_key(KEY)
+    return queue
+
+
+@pytest.fixture
+async def course(db) -> Course:
+    course = Course(
+        title="Course",
+        is_published=True,
+        instructor=User(
+            username="instructor", email="i@example.com", full_name="I", password="x"
+        ),
+        sections=[
+            Section(
+                title="Basics",
+                section_order=1,
+                lessons=[Lesson(title=f"L{n}", lesson_order=n) for n in (1, 2)],
+            )
+        ],
+    )
+    db.add(course)
+    await db.commit()
+    return course
+
+
+async def _submit(queue, db, course) -> AIJob:
+    return await queue.submit_course(
+        db, course.id, gemini_key=KEY, gemini_model="model", max_tokens=100
+    )
+
+
+async def _statuses(db, job_id) -> list[AIJobStatus]:
+    db.expire_all()
+    stmt = (
+        select(AIJobTask.status)
+        .where(AIJobTask.job_id == job_id)
+        .order_by(AIJobTask.id)
+    )
+    return list((await db.scalars(stmt)).all())
+
+
+async def _expire_leases(db) -> None:
+    await db.execute(
+        update(AIJobTask).values(
+            next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+        )
+    )
+    await db.commit()
+
+
+async def test_claim_skips_tasks_of_cancelled_jobs(queue, db, course):
+    cancelled = await _submit(queue, db, course)
+    await queue.cancel(db, cancelled.id)
+    # the cancelled job's tasks come first in due order
+    await _expire_leases(db)
+    await db.execute(
+        update(AIJobTask)
+        .where(AIJobTask.job_id == cancelled.id)
+        .values(status=AIJobStatus.running)
+    )
+    await db.commit()
+    open_job = await _submit(queue, db, course)
+
+    task = await queue._claim(db)
+
+    assert task is not None
+    assert task.job_id == open_job.id
+
+
+async def test_cancel_ends_running_tasks_with_expired_leases(queue, db, course):
+    job = await _submit(queue, db, course)
+    await queue._claim(db)
+    await _expire_leases(db)
+
+    await queue.cancel(db, job.id)
+
+    assert await _statuses(db, job.id) == [AIJobStatus.cancelled] * 2
+    assert await queue._claim(db) is None
+
+
+async def test_retry_of_cancelled_job_is_not_requeued(queue, db, course):
+    job = await _submit(queue, db, course)
+    task = await queue._claim(db)
+    await queue.cancel(db, job.id)
+
+    await queue._retry(db, task, "upstream 503")
+
+    assert await _statuses(db, job.id) == [AIJobStatus.cancelled] * 2
+    assert await queue._claim(db) is None
+
+
+async def test_retry_of_open_job_is_requeued(queue, db, course):
+    job = await _submit(queue, db, course)
+    task = await queue._claim(db)
+
+    await queue._retry(db, task, "upstream 503")
+
+    assert await _statuses(db, job.id) == [AIJobStatus.queued] * 2
+    claimed = {(await queue._claim(db)).id for _ in range(2)}
+    assert task.id in claimed
+
+
+async def test_running_tasks_of_cancelled_job_finish(queue, db, course):
+    job = await _submit(queue, db, course)
+    first = await queue._claim(db)
+    second = await queue._claim(db)
+    await queue.cancel(db, job.id)
+
+    await queue._finish(db, first, ok=True, usage={"total_token_count": 7})
+    await queue._finish(db, second, ok=False, error="bad key")
+
+    assert await _statuses(db, job.id) == [AIJobStatus.succeeded, AIJobStatus.cancelled]
+    await db.refresh(job)
+    assert job.status == AIJobStatus.cancelled
+    assert (job.succeeded, job.failed, job.total_tokens) == (1, 0, 7)
+
+
+async def test_finish_after_lost_lease_is_ignored(queue, db, course):
+    job_id = (await _submit(queue, db, course)).id
+    task = await queue._claim(db)
+    await _expire_leases(db)
+    await queue.cancel(db, job_id)
+
+    await queue._finish(db, task, ok=True)
+
+    assert await _statuses(db, job_id) == [AIJobStatus.cancelled] * 2
+    assert await db.scalar(select(AIJob.succeeded).where(AIJob.id == job_id)) == 0
@@ -0,0 +1,172 @@
+"""
+Streaming lesson generation (update_lesson?stream=true) with Gemini replaced
+by a scripted stream: the lesson grows chunk by chunk and is put back when
+the stream fails or the client goes away.
+"""
+
+import asyncio
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import func, select
+
+from app.main import app
+from app.models.ai_generation import AIGeneration
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.section import Section
+from app.models.user import User
+from app.services import ai_handler
+from app.services.ai_handler import stream_lesson_update
+
+ORIGINAL = "original content"
+
+
+class ScriptedStream:
+    """Yields `chunks`; after the first one, waits for `proceed` (or raises `error`)."""
+
+    def __init__(self, chunks=("Hello ", "world")):
+        self.chunks = chunks
+        self.proceed = asyncio.Event()
+        self.first_sent = asyncio.Event()
+        self.error: Exception | None = None
+
+    async def __call__(self, prompt, max_tokens, model, key):
+        for n, text in enumerate(self.chunks):
+            if n:
+                self.first_sent.set()
+                await self.proceed.wait()
+                if self.error is not None:
+                    raise self.error
+            yield text, None
+
+
+@pytest.fixture
+def gemini(monkeypatch, session_factory) -> ScriptedStream:
+    stream = ScriptedStream()
+    monkeypatch.setattr(ai_handler, "stream_gemini", stream)
+    monkeypatch.setattr(ai_handler, "AsyncSessionLocal", session_factory)
+    return stream
+
+
+@pytest.fixture
+async def lesson(db) -> Lesson:
+    lesson = Lesson(title="Intro", content=ORIGINAL, lesson_order=1)
+    db.add(
+        Course(
+            title="Course",
+            description="A course",
+            is_published=True,
+            instructor=User(
+                username="instructor",
+                email="i@example.com",
+                full_name="I",
+                password="x",
+            ),
+            sections=[Section(title="Basics", section_order=1, lessons=[lesson])],
+        )
+    )
+    await db.commit()
+    return lesson
+
+
+async def _content(session_factory, lesson_id: int):
+    async with session_factory() as db:
+        return await db.scalar(select(Lesson.content).where(Lesson.id == lesson_id))
+
+
+async def _stored_generations(session_factory) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(AIGeneration))
+
+
+async def test_completed_stream_writes_and_stores(gemini, lesson, session_factory):
+    gemini.proceed.set()
+
+    events = [e async for e in stream_lesson_update("prompt", lesson.id, "m", "k", 100)]
+
+    assert [e.split(b"\n", 1)[0] for e in events] == [
+        b"event: chunk",
+        b"event: chunk",
+        b"event: done",
+    ]
+    assert await _content(session_factory, lesson.id) == "Hello world"
+    assert await _stored_generations(session_factory) == 1
+
+
+async def test_failed_stream_restores_content(gemini, lesson, session_factory):
+    gemini.error = RuntimeError("upstream reset")
+    gemini.proceed.set()
+
+    events = [e async for e in stream_lesson_update("prompt", lesson.id, "m", "k", 100)]
+
+    assert events[-1].startswith(b"event: error")
+    assert await _content(session_factory, lesson.id) == ORIGINAL
+    assert await _stored_generations(session_factory) == 0
+
+
+async def test_closed_stream_restores_content(gemini, lesson, session_factory):
+    stream = stream_lesson_update("prompt", lesson.id, "m", "k", 100)
+
+    assert (await stream.__anext__()).startswith(b"event: chunk")
+    assert await _content(session_factory, lesson.id) == "Hello "
+    # what happens to a body iterator Starlette stops reading (ASGI 2.4)
+    await stream.aclose()
+
+    assert await _content(session_factory, lesson.id) == ORIGINAL
+    assert await _stored_generations(session_factory) == 0
+
+
+async def test_client_disconnect_restores_content(
+    gemini, lesson, db_client, as_admin, session_factory
+):
+    course_id = await _course_id(session_factory)
+    query = urlencode(
+        {
+            "course_uid": course_id,
+            "lesson_id": lesson.id,
+            "gemini_key": "k",
+            "stream": "true",
+        }
+    )
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/ai_handler/update_lesson",
+        "raw_path": b"/api/v1/ai_handler/update_lesson",
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    requested = False
+    sent: list[dict] = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # hang up once the first chunk is out, while Gemini is still streaming
+        await gemini.first_sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    assert sent[0]["status"] == 200
+    assert b"event: chunk" in sent[1]["body"]
+    assert not any(b"event: done" in m.get("body", b"") for m in sent)
+    assert await _content(session_factory, lesson.id) == ORIGINAL
+    assert await _stored_generations(session_factory) == 0
+
+
+async def _course_id(session_factory) -> str:
+    async with session_factory() as db:
+        return str(await db.scalar(select(Course.id)))
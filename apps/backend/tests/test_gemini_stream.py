@@ -0,0 +1,129 @@
+"""
+stream_gemini against a fake genai client: rate limits raised by the lazy
+stream are retried on another key, and token usage is settled however the
+stream ends.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors as genai_errors
+from google.genai import types
+
+from app.utils import gemini_service
+from app.utils.gemini_scheduler import GeminiScheduler
+from app.utils.gemini_service import stream_gemini
+
+RATE_LIMITED = genai_errors.APIError(
+    429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}}
+)
+
+
+def _chunk(text: str, total: int | None = None) -> SimpleNamespace:
+    usage = (
+        types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=10, total_token_count=total
+        )
+        if total is not None
+        else None
+    )
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeGenai:
+    """Per-key scripts: each is a list of chunks, where an exception is raised instead."""
+
+    def __init__(self, scripts: dict[str, list]):
+        self.scripts = scripts
+        self.opened: list[str] = []
+
+    def client(self, key: str, gemini_model: str):
+        async def generate_content_stream(**kwargs):
+            self.opened.append(key)
+            return self._stream(self.scripts[key])
+
+        return SimpleNamespace(
+            aio=SimpleNamespace(
+                models=SimpleNamespace(generate_content_stream=generate_content_stream)
+            )
+        )
+
+    @staticmethod
+    async def _stream(script: list):
+        # like the SDK: nothing is requested until the first chunk is read
+        for item in script:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+@pytest.fixture
+def scheduler(monkeypatch) -> GeminiScheduler:
+    scheduler = GeminiScheduler(
+        ["key-a", "key-b"],
+        rpm=60,
+        tpm=100_000,
+        max_attempts=3,
+        backoff_seconds=0,
+        max_wait_seconds=1,
+    )
+    monkeypatch.setattr(gemini_service, "gemini_scheduler", scheduler)
+
+    async def input_tokens(client, gemini_model, prompt_text, max_tokens):
+        return 10, True
+
+    monkeypatch.setattr(gemini_service, "input_tokens", input_tokens)
+    scheduler.settled = []
+    settle = scheduler.settle
+
+    def record(key, reserved, used):
+        scheduler.settled.append((key, used))
+        settle(key, reserved, used)
+
+    monkeypatch.setattr(scheduler, "settle", record)
+    return scheduler
+
+
+@pytest.fixture
+def genai(monkeypatch) -> FakeGenai:
+    fake = FakeGenai({})
+    monkeypatch.setattr(gemini_service, "_get_client", fake.client)
+    return fake
+
+
+async def _drain(**kwargs) -> list[str]:
+    return [text async for text, _ in stream_gemini("prompt", 100, "model", **kwargs)]
+
+
+async def test_rate_limit_on_first_chunk_moves_to_another_key(scheduler, genai):
+    # key-a has more headroom, so it is tried first
+    scheduler._state("key-b").tokens.take(10)
+    genai.scripts = {
+        "key-a": [RATE_LIMITED],
+        "key-b": [_chunk("Hello "), _chunk("world", total=50)],
+    }
+
+    assert await _drain() == ["Hello ", "world"]
+    assert genai.opened == ["key-a", "key-b"]
+    assert scheduler._state("key-a").cooldown_until > 0
+    assert scheduler.settled == [("key-b", 50)]
+
+
+async def test_failure_mid_stream_settles_usage_so_far(scheduler, genai):
+    genai.scripts = {"key-a": [_chunk("Hello ", total=30), RuntimeError("reset")]}
+
+    with pytest.raises(RuntimeError):
+        await _drain(gemini_key="key-a")
+
+    assert genai.opened == ["key-a"]
+    assert scheduler.settled == [("key-a", 30)]
+
+
+async def test_closed_stream_settles_usage_so_far(scheduler, genai):
+    genai.scripts = {"key-a": [_chunk("Hello ", total=20), _chunk("world", total=40)]}
+    stream = stream_gemini("prompt", 100, "model", "key-a")
+
+    assert (await stream.__anext__())[0] == "Hello "
+    await stream.aclose()
+
+    assert scheduler.settled == [("key-a", 20)]
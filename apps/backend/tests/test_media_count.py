@@ -0,0 +1,104 @@
+"""
+How GET /media computes `total` for each CountMode: exact count, planner
+estimate, cached count (cleared by media writes) and none (has_more only).
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.models.media import Media, MediaType
+from app.services.media import media_service
+
+LIVE = 12
+TRASHED = 3
+
+
+def _media(n: int, *, is_deleted: bool = False) -> Media:
+    return Media(
+        public_id=f"count/{uuid4()}",
+        resource_type=MediaType.image if n % 2 else MediaType.video,
+        secure_url=f"https://res.cloudinary.com/demo/image/upload/v1/count/{n}.jpg",
+        bytes=1000,
+        is_deleted=is_deleted,
+    )
+
+
+@pytest.fixture
+async def media(db, as_admin) -> list[Media]:
+    # the service is a module-level singleton; don't inherit another test's totals
+    media_service._count_cache.clear()
+    rows = [_media(n) for n in range(LIVE)] + [
+        _media(n, is_deleted=True) for n in range(TRASHED)
+    ]
+    db.add_all(rows)
+    await db.commit()
+    await db.execute(text("ANALYZE media"))
+    await db.commit()
+    yield rows
+    media_service._count_cache.clear()
+
+
+async def _list(client, **params) -> dict:
+    resp = await client.get("/api/v1/media/", params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _counts(queries: list[str]) -> list[str]:
+    return [q for q in queries if "count(" in q.lower()]
+
+
+async def test_exact_counts_every_request(media, db_client, queries):
+    body = await _list(db_client, count="exact", limit=5)
+    assert (body["total"], body["total_is_estimate"]) == (LIVE, False)
+
+    body = await _list(db_client, count="exact", is_deleted=True)
+    assert body["total"] == TRASHED
+    assert len(_counts(queries)) == 2
+
+
+async def test_estimated_uses_the_plan_not_a_scan(media, db_client, queries):
+    body = await _list(db_client, count="estimated", limit=5)
+
+    assert body["total_is_estimate"] is True
+    # statistics are fresh, so the estimate is in the right range
+    assert 0 < body["total"] <= LIVE + TRASHED
+    assert any(q.startswith("EXPLAIN (FORMAT JSON)") for q in queries)
+    assert _counts(queries) == []
+
+
+async def test_cached_reuses_the_total_until_a_media_write(
+    media, db, db_client, queries
+):
+    assert (await _list(db_client, count="cached"))["total"] == LIVE
+    # written behind the service's back: the cached total doesn't see it
+    db.add(_media(LIVE))
+    await db.commit()
+    assert (await _list(db_client, count="cached"))["total"] == LIVE
+    assert len(_counts(queries)) == 1
+    # a different filter set is counted separately
+    assert (await _list(db_client, count="cached", is_deleted=True))["total"] == TRASHED
+    assert len(_counts(queries)) == 2
+
+    await media_service.restore(db, media[-1].id)
+
+    assert (await _list(db_client, count="cached"))["total"] == LIVE + 2
+    assert (await _list(db_client, count="cached", is_deleted=True))[
+        "total"
+    ] == TRASHED - 1
+    assert len(_counts(queries)) == 4
+
+
+async def test_none_skips_the_count_and_reports_has_more(media, db_client, queries):
+    first = await _list(db_client, count="none", limit=LIVE - 1)
+    assert first["total"] is None
+    assert first["has_more"] is True
+    assert first["next_cursor"]
+
+    rest = await _list(db_client, count="none", limit=LIVE, cursor=first["next_cursor"])
+    assert len(rest["items"]) == 1
+    assert rest["has_more"] is False
+    assert rest["next_cursor"] is None
+    assert _counts(queries) == []
@@ -0,0 +1,190 @@
+"""
+MediaDeletionQueue against Postgres, with the Admin API's delete_resources
+replaced by a recorder: claiming, batching per resource type, backoff and
+parking after max attempts.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import cloudinary.api
+import pytest
+from sqlalchemy import select, update
+
+from app.models.media import MediaType, PendingMediaDeletion
+from app.services import media_deletion as media_deletion_module
+from app.services.media_deletion import MediaDeletionQueue
+
+
+class DeleteResources:
+    """Answers like delete_resources; public_ids in `fail` come back with an error status."""
+
+    def __init__(self):
+        self.calls: list[tuple[str, list[str]]] = []
+        self.fail: set[str] = set()
+        self.error: Exception | None = None
+
+    def __call__(self, public_ids, resource_type, type):
+        self.calls.append((resource_type, list(public_ids)))
+        if self.error is not None:
+            raise self.error
+        return {
+            "deleted": {
+                p: (
+                    "error"
+                    if p in self.fail
+                    else ("not_found" if p.startswith("gone") else "deleted")
+                )
+                for p in public_ids
+            }
+        }
+
+
+@pytest.fixture
+def delete_resources(monkeypatch, session_factory) -> DeleteResources:
+    fake = DeleteResources()
+    monkeypatch.setattr(cloudinary.api, "delete_resources", fake)
+    monkeypatch.setattr(media_deletion_module, "AsyncSessionLocal", session_factory)
+    return fake
+
+
+@pytest.fixture
+def queue() -> MediaDeletionQueue:
+    return MediaDeletionQueue(
+        batch_size=3,
+        poll_seconds=1,
+        retry_base_seconds=30,
+        retry_max_seconds=3600,
+        max_attempts=2,
+    )
+
+
+async def _enqueue(queue, db, *assets) -> None:
+    await queue.enqueue(db, assets)
+    await db.commit()
+
+
+async def _rows(db) -> list[PendingMediaDeletion]:
+    db.expire_all()
+    return list(
+        (
+            await db.scalars(
+                select(PendingMediaDeletion).order_by(PendingMediaDeletion.id)
+            )
+        ).all()
+    )
+
+
+async def _make_due(db) -> None:
+    await db.execute(
+        update(PendingMediaDeletion).values(
+            next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+        )
+    )
+    await db.commit()
+
+
+async def test_drain_deletes_in_batches_per_resource_type(queue, db, delete_resources):
+    await _enqueue(
+        queue,
+        db,
+        *((f"img-{n}", MediaType.image) for n in range(4)),
+        ("vid-0", MediaType.video),
+        ("gone-0", MediaType.video),
+    )
+
+    assert await queue.drain() == 6
+
+    # at most batch_size rows per claim, one call per resource type in a claim
+    assert all(len(ids) <= 3 for _, ids in delete_resources.calls)
+    sent = {(rtype, p) for rtype, ids in delete_resources.calls for p in ids}
+    assert sent == {("image", f"img-{n}") for n in range(4)} | {
+        ("video", "vid-0"),
+        ("video", "gone-0"),
+    }
+    assert len(delete_resources.calls) == len(
+        {tuple(ids) for _, ids in delete_resources.calls}
+    )
+    assert await _rows(db) == []
+
+
+async def test_enqueue_is_idempotent_per_asset(queue, db, delete_resources):
+    await _enqueue(queue, db, ("img-0", MediaType.image), ("img-0", MediaType.video))
+    await _enqueue(queue, db, ("img-0", MediaType.image))
+
+    assert len(await _rows(db)) == 2
+
+
+async def test_claimed_rows_are_leased(queue, db, session_factory, delete_resources):
+    await _enqueue(queue, db, *((f"img-{n}", MediaType.image) for n in range(4)))
+
+    async with session_factory() as first, session_factory() as second:
+        a = await queue._claim(first)
+        b = await queue._claim(second)
+        c = await queue._claim(second)
+
+    assert len(a) == 3 and len(b) == 1 and c == []
+    assert {r.id for r in a}.isdisjoint({r.id for r in b})
+
+
+async def test_failures_back_off(queue, db, delete_resources):
+    await _enqueue(queue, db, ("img-ok", MediaType.image), ("img-bad", MediaType.image))
+    delete_resources.fail = {"img-bad"}
+    before = datetime.now(timezone.utc)
+
+    assert await queue.process_batch() == 2
+
+    [row] = await _rows(db)
+    assert row.public_id == "img-bad"
+    assert row.attempts == 1
+    assert row.last_error == "unexpected status: error"
+    assert row.next_attempt_at >= before + timedelta(seconds=30)
+    assert row.failed_at is None
+    # not due yet
+    assert await queue.process_batch() == 0
+
+
+async def test_api_errors_back_off_the_whole_group(queue, db, delete_resources):
+    await _enqueue(queue, db, ("img-0", MediaType.image), ("img-1", MediaType.image))
+    delete_resources.error = RuntimeError("Admin API unavailable")
+
+    await queue.process_batch()
+
+    rows = await _rows(db)
+    assert [r.attempts for r in rows] == [1, 1]
+    assert {r.last_error for r in rows} == {"Admin API unavailable"}
+
+
+async def test_deletion_is_parked_after_max_attempts(
+    queue, db, db_client, as_admin, delete_resources
+):
+    await _enqueue(queue, db, ("img-bad", MediaType.image))
+    delete_resources.fail = {"img-bad"}
+
+    for _ in range(2):
+        await _make_due(db)
+        assert await queue.process_batch() == 1
+
+    [row] = await _rows(db)
+    assert row.attempts == 2
+    assert row.failed_at is not None
+    await _make_due(db)
+    assert await queue.process_batch() == 0
+    assert len(delete_resources.calls) == 2
+
+    # visible to admins, and can be queued again
+    failed = (await db_client.get("/api/v1/media/deletions?failed=true")).json()
+    assert [(d["public_id"], d["attempts"]) for d in failed] == [("img-bad", 2)]
+    assert (await db_client.get("/api/v1/media/deletions?failed=false")).json() == []
+
+    resp = await db_client.post(f"/api/v1/media/deletions/{row.id}/retry")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["failed_at"] is None
+    delete_resources.fail = set()
+    assert await queue.process_batch() == 1
+    assert await _rows(db) == []
+
+
+async def test_retry_unknown_deletion_is_404(db_client, as_admin):
+    resp = await db_client.post("/api/v1/media/deletions/999/retry")
+
+    assert resp.status_code == 404
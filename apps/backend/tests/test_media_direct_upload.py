@@ -0,0 +1,321 @@
+"""
+Direct (browser -> Cloudinary) uploads against a local Cloudinary stub: it
+checks upload signatures and signs its responses and webhooks the way the
+Upload API does, with the test API secret.
+"""
+
+import json
+import time
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.utils
+import pytest
+from sqlalchemy import func, select
+
+from app.models.media import Media
+from app.schemas.media import MediaType
+from app.services import media_direct_upload
+from app.services.media_direct_upload import FLOW_DIRECT, FLOW_KEY
+
+API_KEY, API_SECRET = "123456789012345", "test-api-secret"
+
+
+@pytest.fixture(autouse=True)
+def cloudinary_credentials(monkeypatch):
+    config = cloudinary.config()
+    monkeypatch.setattr(config, "api_key", API_KEY)
+    monkeypatch.setattr(config, "api_secret", API_SECRET)
+    monkeypatch.setattr(config, "signature_algorithm", "sha1", raising=False)
+    return config
+
+
+class CloudinaryStub:
+    """Accepts signed uploads and answers like the Upload and Admin APIs."""
+
+    def __init__(self):
+        self.version = 1700000000
+        self.assets: dict[tuple[str, str], dict] = {}
+
+    def upload(
+        self, params: dict, *, resource_type: str = "image", nbytes: int = 2048
+    ) -> dict:
+        signed = {
+            k: v
+            for k, v in params.items()
+            if k not in ("signature", "api_key", "resource_type", "file")
+        }
+        expected = cloudinary.utils.api_sign_request(signed, API_SECRET)
+        if params.get("signature") != expected:
+            raise PermissionError("Invalid Signature")
+        if time.time() - int(params["timestamp"]) > 3600:
+            raise PermissionError("Stale request")
+
+        self.version += 1
+        folder = params.get("folder")
+        public_id = f"{folder}/{params['public_id']}" if folder else params["public_id"]
+        custom = dict(
+            item.partition("=")[::2]
+            for item in params.get("context", "").split("|")
+            if item
+        )
+        asset = {
+            "public_id": public_id,
+            "version": self.version,
+            "resource_type": resource_type,
+            "format": "png" if resource_type == "image" else "mp4",
+            "bytes": nbytes,
+            "width": 800,
+            "height": 600,
+            "secure_url": f"https://res.cloudinary.com/demo/{resource_type}/upload/"
+            f"v{self.version}/{public_id}",
+            "asset_folder": folder,
+            "context": {"custom": custom},
+        }
+        self.assets[(resource_type, public_id)] = asset
+        signature = cloudinary.utils.api_sign_request(
+            {"public_id": public_id, "version": self.version}, API_SECRET
+        )
+        return {**asset, "signature": signature}
+
+    def resource(self, public_id: str, resource_type: str = "image", **options) -> dict:
+        try:
+            return dict(self.assets[(resource_type, public_id)])
+        except KeyError:
+            raise cloudinary.exceptions.NotFound(f"Resource not found - {public_id}")
+
+    @staticmethod
+    def notification(
+        upload_result: dict, *, sent_at: int | None = None
+    ) -> tuple[str, dict]:
+        body = json.dumps({"notification_type": "upload", **upload_result})
+        sent_at = int(time.time()) if sent_at is None else sent_at
+        headers = {
+            "X-Cld-Timestamp": str(sent_at),
+            "X-Cld-Signature": cloudinary.utils.compute_hex_hash(
+                f"{body}{sent_at}{API_SECRET}", "sha1"
+            ),
+        }
+        return body, headers
+
+
+@pytest.fixture
+def stub(monkeypatch) -> CloudinaryStub:
+    stub = CloudinaryStub()
+    monkeypatch.setattr(cloudinary.api, "resource", stub.resource)
+    return stub
+
+
+async def _sign(client, **payload) -> dict:
+    resp = await client.post(
+        "/api/v1/media/direct-uploads", json={"resource_type": "image", **payload}
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+async def _media_count(db) -> int:
+    return (await db.execute(select(func.count()).select_from(Media))).scalar_one()
+
+
+# ─── Signing ─────────────────────────────────────────────────────
+async def test_signed_params_are_accepted_by_cloudinary(client, as_admin, stub):
+    signed = await _sign(client, folder="lessons", title="Diagram", is_published=True)
+
+    assert signed["upload_url"].endswith("/image/upload")
+    params = signed["params"]
+    assert params["api_key"] == API_KEY
+    assert params["allowed_formats"] == "jpg,jpeg,png,webp,gif"
+    result = stub.upload(params)
+    assert result["public_id"] == f"lessons/{params['public_id']}"
+    assert result["context"]["custom"] == {
+        "caption": "Diagram",
+        "published": "true",
+        FLOW_KEY: FLOW_DIRECT,
+    }
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("public_id", "chosen-by-client"),
+        ("folder", "elsewhere"),
+        ("allowed_formats", "exe"),
+        ("context", "published=true"),
+    ],
+)
+async def test_cloudinary_rejects_tampered_params(client, as_admin, stub, field, value):
+    params = (await _sign(client, folder="lessons"))["params"]
+    params[field] = value
+
+    with pytest.raises(PermissionError):
+        stub.upload(params)
+
+
+async def test_signing_needs_cloudinary_credentials(
+    client, as_admin, cloudinary_credentials
+):
+    cloudinary_credentials.api_secret = None
+
+    resp = await client.post(
+        "/api/v1/media/direct-uploads", json={"resource_type": "image"}
+    )
+
+    assert resp.status_code == 503
+
+
+# ─── Completion callback ─────────────────────────────────────────
+async def test_complete_creates_media_once(db, db_client, as_admin, stub):
+    params = (await _sign(db_client, title="Diagram", alt_text="A diagram"))["params"]
+    result = stub.upload(params)
+
+    first = await db_client.post("/api/v1/media/direct-uploads/complete", json=result)
+    again = await db_client.post("/api/v1/media/direct-uploads/complete", json=result)
+
+    assert first.status_code == 201, first.text
+    assert again.status_code == 201
+    assert first.json()["id"] == again.json()["id"]
+    media = first.json()
+    assert media["public_id"] == result["public_id"]
+    assert media["resource_type"] == MediaType.image
+    assert media["title"] == "Diagram"
+    assert media["alt_text"] == "A diagram"
+    assert media["is_published"] is False
+    assert await _media_count(db) == 1
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [("public_id", "someone-elses-asset"), ("version", 1), ("signature", "0" * 40)],
+)
+async def test_complete_rejects_tampered_result(
+    db, db_client, as_admin, stub, field, value
+):
+    result = stub.upload((await _sign(db_client))["params"])
+    result[field] = value
+
+    resp = await db_client.post("/api/v1/media/direct-uploads/complete", json=result)
+
+    assert resp.status_code == 400
+    assert await _media_count(db) == 0
+
+
+async def test_complete_ignores_unsigned_fields(db, db_client, as_admin, stub):
+    result = stub.upload((await _sign(db_client, title="Diagram"))["params"])
+    # only public_id and version are covered by the signature
+    tampered = {
+        **result,
+        "context": {"custom": {"caption": "Defaced", "published": "true"}},
+        "secure_url": "https://attacker.example/payload.png",
+        "bytes": 1,
+        "width": 1,
+        "format": "exe",
+    }
+
+    resp = await db_client.post("/api/v1/media/direct-uploads/complete", json=tampered)
+
+    assert resp.status_code == 201, resp.text
+    media = resp.json()
+    assert media["title"] == "Diagram"
+    assert media["is_published"] is False
+    assert media["secure_url"] == result["secure_url"]
+    assert (media["bytes"], media["width"], media["format"]) == (2048, 800, "png")
+
+
+async def test_complete_for_a_missing_asset_is_404(db, db_client, as_admin, stub):
+    result = stub.upload((await _sign(db_client))["params"])
+    stub.assets.clear()
+
+    resp = await db_client.post("/api/v1/media/direct-uploads/complete", json=result)
+
+    assert resp.status_code == 404
+    assert await _media_count(db) == 0
+
+
+# ─── Webhook ─────────────────────────────────────────────────────
+async def test_notification_creates_media(db, db_client, as_admin, stub):
+    result = stub.upload((await _sign(db_client, is_published=True))["params"])
+    body, headers = stub.notification(result)
+
+    resp = await db_client.post(
+        "/api/v1/media/direct-uploads/notifications", content=body, headers=headers
+    )
+
+    assert resp.status_code == 204
+    media = (await db.execute(select(Media))).scalar_one()
+    assert media.public_id == result["public_id"]
+    assert media.is_published is True
+
+
+async def test_notification_after_complete_keeps_one_row(db, db_client, as_admin, stub):
+    result = stub.upload((await _sign(db_client))["params"])
+    await db_client.post("/api/v1/media/direct-uploads/complete", json=result)
+    body, headers = stub.notification(result)
+
+    resp = await db_client.post(
+        "/api/v1/media/direct-uploads/notifications", content=body, headers=headers
+    )
+
+    assert resp.status_code == 204
+    assert await _media_count(db) == 1
+
+
+async def test_stale_notification_is_rejected(
+    db, db_client, as_admin, stub, monkeypatch
+):
+    monkeypatch.setattr(
+        media_direct_upload.settings, "MEDIA_UPLOAD_NOTIFICATION_MAX_AGE", 60
+    )
+    result = stub.upload((await _sign(db_client))["params"])
+    body, headers = stub.notification(result, sent_at=int(time.time()) - 120)
+
+    resp = await db_client.post(
+        "/api/v1/media/direct-uploads/notifications", content=body, headers=headers
+    )
+
+    assert resp.status_code == 401
+    assert await _media_count(db) == 0
+
+
+@pytest.mark.parametrize("forge", ["body", "signature", "timestamp", "missing"])
+async def test_forged_notification_is_rejected(db, db_client, as_admin, stub, forge):
+    result = stub.upload((await _sign(db_client))["params"])
+    body, headers = stub.notification(result)
+    if forge == "body":
+        body = body.replace(result["public_id"], "attacker/asset")
+    elif forge == "signature":
+        headers["X-Cld-Signature"] = cloudinary.utils.compute_hex_hash(
+            f"{body}{headers['X-Cld-Timestamp']}wrong-secret", "sha1"
+        )
+    elif forge == "timestamp":
+        headers["X-Cld-Timestamp"] = str(int(headers["X-Cld-Timestamp"]) + 30)
+    else:
+        headers = {}
+
+    resp = await db_client.post(
+        "/api/v1/media/direct-uploads/notifications", content=body, headers=headers
+    )
+
+    assert resp.status_code == 401
+    assert await _media_count(db) == 0
+
+
+async def test_notification_for_other_uploads_is_ignored(db, db_client, stub):
+    # what POST /media uploads look like: no upload_flow marker in the context
+    params = cloudinary.utils.sign_request(
+        {
+            "timestamp": int(time.time()),
+            "public_id": "server-side",
+            "context": "caption=x",
+        },
+        {"api_key": API_KEY, "api_secret": API_SECRET},
+    )
+    body, headers = stub.notification(stub.upload(params))
+
+    resp = await db_client.post(
+        "/api/v1/media/direct-uploads/notifications", content=body, headers=headers
+    )
+
+    assert resp.status_code == 204
+    assert await _media_count(db) == 0
@@ -0,0 +1,162 @@
+"""
+Query-plan regression test for the admin media listing.
+
+Seeds ROWS media rows, ANALYZEs, and EXPLAINs the page statement
+`list_filtered` sends for the common filter combinations, both as a custom
+plan and as the generic plan a cached prepared statement falls back to; any
+Seq Scan on media fails.
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.schemas.media import CountMode, MediaType
+from app.services.base import encode_cursor
+from app.services.media import media_service
+
+ROWS = 100_000
+PAGE = 50
+
+SEED = """
+INSERT INTO media (
+    id, public_id, resource_type, secure_url, bytes, original_filename,
+    is_published, is_deleted, created_at, updated_at
+)
+SELECT
+    gen_random_uuid(),
+    'plan-check/' || g,
+    (CASE WHEN g % 4 = 0 THEN 'video' ELSE 'image' END)::media_type_enum,
+    'https://example.invalid/' || g,
+    1000,
+    'clip-' || g || '.bin',
+    g % 3 = 0,
+    g % 20 = 0,
+    now() - g * interval '1 minute',
+    now()
+FROM generate_series(1, :rows) AS g
+"""
+
+CASES: list[tuple[str, dict[str, Any], bool]] = [
+    # (name, filtered_select kwargs, seek past a cursor)
+    ("live, first page", {}, False),
+    ("live, next page", {}, True),
+    ("live images", {"resource_type": MediaType.image}, False),
+    ("live videos, next page", {"resource_type": MediaType.video}, True),
+    ("live published", {"is_published": True}, False),
+    (
+        "live published videos",
+        {"resource_type": MediaType.video, "is_published": True},
+        False,
+    ),
+    ("trash", {"is_deleted": True}, False),
+    ("search filename", {"search": "clip-4242"}, False),
+]
+
+
+async def _reseed(url: str, rows: int) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE media CASCADE"))
+        if rows:
+            await conn.execute(text(SEED), {"rows": rows})
+            await conn.execute(text("ANALYZE media"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_url: str):
+    asyncio.run(_reseed(pg_url, ROWS))
+    yield pg_url
+    asyncio.run(_reseed(pg_url, 0))
+
+
+def _nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+async def _listing_statement(
+    url: str, kwargs: dict[str, Any], cursor: Optional[str]
+) -> tuple[str, tuple]:
+    """The page SELECT `list_filtered` sends, as driver SQL and parameters."""
+    engine = create_async_engine(url, poolclass=NullPool)
+    sent: list[tuple[str, tuple]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            sent.append((statement, tuple(parameters)))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        async with AsyncSession(engine) as db:
+            await media_service.list_filtered(
+                db, cursor=cursor, limit=PAGE, count=CountMode.none, **kwargs
+            )
+    finally:
+        await engine.dispose()
+    [page] = sent
+    return page
+
+
+async def _plan(url: str, statement: str, parameters: tuple, *, generic: bool) -> dict:
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            if generic:
+                # what a cached prepared statement runs once Postgres stops
+                # planning per call: parameter values unknown to the planner
+                await conn.exec_driver_sql("SET plan_cache_mode = force_generic_plan")
+                await conn.exec_driver_sql(f"PREPARE listing AS {statement}")
+                # EXECUTE takes no bind parameters; quoted literals are coerced
+                # to the prepared parameter types
+                args = ", ".join(
+                    "'" + str(p).replace("'", "''") + "'" for p in parameters
+                )
+                plan = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) EXECUTE listing({args})"
+                )
+            else:
+                plan = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+            plan = plan.scalar_one()
+    finally:
+        await engine.dispose()
+    if isinstance(plan, (str, bytes)):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@pytest.mark.parametrize("generic", [False, True], ids=["custom plan", "generic plan"])
+@pytest.mark.parametrize(
+    "kwargs, use_seek", [c[1:] for c in CASES], ids=[c[0] for c in CASES]
+)
+async def test_listing_avoids_seq_scan(seeded, kwargs, use_seek, generic):
+    # a cursor from the middle of the seeded rows
+    cursor = encode_cursor(
+        datetime.now(timezone.utc) - timedelta(minutes=ROWS // 2), uuid.UUID(int=0)
+    )
+    statement, parameters = await _listing_statement(
+        seeded, kwargs, cursor if use_seek else None
+    )
+    plan = await _plan(seeded, statement, parameters, generic=generic)
+
+    nodes = list(_nodes(plan))
+    scans = sorted(
+        f"{n['Node Type']}({n.get('Index Name') or n.get('Relation Name')})"
+        for n in nodes
+        if "Scan" in n["Node Type"]
+    )
+    assert not any(
+        n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "media"
+        for n in nodes
+    ), scans
@@ -0,0 +1,249 @@
+"""
+MediaReconciler against Postgres, with the Admin API listing calls
+(`resources`, `resources_by_ids`) answered from an in-memory asset list:
+the bulk repair statement, high-water-mark resume and lease release.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import cloudinary.api
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.models.media import Media, MediaReconcileState, MediaType, PendingMediaDeletion
+from app.services import media_reconcile as media_reconcile_module
+from app.services.media_reconcile import LOCAL_SCOPE, MediaReconciler
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class AdminAPI:
+    """Serves resources/resources_by_ids from `assets`, oldest first."""
+
+    def __init__(self):
+        self.assets: list[dict] = []
+        self.listed: list[dict] = []
+        self.error: Exception | None = None
+
+    def add(
+        self, public_id: str, minute: int, resource_type: str = "image", **meta
+    ) -> dict:
+        asset = {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "created_at": (T0 + timedelta(minutes=minute))
+            .isoformat()
+            .replace("+00:00", "Z"),
+            "format": "png",
+            "version": 1,
+            "bytes": 1000,
+            "width": 800,
+            "height": 600,
+            **meta,
+        }
+        self.assets.append(asset)
+        return asset
+
+    def resources(
+        self,
+        resource_type,
+        type,
+        max_results,
+        direction,
+        start_at=None,
+        next_cursor=None,
+    ):
+        self.listed.append({"start_at": start_at, "next_cursor": next_cursor})
+        if self.error is not None:
+            raise self.error
+        matching = sorted(
+            (
+                a
+                for a in self.assets
+                if a["resource_type"] == resource_type
+                and (
+                    start_at is None
+                    or a["created_at"].replace("Z", "+00:00") >= start_at
+                )
+            ),
+            key=lambda a: a["created_at"],
+        )
+        offset = int(next_cursor or 0)
+        page = matching[offset : offset + max_results]
+        more = offset + max_results < len(matching)
+        return {
+            "resources": page,
+            **({"next_cursor": str(offset + max_results)} if more else {}),
+        }
+
+    def resources_by_ids(self, public_ids, resource_type, type):
+        return {
+            "resources": [
+                a
+                for a in self.assets
+                if a["resource_type"] == resource_type and a["public_id"] in public_ids
+            ]
+        }
+
+
+@pytest.fixture
+def admin_api(monkeypatch, session_factory) -> AdminAPI:
+    api = AdminAPI()
+    monkeypatch.setattr(cloudinary.api, "resources", api.resources)
+    monkeypatch.setattr(cloudinary.api, "resources_by_ids", api.resources_by_ids)
+    monkeypatch.setattr(media_reconcile_module, "AsyncSessionLocal", session_factory)
+    return api
+
+
+def _reconciler(**kwargs) -> MediaReconciler:
+    return MediaReconciler(
+        **{"page_size": 100, "max_pages": 10, "interval_seconds": 0, **kwargs}
+    )
+
+
+def _media(public_id: str, minute: int = 0, **values) -> Media:
+    return Media(
+        public_id=public_id,
+        resource_type=values.pop("resource_type", MediaType.image),
+        secure_url=f"https://res.cloudinary.com/demo/image/upload/{public_id}",
+        created_at=T0 + timedelta(minutes=minute),
+        **{
+            "format": "png",
+            "version": 1,
+            "bytes": 1000,
+            "width": 800,
+            "height": 600,
+            **values,
+        },
+    )
+
+
+async def _state(db, scope: str) -> MediaReconcileState:
+    db.expire_all()
+    return await db.get(MediaReconcileState, scope)
+
+
+async def test_remote_repairs_drifted_rows_in_one_pass(db, admin_api):
+    db.add_all(
+        [
+            _media("same"),
+            _media("drifted", version=1, bytes=1000),
+            _media("no-format", format=None),
+            _media("clip", resource_type=MediaType.video, duration_ms=1000),
+            _media("keeps-size", width=640, height=480),
+        ]
+    )
+    db.add(PendingMediaDeletion(public_id="queued", resource_type=MediaType.image))
+    await db.commit()
+    admin_api.add("same", 0)
+    admin_api.add("drifted", 1, version=2, bytes=2000)
+    admin_api.add("no-format", 2)
+    admin_api.add("clip", 3, resource_type="video", duration=2.5)
+    # Cloudinary didn't report dimensions: the stored ones stay
+    admin_api.add("keeps-size", 4, version=3, width=None, height=None)
+    admin_api.add("orphan", 5)
+    admin_api.add("queued", 6)
+
+    image = await _reconciler().reconcile_remote(MediaType.image)
+    video = await _reconciler().reconcile_remote(MediaType.video)
+
+    assert (image.scanned, image.repaired, image.caught_up) == (6, 3, True)
+    assert image.remote_only == ["orphan"]
+    assert (video.scanned, video.repaired) == (1, 1)
+    db.expire_all()
+    rows = {m.public_id: m for m in (await db.scalars(select(Media))).all()}
+    assert (rows["drifted"].version, rows["drifted"].bytes) == (2, 2000)
+    # NULL vs 'png' is a difference (IS DISTINCT FROM, not =)
+    assert rows["no-format"].format == "png"
+    assert rows["clip"].duration_ms == 2500
+    assert (rows["keeps-size"].version, rows["keeps-size"].width) == (3, 640)
+
+
+async def test_remote_resumes_from_the_high_water_mark(db, admin_api):
+    for n in range(5):
+        admin_api.add(f"asset-{n}", n)
+    reconciler = _reconciler(page_size=2, max_pages=1)
+
+    first = await reconciler.reconcile_remote(MediaType.image)
+    state = await _state(db, "remote:image")
+    assert (first.scanned, first.caught_up) == (2, False)
+    assert state.high_water_mark == T0 + timedelta(minutes=1)
+    assert state.locked_until is None
+    assert state.last_report["scanned"] == 2
+
+    second = await reconciler.reconcile_remote(MediaType.image)
+    assert admin_api.listed[-1]["start_at"] == state.high_water_mark.isoformat()
+    assert sorted(second.remote_only) == ["asset-1", "asset-2"]
+    assert (await _state(db, "remote:image")).high_water_mark == T0 + timedelta(
+        minutes=2
+    )
+
+
+async def test_local_reports_missing_assets_and_starts_over(db, admin_api):
+    db.add_all([_media(f"row-{n}", n) for n in range(5)])
+    await db.commit()
+    for n in (0, 1, 3):
+        admin_api.add(f"row-{n}", n, bytes=1234)
+    reconciler = _reconciler(page_size=3, max_pages=1)
+
+    first = await reconciler.reconcile_local()
+    state = await _state(db, LOCAL_SCOPE)
+    assert (first.scanned, first.repaired, first.missing_remote) == (3, 2, ["row-2"])
+    assert state.high_water_mark == T0 + timedelta(minutes=2)
+
+    second = await reconciler.reconcile_local()
+    state = await _state(db, LOCAL_SCOPE)
+    assert (second.scanned, second.repaired, second.missing_remote) == (2, 1, ["row-4"])
+    assert second.caught_up is True
+    assert (state.high_water_mark, state.last_id) == (None, None)
+
+
+async def test_leased_scope_is_skipped(db, admin_api):
+    db.add(
+        MediaReconcileState(
+            scope="remote:image",
+            locked_until=datetime.now(timezone.utc) + timedelta(minutes=5),
+        )
+    )
+    await db.commit()
+
+    assert await _reconciler().reconcile_remote(MediaType.image) is None
+    assert admin_api.listed == []
+
+
+async def test_failed_transaction_still_releases_the_lease(db, admin_api, monkeypatch):
+    for n in range(4):
+        admin_api.add(f"asset-{n}", n)
+    reconciler = _reconciler(page_size=2)
+    repair = reconciler._repair
+    pages = []
+
+    async def failing_repair(session, resources, resource_type):
+        pages.append(resources)
+        if len(pages) == 2:
+            await session.execute(text("SELECT 1 / 0"))
+        return await repair(session, resources, resource_type)
+
+    monkeypatch.setattr(reconciler, "_repair", failing_repair)
+
+    # the original error surfaces, not one from releasing the lease
+    with pytest.raises(DBAPIError, match="division by zero"):
+        await reconciler.reconcile_remote(MediaType.image)
+
+    state = await _state(db, "remote:image")
+    assert state.locked_until is None
+    assert state.last_report["scanned"] == 2
+    # the first page's mark was committed before the failure
+    assert state.high_water_mark == T0 + timedelta(minutes=1)
+
+
+async def test_admin_api_error_releases_the_lease(db, admin_api):
+    admin_api.error = RuntimeError("Admin API unavailable")
+
+    with pytest.raises(RuntimeError):
+        await _reconciler().reconcile_remote(MediaType.image)
+
+    state = await _state(db, "remote:image")
+    assert state.locked_until is None
+    assert state.last_report["caught_up"] is False
@@ -0,0 +1,418 @@
+"""
+MediaUploadService and POST /media against a local Cloudinary: the SDK is
+pointed at an HTTP stub (`upload_prefix`) that checks request signatures,
+reassembles chunked uploads and answers like the Upload API.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from uuid import UUID
+
+import cloudinary
+import cloudinary.utils
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select
+from starlette.datastructures import Headers
+
+from app.models.media import Media, PendingMediaDeletion
+from app.schemas.media import MediaType
+from app.services import media as media_module
+from app.services import media_upload as media_upload_module
+from app.services.media_upload import MediaUploadService, UploadJobStatus
+
+CLOUD_NAME, API_KEY, API_SECRET = "demo", "123456789012345", "test-api-secret"
+
+
+class CloudinaryServer:
+    """
+    The Upload API on 127.0.0.1. Each completed upload is recorded with the
+    signed params, the reassembled file and the chunks it arrived in.
+    """
+
+    def __init__(self):
+        self.uploads: list[dict] = []
+        self.chunks: list[dict] = []
+        self.error: str | None = None
+        # set to hold requests inside the server until released
+        self.gate: threading.Event | None = None
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._partial: dict[str, bytearray] = {}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def prefix(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self.gate is not None:
+            self.gate.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                try:
+                    status, payload = server._handle(self.path, self.headers, body)
+                except Exception as e:
+                    status, payload = 500, {"error": {"message": f"stub: {e!r}"}}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _handle(self, path: str, headers, body: bytes) -> tuple[int, dict]:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.gate is not None:
+                self.gate.wait(timeout=5)
+            if self.error is not None:
+                return 500, {"error": {"message": self.error}}
+            match = re.fullmatch(rf"/v1_1/{CLOUD_NAME}/(image|video)/upload", path)
+            if match is None:
+                return 404, {"error": {"message": f"unknown endpoint {path}"}}
+            params, file = self._parse(headers["Content-Type"], body)
+            signed = {
+                k: v for k, v in params.items() if k not in ("api_key", "signature")
+            }
+            if params.get("signature") != cloudinary.utils.api_sign_request(
+                signed, API_SECRET
+            ):
+                return 401, {"error": {"message": "Invalid Signature"}}
+            return 200, self._receive(match.group(1), params, file, headers)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    @staticmethod
+    def _parse(
+        content_type: str, body: bytes
+    ) -> tuple[dict[str, str], tuple[str, bytes]]:
+        message = BytesParser(policy=policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        params, file = {}, ("", b"")
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            data = part.get_payload(decode=True)
+            if name == "file":
+                file = (part.get_filename(), data)
+            else:
+                params[name] = data.decode()
+        return params, file
+
+    def _receive(self, resource_type: str, params: dict, file: tuple, headers) -> dict:
+        filename, file = file
+        content_range = headers.get("Content-Range")
+        if content_range is not None:
+            upload_id = headers["X-Unique-Upload-Id"]
+            start, end, total = map(
+                int, re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range).groups()
+            )
+            with self._lock:
+                self.chunks.append(
+                    {"upload_id": upload_id, "start": start, "size": len(file)}
+                )
+                received = self._partial.setdefault(upload_id, bytearray())
+                assert start == len(received), "chunks out of order"
+                received += file
+                if end + 1 < total:
+                    return {"done": False}
+                file = bytes(self._partial.pop(upload_id))
+
+        with self._lock:
+            n = len(self.uploads) + 1
+            stem = filename.rsplit(".", 1)[0]
+            folder = params.get("folder")
+            public_id = f"{folder}/{stem}_{n}" if folder else f"{stem}_{n}"
+            self.uploads.append(
+                {"resource_type": resource_type, "params": params, "file": file}
+            )
+        return {
+            "public_id": public_id,
+            "version": 1700000000 + n,
+            "format": "png" if resource_type == "image" else "mp4",
+            "resource_type": resource_type,
+            "bytes": len(file),
+            "width": 640,
+            "height": 480,
+            "secure_url": f"https://res.cloudinary.com/{CLOUD_NAME}/{resource_type}/upload/"
+            f"v{1700000000 + n}/{public_id}",
+            "original_filename": stem,
+        }
+
+
+@pytest.fixture
+def cloudinary_server(monkeypatch):
+    server = CloudinaryServer()
+    server.start()
+    config = cloudinary.config()
+    for name, value in (
+        ("upload_prefix", server.prefix),
+        ("cloud_name", CLOUD_NAME),
+        ("api_key", API_KEY),
+        ("api_secret", API_SECRET),
+        ("signature_algorithm", "sha1"),
+    ):
+        monkeypatch.setattr(config, name, value, raising=False)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def worker_sessions(monkeypatch, session_factory):
+    """Background jobs open their sessions on the test database."""
+    monkeypatch.setattr(media_upload_module, "AsyncSessionLocal", session_factory)
+
+
+def _png(size: int = 1024) -> tuple:
+    content = (b"\x89PNG" + bytes(range(256)) * (size // 256 + 1))[:size]
+    return ("photo.png", content, "image/png")
+
+
+async def _until(condition, what: str) -> None:
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"timed out waiting for {what}")
+
+
+async def test_uploads_leave_the_loop_free_with_bounded_concurrency(
+    cloudinary_server, tmp_path
+):
+    service = MediaUploadService(max_concurrency=2)
+    cloudinary_server.gate = threading.Event()
+    streams = []
+    for n in range(4):
+        path = tmp_path / f"{n}.png"
+        path.write_bytes(b"x" * 10)
+        streams.append(path.open("rb"))
+
+    uploads = asyncio.gather(
+        *(
+            service.upload(
+                s, filename=f"{n}.png", resource_type=MediaType.image, size_bytes=10
+            )
+            for n, s in enumerate(streams)
+        )
+    )
+    # the requests are held by the server, yet the loop keeps running
+    await _until(lambda: cloudinary_server.active == 2, "two uploads in flight")
+    await asyncio.sleep(0.05)
+    assert cloudinary_server.active == 2
+    cloudinary_server.gate.set()
+    results = await uploads
+
+    assert len(results) == 4
+    assert cloudinary_server.max_active == 2
+    assert len(cloudinary_server.uploads) == 4
+    for s in streams:
+        s.close()
+
+
+async def test_large_uploads_are_sent_in_chunks(
+    cloudinary_server, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(media_module, "UPLOAD_CHUNK_SIZE", 100)
+    service = MediaUploadService(max_concurrency=1)
+    data = bytes(range(250)) * 4
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(data)
+
+    with path.open("rb") as stream:
+        result = await service.upload(
+            stream,
+            filename="clip.mp4",
+            resource_type=MediaType.video,
+            size_bytes=len(data),
+        )
+
+    chunks = cloudinary_server.chunks
+    assert [c["start"] for c in chunks] == list(range(0, 1000, 100))
+    assert {c["size"] for c in chunks} == {100}
+    assert len({c["upload_id"] for c in chunks}) == 1
+    [upload] = cloudinary_server.uploads
+    assert upload["resource_type"] == "video"
+    assert upload["file"] == data
+    assert result["public_id"] == "clip_1"
+
+
+async def test_small_uploads_are_sent_in_one_request(cloudinary_server, tmp_path):
+    service = MediaUploadService(max_concurrency=1)
+    path = tmp_path / "photo.png"
+    path.write_bytes(b"p" * 500)
+
+    with path.open("rb") as stream:
+        await service.upload(
+            stream, filename="photo.png", resource_type=MediaType.image, size_bytes=500
+        )
+
+    assert cloudinary_server.chunks == []
+    [upload] = cloudinary_server.uploads
+    assert upload["file"] == b"p" * 500
+
+
+async def test_create_media_uploads_the_request_file(
+    cloudinary_server, db, db_client, as_admin
+):
+    filename, content, content_type = _png(4096)
+
+    resp = await db_client.post(
+        "/api/v1/media/",
+        files={"file": (filename, content, content_type)},
+        data={"resource_type": "image", "folder": "tests", "title": "Photo"},
+    )
+
+    assert resp.status_code == 201, resp.text
+    [upload] = cloudinary_server.uploads
+    assert upload["file"] == content
+    assert upload["params"]["folder"] == "tests"
+    assert upload["params"]["context"] == "caption=Photo"
+    media = await db.get(Media, UUID(resp.json()["id"]))
+    assert media.public_id == "tests/photo_1"
+    assert media.bytes == 4096
+
+
+async def test_create_media_rejects_unsupported_content_type(
+    cloudinary_server, db_client, as_admin
+):
+    resp = await db_client.post(
+        "/api/v1/media/",
+        files={"file": ("notes.txt", b"hello", "text/plain")},
+        data={"resource_type": "image"},
+    )
+
+    assert resp.status_code == 415
+    assert cloudinary_server.uploads == []
+
+
+async def _wait_for_job(db_client, job_id: str) -> dict:
+    for _ in range(500):
+        job = (await db_client.get(f"/api/v1/media/uploads/{job_id}")).json()
+        if job["status"] in (UploadJobStatus.completed, UploadJobStatus.failed):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"upload job {job_id} did not finish")
+
+
+async def test_background_upload_returns_job_and_inserts_media(
+    cloudinary_server, worker_sessions, db, db_client, as_admin
+):
+    resp = await db_client.post(
+        "/api/v1/media/?background=true",
+        files={"file": _png()},
+        data={"resource_type": "image", "is_published": "true"},
+    )
+
+    assert resp.status_code == 202, resp.text
+    accepted = resp.json()
+    assert accepted["status"] in (UploadJobStatus.pending, UploadJobStatus.uploading)
+    assert accepted["media_id"] is None
+
+    job = await _wait_for_job(db_client, accepted["id"])
+    assert job["status"] == UploadJobStatus.completed
+    media = (
+        await db.execute(select(Media).where(Media.id == UUID(job["media_id"])))
+    ).scalar_one()
+    assert media.is_published is True
+    assert media.original_filename == "photo"
+
+
+async def test_background_upload_failure_is_reported_on_the_job(
+    cloudinary_server, worker_sessions, db, db_client, as_admin
+):
+    cloudinary_server.error = "fake cloudinary is down"
+
+    resp = await db_client.post(
+        "/api/v1/media/?background=true",
+        files={"file": _png()},
+        data={"resource_type": "image"},
+    )
+
+    job = await _wait_for_job(db_client, resp.json()["id"])
+    assert job["status"] == UploadJobStatus.failed
+    assert "fake cloudinary is down" in job["error"]
+    assert (await db.execute(select(Media))).first() is None
+    assert (await db.execute(select(PendingMediaDeletion))).first() is None
+
+
+async def test_background_upload_not_recorded_is_queued_for_deletion(
+    cloudinary_server, worker_sessions, db, db_client, as_admin, monkeypatch
+):
+    async def create_with_rules(db, payload):
+        raise HTTPException(status_code=500, detail="A database error occurred")
+
+    monkeypatch.setattr(
+        media_upload_module.media_service, "create_with_rules", create_with_rules
+    )
+
+    resp = await db_client.post(
+        "/api/v1/media/?background=true",
+        files={"file": _png()},
+        data={"resource_type": "image"},
+    )
+
+    job = await _wait_for_job(db_client, resp.json()["id"])
+    assert job["status"] == UploadJobStatus.failed
+    pending = (await db.execute(select(PendingMediaDeletion))).scalar_one()
+    assert pending.public_id == "photo_1"
+    assert pending.resource_type == MediaType.image
+
+
+async def test_shutdown_does_not_close_the_file_under_a_running_upload(
+    cloudinary_server, worker_sessions, monkeypatch
+):
+    monkeypatch.setattr(media_module, "UPLOAD_CHUNK_SIZE", 100)
+    service = MediaUploadService(max_concurrency=1)
+    cloudinary_server.gate = threading.Event()
+    data = bytes(range(250)) * 4
+    upload = UploadFile(
+        BytesIO(data),
+        filename="clip.mp4",
+        headers=Headers({"content-type": "video/mp4"}),
+    )
+
+    await service.submit(upload, resource_type=MediaType.video)
+    await _until(lambda: cloudinary_server.active == 1, "the first chunk")
+    await service.shutdown()
+    cloudinary_server.gate.set()
+
+    # the worker thread still owns the file and sends the remaining chunks
+    await _until(lambda: cloudinary_server.uploads, "the upload to complete")
+    assert cloudinary_server.uploads[0]["file"] == data
+
+
+async def test_unknown_upload_job_is_404(db_client, as_admin):
+    resp = await db_client.get(
+        "/api/v1/media/uploads/00000000-0000-0000-0000-000000000000"
+    )
+
+    assert resp.status_code == 404
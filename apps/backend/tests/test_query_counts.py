@@ -0,0 +1,155 @@
+"""
+Statements per public read. Relationships are lazy="raise", so each endpoint
+runs exactly the loads its loader profile names, however many rows and
+children it returns.
+"""
+
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.media import Media, MediaType
+from app.models.profile import Achievement, Experience, Profile, Skill, SupportLink
+from app.models.project import Project
+from app.models.section import Section
+from app.models.user import User, UserRole
+
+
+def _media(n: int) -> Media:
+    return Media(
+        public_id=f"test/{uuid4()}",
+        resource_type=MediaType.image,
+        secure_url=f"https://res.cloudinary.com/demo/image/upload/v1/test/{n}.jpg",
+        bytes=1000,
+        is_published=True,
+    )
+
+
+async def _seed_courses(db, count: int) -> list[Course]:
+    instructor = User(
+        username="instructor",
+        email="instructor@example.com",
+        full_name="Instructor",
+        role=UserRole.ADMIN,
+        password="x",
+    )
+    courses = []
+    for n in range(count):
+        course = Course(
+            title=f"Course {n}",
+            is_published=True,
+            instructor=instructor,
+            image=_media(n),
+            sections=[
+                Section(
+                    title=f"Section {s}",
+                    section_order=s,
+                    lessons=[
+                        Lesson(title=f"Lesson {l}", content="body", lesson_order=l)
+                        for l in range(3)
+                    ],
+                )
+                for s in range(3)
+            ],
+        )
+        courses.append(course)
+    db.add_all(courses)
+    await db.commit()
+    return courses
+
+
+async def _seed_projects(db, count: int) -> list[Project]:
+    # technologies/features/tags stay empty: ProjectRead declares them as
+    # list[str] while the relationships hold rows. Their loads still run.
+    projects = [
+        Project(
+            title=f"Project {n}",
+            is_published=True,
+            thumbnail_image=_media(n),
+            gallery_medias=[_media(100 + n), _media(200 + n)],
+        )
+        for n in range(count)
+    ]
+    db.add_all(projects)
+    await db.commit()
+    return projects
+
+
+async def _seed_profile(db) -> Profile:
+    profile = Profile(
+        full_name="Team Member",
+        profile_image=_media(0),
+        support_links=[SupportLink(title="Site", url="https://example.com")],
+        achievements=[Achievement(title="Award")],
+        experiences=[
+            Experience(title="Engineer", company="Acme", from_date=date(2020, 1, 1))
+        ],
+        technical_skills=[Skill(title="Python"), Skill(title="SQL")],
+    )
+    db.add(profile)
+    await db.commit()
+    return profile
+
+
+@pytest.mark.parametrize("count", [1, 5])
+async def test_list_courses(db, db_client, queries, count):
+    await _seed_courses(db, count)
+    queries.clear()
+
+    resp = await db_client.get("/api/v1/courses")
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == count
+    # courses + joined image, instructor
+    assert len(queries) == 2
+
+
+@pytest.mark.parametrize("count", [1, 5])
+async def test_get_course(db, db_client, queries, count):
+    courses = await _seed_courses(db, count)
+    queries.clear()
+
+    resp = await db_client.get(f"/api/v1/courses/{courses[0].id}")
+
+    assert resp.status_code == 200
+    assert len(resp.json()["sections"]) == 3
+    # course + joined image, instructor, sections, lessons
+    assert len(queries) == 4
+
+
+@pytest.mark.parametrize("count", [1, 5])
+async def test_list_projects(db, db_client, queries, count):
+    await _seed_projects(db, count)
+    queries.clear()
+
+    resp = await db_client.get("/api/v1/projects")
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == count
+    # projects + joined thumbnail, technologies, features, tags, gallery
+    assert len(queries) == 5
+
+
+async def test_get_project(db, db_client, queries):
+    projects = await _seed_projects(db, 3)
+    queries.clear()
+
+    resp = await db_client.get(f"/api/v1/projects/{projects[0].id}")
+
+    assert resp.status_code == 200
+    assert len(queries) == 5
+
+
+async def test_get_profile(db, db_client, queries):
+    profile = await _seed_profile(db)
+    queries.clear()
+
+    resp = await db_client.get(f"/api/v1/profile/{profile.id}")
+
+    assert resp.status_code == 200
+    assert len(resp.json()["technical_skills"]) == 2
+    # profile, image, support links, achievements, experiences, skills
+    assert len(queries) == 6
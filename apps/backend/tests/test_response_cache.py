@@ -0,0 +1,186 @@
+"""ResponseCache with the in-memory backend (conftest gives each test a fresh one)."""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from starlette.requests import Request
+
+from app.core.response_cache import RawJSON, response_cache
+from app.models.course import Course
+from app.models.user import User
+
+UPDATED_AT = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def _request(path: str = "/api/v1/courses", query: str = "", **headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": [
+                (k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()
+            ],
+        }
+    )
+
+
+class Builder:
+    """Counts builds; each one returns the current `body`."""
+
+    def __init__(self, body: bytes = b'[{"title":"v1"}]'):
+        self.body = body
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return RawJSON(self.body, UPDATED_AT), {}
+
+
+async def _serve(build, request=None, namespace="courses"):
+    return await response_cache.serve(request or _request(), namespace, None, build)
+
+
+async def test_miss_builds_once_then_hits(cache_backend):
+    build = Builder()
+
+    first = await _serve(build)
+    second = await _serve(build)
+
+    assert build.calls == 1
+    assert first.body == second.body == build.body
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["last-modified"] == format_datetime(UPDATED_AT, usegmt=True)
+
+
+async def test_key_is_path_and_sorted_query(cache_backend):
+    build = Builder()
+
+    await _serve(build, _request(query="limit=5&skip=10"))
+    await _serve(build, _request(query="skip=10&limit=5"))
+    await _serve(build, _request(query="skip=20&limit=5"))
+    await _serve(build, _request(path="/api/v1/courses/other", query="skip=10&limit=5"))
+
+    assert build.calls == 3
+
+
+async def test_invalidate_drops_only_its_namespace(cache_backend):
+    courses, projects = Builder(), Builder()
+    await _serve(courses)
+    await _serve(projects, _request("/api/v1/projects"), namespace="projects")
+
+    await response_cache.invalidate("courses")
+    await _serve(courses)
+    await _serve(projects, _request("/api/v1/projects"), namespace="projects")
+
+    assert courses.calls == 2
+    assert projects.calls == 1
+
+
+async def test_invalidation_during_build_is_not_cached(cache_backend):
+    started, release = asyncio.Event(), asyncio.Event()
+    build = Builder()
+
+    async def slow_build():
+        # reads the pre-write state, then waits while a write lands
+        result = await build()
+        started.set()
+        await release.wait()
+        return result
+
+    pending = asyncio.create_task(_serve(slow_build))
+    await started.wait()
+    await response_cache.invalidate("courses")
+    build.body = b'[{"title":"v2"}]'
+    release.set()
+    stale = await pending
+
+    # the in-flight request still gets its body, but it is not kept
+    assert stale.body == b'[{"title":"v1"}]'
+    assert await cache_backend.get("courses", "/api/v1/courses?") is None
+    fresh = await _serve(build)
+    assert fresh.body == b'[{"title":"v2"}]'
+    assert build.calls == 2
+
+
+async def test_if_none_match_returns_304(cache_backend):
+    build = Builder()
+    etag = (await _serve(build)).headers["etag"]
+
+    resp = await _serve(build, _request(if_none_match=f'W/{etag}, "other"'))
+
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert resp.body == b""
+
+
+async def test_if_modified_since_moves_forward_on_invalidation(cache_backend):
+    build = Builder()
+    last_modified = (await _serve(build)).headers["last-modified"]
+
+    assert (
+        await _serve(build, _request(if_modified_since=last_modified))
+    ).status_code == 304
+
+    await asyncio.sleep(1)  # HTTP dates have second precision
+    await response_cache.invalidate("courses")
+    resp = await _serve(build, _request(if_modified_since=last_modified))
+
+    assert resp.status_code == 200
+    assert resp.headers["last-modified"] != last_modified
+
+
+async def test_disabled_cache_always_builds(cache_backend, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+    build = Builder()
+
+    await _serve(build)
+    await _serve(build)
+
+    assert build.calls == 2
+
+
+def _course(title: str) -> Course:
+    instructor = User(
+        username="instructor",
+        email="instructor@example.com",
+        full_name="I",
+        password="x",
+    )
+    return Course(title=title, is_published=True, instructor=instructor)
+
+
+async def test_cached_read_runs_no_queries(db, db_client, queries):
+    db.add(_course("Cached"))
+    await db.commit()
+    await db_client.get("/api/v1/courses")
+    queries.clear()
+
+    resp = await db_client.get("/api/v1/courses")
+
+    assert resp.status_code == 200
+    assert resp.json()[0]["title"] == "Cached"
+    assert queries == []
+
+
+async def test_course_write_invalidates_public_reads(db, db_client, as_admin):
+    course = _course("Before")
+    db.add(course)
+    await db.commit()
+    before = await db_client.get(f"/api/v1/courses/{course.id}")
+
+    resp = await db_client.put(
+        f"/api/v1/courses/{course.id}", json={"title": "After", "image_id": None}
+    )
+    assert resp.status_code == 200, resp.text
+
+    after = await db_client.get(
+        f"/api/v1/courses/{course.id}",
+        headers={"If-None-Match": before.headers["etag"]},
+    )
+    assert after.status_code == 200
+    assert after.json()["title"] == "After"
+    listing = await db_client.get("/api/v1/courses")
+    assert [c["title"] for c in listing.json()] == ["After"]
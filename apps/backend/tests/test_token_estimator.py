@@ -0,0 +1,105 @@
+"""
+TokenEstimator: the uncalibrated guess, per-model calibration from real
+counts, and the min-samples / tolerance gates callers use before trusting it.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import gemini_service
+from app.utils.token_estimator import TokenEstimator, _raw
+
+PROSE = "The quick brown fox jumps over the lazy dog. " * 20
+CODE = "def f(x):\n    return {'a': [x, x + 1], 'b': (x * 2) % 3}\n" * 10
+
+
+def test_raw_is_about_four_characters_a_token_for_prose():
+    assert _raw(PROSE) == pytest.approx(len(PROSE) / 4, rel=0.35)
+
+
+def test_raw_counts_symbols_and_non_ascii_higher():
+    assert _raw(CODE) > len(CODE) / 4
+    assert _raw("é" * 40) > _raw("e" * 40)
+
+
+def test_untrained_model_is_not_trusted():
+    estimator = TokenEstimator(min_samples=3)
+
+    estimate = estimator.estimate("model", PROSE)
+
+    assert estimate.tokens == round(_raw(PROSE))
+    assert (estimate.error, estimate.samples) == (1.0, 0)
+    assert not estimator.trusted(estimate, tolerance=0.5)
+
+
+def test_observe_converges_on_the_model_ratio():
+    estimator = TokenEstimator(min_samples=3)
+    texts = [PROSE, CODE, PROSE + CODE, PROSE[:300], CODE[:200]] * 6
+
+    for text in texts:
+        estimator.observe("model", text, round(_raw(text) * 1.3))
+
+    cal = estimator.calibration()["model"]
+    assert cal["ratio"] == pytest.approx(1.3, rel=0.01)
+    assert cal["error"] < 0.02
+    assert cal["samples"] == len(texts)
+    estimate = estimator.estimate("model", PROSE)
+    assert estimate.tokens == pytest.approx(_raw(PROSE) * 1.3, rel=0.02)
+    assert estimate.upper >= estimate.tokens
+    # another model is calibrated separately
+    assert estimator.estimate("other", PROSE).samples == 0
+
+
+def test_observe_ignores_missing_counts():
+    estimator = TokenEstimator(min_samples=1)
+
+    estimator.observe("model", PROSE, None)
+    estimator.observe("model", PROSE, 0)
+
+    assert estimator.calibration() == {}
+
+
+def test_trusted_needs_min_samples():
+    estimator = TokenEstimator(min_samples=3)
+    for n in range(3):
+        estimate = estimator.estimate("model", PROSE)
+        assert not estimator.trusted(estimate, tolerance=1.0), n
+        estimator.observe("model", PROSE, round(_raw(PROSE)))
+
+    assert estimator.trusted(estimator.estimate("model", PROSE), tolerance=1.0)
+
+
+def test_trusted_needs_error_within_tolerance():
+    estimator = TokenEstimator(min_samples=2)
+    # the ratio swings between prompts, so the calibrated estimate keeps missing
+    for n in range(10):
+        estimator.observe("model", PROSE, round(_raw(PROSE) * (1.0 if n % 2 else 2.0)))
+
+    estimate = estimator.estimate("model", PROSE)
+    assert estimate.error > 0.2
+    assert not estimator.trusted(estimate, tolerance=0.2)
+    assert estimator.trusted(estimate, tolerance=estimate.error)
+
+
+async def test_remote_count_calibrates_the_estimator(monkeypatch):
+    estimator = TokenEstimator(min_samples=1)
+    monkeypatch.setattr(gemini_service, "token_estimator", estimator)
+    calls = []
+
+    async def count_tokens(model, contents):
+        calls.append(contents)
+        return SimpleNamespace(total_tokens=321)
+
+    client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(count_tokens=count_tokens))
+    )
+    prompt = "calibrate me " + PROSE
+
+    assert await gemini_service.count_tokens(client, "count-model", prompt) == 321
+    assert await gemini_service.count_tokens(client, "count-model", prompt) == 321
+
+    # the cached second count is not observed twice
+    assert len(calls) == 1
+    assert estimator.calibration()["count-model"]["samples"] == 1
+    assert estimator.estimate("count-model", prompt).tokens == 321
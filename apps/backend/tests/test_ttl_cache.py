@@ -0,0 +1,91 @@
+"""
+TTLCache.get_or_load: concurrent misses share one load, and cancelling the
+caller that runs it doesn't cancel the others.
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.ttl_cache import TTLCache
+
+
+class Loader:
+    """Counts loads; each one waits for `release` before returning `value`."""
+
+    def __init__(self, value="value"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error: Exception | None = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+@pytest.fixture
+def cache() -> TTLCache[str, str]:
+    return TTLCache(maxsize=10, ttl=60)
+
+
+async def test_concurrent_misses_share_one_load(cache):
+    load = Loader()
+    tasks = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 3
+    assert load.calls == 1
+    assert cache.get("k") == "value"
+
+
+async def test_failed_load_reaches_every_waiter_and_is_not_cached(cache):
+    load = Loader()
+    load.error = RuntimeError("upstream down")
+    tasks = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    load.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.get("k") is None
+
+
+async def test_waiters_load_again_when_the_loading_caller_is_cancelled(cache):
+    load = Loader()
+    loading = asyncio.create_task(cache.get_or_load("k", load))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    loading.cancel()
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert await asyncio.gather(*waiters) == ["value", "value"]
+    with pytest.raises(asyncio.CancelledError):
+        await loading
+    # the first load was abandoned; one waiter ran the second for both
+    assert load.calls == 2
+
+
+async def test_cancelled_waiter_leaves_the_load_running(cache):
+    load = Loader()
+    loading = asyncio.create_task(cache.get_or_load("k", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("k", load))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert await loading == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert load.calls == 1